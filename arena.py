@@ -4,6 +4,8 @@
 
 import math
 from sensors import Sensors
+from step_kernel import StepKernel, wrap_angle
+from spatial_index import UniformGrid
 
 class Arena:
     """
@@ -19,6 +21,7 @@ class Arena:
         self.DAMAGE = 10  # health points per hit
         self.SHOOT_RANGE = 0.2  # max distance for conditional hit
         self.SHOOT_ANGLE = math.radians(30)  # max angle difference for conditional hit
+        self.index = None  # spatial index of the living robots, used with more than two robots
 
     def get_sensors(self, robot):
         return Sensors.get(robot, self)
@@ -29,10 +32,23 @@ class Arena:
         applies robot actions, and calculates damage.
         """
         self.current_step += 1
-        for robot in self.robots:
-            sensors = self.get_sensors(robot)
-            action = robot.controller.activate(sensors)
-            robot.apply_action(action)
+        kernel = StepKernel.for_arena(self)
+        if kernel is not None:
+            kernel.step()
+            return
+
+        if len(self.robots) > 2:
+            # Free-for-all / team battle: the living robots sense, then all of them act
+            self.build_index()
+            alive = [robot for robot in self.robots if not robot.is_dead()]
+            sensors = [Sensors._compute(robot, self.nearest_opponent(robot) or robot, self) for robot in alive]
+            for robot, robot_sensors in zip(alive, sensors):
+                robot.apply_action(robot.controller.activate(robot_sensors))
+        else:
+            for robot in self.robots:
+                sensors = self.get_sensors(robot)
+                action = robot.controller.activate(sensors)
+                robot.apply_action(action)
 
         # After all robots moved, apply damage if they shot
         self.apply_damage()
@@ -46,6 +62,14 @@ class Arena:
         Apply damage when a robot shoots and the target is within range and angle.
         Uses the robot's last_action to determine if a shot was fired.
         """
+        kernel = StepKernel.for_arena(self)
+        if kernel is not None:
+            kernel.apply_damage()
+            return
+        if len(self.robots) > 2:
+            self._apply_damage_indexed()
+            return
+
         for shooter in self.robots:
             self._process_shooter_shot(shooter)
 
@@ -69,13 +93,36 @@ class Arena:
             target.health -= self.DAMAGE
             shooter.damage_inflicted += self.DAMAGE
 
+    def _apply_damage_indexed(self):
+        """
+        Same hit rule for many robots: only the robots in the grid cells within
+        SHOOT_RANGE of a shooter are tested. Shots are simultaneous, so a robot
+        killed in this step still fires, and every opponent in range and angle is hit.
+        """
+        self.build_index()
+        shooters = [robot for robot in self.robots
+                    if not robot.is_dead() and robot.last_action is not None and robot.last_action[2] > 0.5]
+        for shooter in shooters:
+            for _, target in sorted(self.index.within(shooter.x, shooter.y, self.SHOOT_RANGE), key=lambda c: c[0]):
+                if shooter.is_opponent(target):
+                    self._check_and_apply_hit(shooter, target)
+
+    def build_index(self):
+        """ Indexes the living robots at their current positions. """
+        if self.index is None:
+            self.index = UniformGrid(self.width, self.height, self.SHOOT_RANGE)
+        self.index.rebuild([(i, robot) for i, robot in enumerate(self.robots) if not robot.is_dead()])
+
+    def nearest_opponent(self, robot):
+        """
+        Nearest living opponent of robot according to the last build_index(), or None.
+        """
+        found = self.index.nearest(robot.x, robot.y, robot.is_opponent)
+        return found[1] if found is not None else None
+
     def normalize_angle(self, angle):
         # normalize angle to [-pi, pi]
-        while angle > math.pi:
-            angle -= 2*math.pi
-        while angle < -math.pi:
-            angle += 2*math.pi
-        return angle
+        return wrap_angle(angle)
 
     def keep_inside(self, robot):
         robot.x = max(0, min(robot.x, self.width))
@@ -88,6 +135,10 @@ class Arena:
         """
         if self.current_step >= self.max_steps:
             return True
+        if len(self.robots) > 2:
+            # over when the living robots all belong to one side
+            alive = [robot for robot in self.robots if not robot.is_dead()]
+            return all(not alive[0].is_opponent(robot) for robot in alive[1:])
         for robot in self.robots:
             if robot.is_dead():
                 return True
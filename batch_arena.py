@@ -0,0 +1,257 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import math
+import numpy as np
+from compiled_network import CompiledNetwork, NetworkStack
+from early_stop import BatchEarlyStop
+
+# np.arctan2 and np.hypot can differ from libm in the last bit, which is enough
+# to make two trajectories diverge after a few steps. The scalar math versions
+# keep the batch engine bit-identical with Sensors and Arena, at the cost of one
+# Python call per robot and step (about 10x slower than the NumPy functions), so
+# they are only used when the results must be exact (see BatchArena).
+_atan2 = np.frompyfunc(math.atan2, 2, 1)
+_hypot = np.frompyfunc(math.hypot, 2, 1)
+
+
+def exact_atan2(dy, dx):
+    return _atan2(dy, dx).astype(np.float64)
+
+
+def exact_hypot(dx, dy):
+    return _hypot(dx, dy).astype(np.float64)
+
+
+def normalize_angles(angles):
+    """
+    Normalize angles to the range [-pi, pi] with the same repeated
+    subtraction used by Sensors._normalize_angle and Arena.normalize_angle.
+    """
+    angles = np.array(angles, dtype=np.float64)
+    over = angles > math.pi
+    while over.any():
+        angles[over] -= 2 * math.pi
+        over = angles > math.pi
+    under = angles < -math.pi
+    while under.any():
+        angles[under] += 2 * math.pi
+        under = angles < -math.pi
+    return angles
+
+
+class BatchArena:
+    """
+    Simulates B independent 1v1 battles in lockstep.
+    The state is stored as structure-of-arrays: every field has shape (2, B),
+    where row 0 is the robot starting at (0.2, 0.5) and row 1 the one at (0.8, 0.5).
+    The rules are the same as Robot, Sensors and Arena, applied to all
+    unfinished battles at once.
+    With action_repeat = k the controllers are queried every k steps and their
+    actions are applied again in the steps in between (see utils.action_repeat).
+    With exact = False distances and bearings use np.hypot and np.arctan2, whose
+    last bit can differ from math: results match simulate_battle only within
+    float tolerance, like matrix networks.
+    """
+    def __init__(self, num_battles, width=1.0, height=1.0, max_steps=300, early_stop=None, action_repeat=1,
+                 exact=True):
+        self.num_battles = num_battles
+        self.width = width
+        self.height = height
+        self.max_steps = max_steps
+        self.DAMAGE = 10  # health points per hit
+        self.SHOOT_RANGE = 0.2  # max distance for conditional hit
+        self.SHOOT_ANGLE = math.radians(30)  # max angle difference for conditional hit
+        self.max_health = 100
+
+        self.x = np.empty((2, num_battles))
+        self.y = np.full((2, num_battles), 0.5)
+        self.x[0] = 0.2
+        self.x[1] = 0.8
+        self.angle = np.zeros((2, num_battles))
+        self.health = np.full((2, num_battles), self.max_health, dtype=np.int64)
+        self.damage_inflicted = np.zeros((2, num_battles), dtype=np.int64)
+        self.alive = np.ones(num_battles, dtype=bool)  # battles still running
+        self.steps = np.full(num_battles, max_steps - 1, dtype=np.int64)
+        # Optional BatchEarlyStop, and the steps it saved for each battle
+        self.early_stop = early_stop
+        self.steps_saved = np.zeros(num_battles, dtype=np.int64)
+        # Actions held between two controller queries
+        self.action_repeat = action_repeat
+        self.actions = np.zeros((2, num_battles, 3))
+        self.hypot = exact_hypot if exact else np.hypot
+        self.atan2 = exact_atan2 if exact else np.arctan2
+
+    def get_sensors(self, idx):
+        """
+        Compute the sensor vectors of both sides for the battles in idx.
+        Returns an array of shape (2, len(idx), 7) with the same ordering as Sensors.get.
+        """
+        x = self.x[:, idx]
+        y = self.y[:, idx]
+        dx = x[::-1] - x
+        dy = y[::-1] - y
+        distance = self.hypot(dx, dy)
+        angle_to_opponent = self.atan2(dy, dx)
+        angle_diff = normalize_angles(angle_to_opponent - self.angle[:, idx])
+
+        max_dist = math.hypot(self.width, self.height)
+        sensors = np.empty((2, len(idx), 7))
+        sensors[:, :, 0] = distance / max_dist
+        sensors[:, :, 1] = angle_diff / math.pi
+        sensors[:, :, 2] = self.health[:, idx] / self.max_health
+        sensors[:, :, 3] = x / self.width
+        sensors[:, :, 4] = (self.width - x) / self.width
+        sensors[:, :, 5] = y / self.height
+        sensors[:, :, 6] = (self.height - y) / self.height
+        return sensors
+
+    def apply_actions(self, idx, actions):
+        """
+        Same update as Robot.apply_action; actions has shape (2, len(idx), 3).
+        """
+        move = actions[:, :, 0] * 0.05
+        angle = self.angle[:, idx]
+        self.x[:, idx] += np.cos(angle) * move
+        self.y[:, idx] += np.sin(angle) * move
+        self.angle[:, idx] = angle + actions[:, :, 1] * 0.1
+
+    def apply_damage(self, idx, shooting):
+        """
+        Same hit test as Arena._check_and_apply_hit for every shooting robot.
+        shooting is a boolean array of shape (2, len(idx)).
+        """
+        hits = np.zeros(shooting.shape, dtype=bool)
+        for side in (0, 1):
+            shooters = np.flatnonzero(shooting[side])
+            if len(shooters) == 0:
+                continue
+            battles = idx[shooters]
+            dx = self.x[1 - side, battles] - self.x[side, battles]
+            dy = self.y[1 - side, battles] - self.y[side, battles]
+            distance = self.hypot(dx, dy)
+            angle_to_target = self.atan2(dy, dx)
+            angle_diff = np.abs(normalize_angles(self.angle[side, battles] - angle_to_target))
+            hits[side, shooters] = (distance <= self.SHOOT_RANGE) & (angle_diff <= self.SHOOT_ANGLE)
+
+        # Damage is applied after all hit tests, like Arena.apply_damage
+        self.health[:, idx] -= self.DAMAGE * hits[::-1]
+        self.damage_inflicted[:, idx] += self.DAMAGE * hits
+
+    def keep_inside(self, idx):
+        # same as max(0, min(v, limit)) in Arena.keep_inside
+        for values, limit in ((self.x, self.width), (self.y, self.height)):
+            v = values[:, idx]
+            v = np.where(v > limit, limit, v)
+            values[:, idx] = np.where(v > 0, v, 0.0)
+
+    def step(self, step, actions_fn):
+        """
+        Advances every running battle by one step.
+        actions_fn(idx, sensors) must return the actions of both sides,
+        an array of shape (2, len(idx), 3).
+        """
+        idx = np.flatnonzero(self.alive)
+        if step % self.action_repeat == 0:
+            actions = actions_fn(idx, self.get_sensors(idx))
+            self.actions[:, idx] = actions
+        else:
+            actions = self.actions[:, idx]
+        self.apply_actions(idx, actions)
+        self.apply_damage(idx, actions[:, :, 2] > 0.5)
+        self.keep_inside(idx)
+
+        # Battle ends when at least one robot is destroyed
+        dead = (self.health[:, idx] <= 0).any(axis=0)
+        finished = idx[dead]
+        self.steps[finished] = step
+        self.alive[finished] = False
+
+        # ... or when its result can no longer change (credited as a full-length battle)
+        if self.early_stop is not None:
+            settled = self.early_stop.settled(step, self, idx, actions) & ~dead
+            stopped = idx[settled]
+            self.steps_saved[stopped] = self.max_steps - 1 - step
+            self.alive[stopped] = False
+
+    @property
+    def steps_played(self):
+        """ Number of steps actually simulated in each battle. """
+        return self.steps + 1 - self.steps_saved
+
+    def run(self, actions_fn):
+        for step in range(self.max_steps):
+            if not self.alive.any():
+                break
+            self.step(step, actions_fn)
+        return self.compute_fitness()
+
+    def compute_fitness(self):
+        """
+        Vectorized compute_fitness from utils: win bonus, damage inflicted
+        and survival reward, in the same order of operations.
+        """
+        dead = self.health <= 0
+        win1 = dead[1] & ~dead[0]
+        win2 = dead[0] & ~dead[1]
+        fitness1 = np.where(win1, 100.0, 0.0) + self.damage_inflicted[0] + self.steps * 0.1
+        fitness2 = np.where(win2, 100.0, 0.0) + self.damage_inflicted[1] + self.steps * 0.1
+        return fitness1, fitness2
+
+
+def controller_actions(controllers1, controllers2):
+    """
+    Builds an actions_fn that queries one controller per battle and side.
+    CompiledNetwork controllers are stacked and evaluated together in a single
+    NetworkStack call per step; any other controller goes through the usual
+    .activate() interface.
+    """
+    networks = []
+    network_ids = {}
+    network_index = np.full((2, len(controllers1)), -1, dtype=np.int64)
+    for side, controllers in enumerate((controllers1, controllers2)):
+        for battle, controller in enumerate(controllers):
+            if isinstance(controller, CompiledNetwork):
+                if id(controller) not in network_ids:
+                    network_ids[id(controller)] = len(networks)
+                    networks.append(controller)
+                network_index[side, battle] = network_ids[id(controller)]
+    stack = NetworkStack(networks) if networks else None
+
+    def actions_fn(idx, sensors):
+        actions = np.empty((2, len(idx), 3))
+        stacked = network_index[:, idx] >= 0
+        if stack is not None and stacked.any():
+            actions[stacked] = stack.activate(network_index[:, idx][stacked], sensors[stacked])
+        for side, controllers in enumerate((controllers1, controllers2)):
+            for row in np.flatnonzero(~stacked[side]):
+                actions[side, row] = controllers[idx[row]].activate(sensors[side, row].tolist())
+        return actions
+    return actions_fn
+
+
+def simulate_battles(controllers1, controllers2, max_steps=300, early_stop_mode=None, stall_steps=30, stats=None,
+                     action_repeat=1, exact=True):
+    """
+    Batched version of utils.simulate_battle: battle i is fought between
+    controllers1[i] and controllers2[i] (exact as in BatchArena).
+    Returns two arrays with the fitness of each side. If a stats dict is given,
+    it receives the arrays of simulated steps, of steps saved by early termination
+    and of the damage inflicted by each side, shape (2, num_battles).
+    """
+    num_battles = len(controllers1)
+    early_stop = None
+    if early_stop_mode is not None:
+        deterministic = [getattr(c1, "deterministic", True) and getattr(c2, "deterministic", True)
+                         for c1, c2 in zip(controllers1, controllers2)]
+        early_stop = BatchEarlyStop(num_battles, max_steps, early_stop_mode, stall_steps, deterministic,
+                                    action_repeat)
+    arena = BatchArena(num_battles, max_steps=max_steps, early_stop=early_stop, action_repeat=action_repeat,
+                       exact=exact)
+    fitness = arena.run(controller_actions(controllers1, controllers2))
+    if stats is not None:
+        stats["steps"] = arena.steps_played
+        stats["steps_saved"] = arena.steps_saved
+        stats["damage"] = arena.damage_inflicted
+    return fitness
@@ -0,0 +1,85 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+"""
+Times one simulation step done with separate Sensors / Arena hit computations
+(each call recomputes the pairwise geometry) against the fused StepKernel.
+
+    python benchmarks/bench_step_kernel.py [--steps N] [--repeat R]
+"""
+
+import argparse
+import math
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arena import Arena
+from robot import Robot
+from sensors import Sensors
+from step_kernel import StepKernel, wrap_angle
+
+
+class Circler:
+    """ Deterministic controller that keeps both robots moving, turning and shooting. """
+    def activate(self, sensors):
+        return 0.6, 0.3 if sensors[1] > 0 else -0.3, 1.0
+
+
+def unfused_step(arena, robot1, robot2, controller1, controller2):
+    # the per-step code of simulate_battle before the step kernel
+    robot1.apply_action(controller1.activate(Sensors._compute(robot1, robot2, arena)))
+    robot2.apply_action(controller2.activate(Sensors._compute(robot2, robot1, arena)))
+    for shooter, target in ((robot1, robot2), (robot2, robot1)):
+        if shooter.last_action[2] > 0.5:
+            dx = target.x - shooter.x
+            dy = target.y - shooter.y
+            distance = math.hypot(dx, dy)
+            angle_diff = abs(wrap_angle(shooter.angle - math.atan2(dy, dx)))
+            if distance <= arena.SHOOT_RANGE and angle_diff <= arena.SHOOT_ANGLE:
+                target.health -= arena.DAMAGE
+                shooter.damage_inflicted += arena.DAMAGE
+    arena.keep_inside(robot1)
+    arena.keep_inside(robot2)
+
+
+def new_arena():
+    robot1 = Robot(None, start_pos=(0.2, 0.5))
+    robot2 = Robot(None, start_pos=(0.8, 0.5))
+    return Arena(robots=[robot1, robot2]), robot1, robot2
+
+
+def run_unfused(steps):
+    arena, robot1, robot2 = new_arena()
+    controller = Circler()
+    for _ in range(steps):
+        unfused_step(arena, robot1, robot2, controller, controller)
+
+
+def run_fused(steps):
+    arena, _, _ = new_arena()
+    kernel = StepKernel(arena)
+    controller = Circler()
+    for _ in range(steps):
+        kernel.battle_step(controller, controller)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-step cost of the fused geometry kernel")
+    parser.add_argument("--steps", type=int, default=300, help="Steps per simulated battle")
+    parser.add_argument("--repeat", type=int, default=200, help="Battles per measurement")
+    args = parser.parse_args()
+
+    results = {}
+    for name, run in (("unfused", run_unfused), ("fused", run_fused)):
+        best = min(timeit.repeat(lambda: run(args.steps), number=args.repeat, repeat=5))
+        results[name] = best / (args.repeat * args.steps) * 1e6
+        print(f"{name:>8}: {results[name]:.3f} us/step")
+    print(f" speedup: {results['unfused'] / results['fused']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+"""
+Benchmark suite for the simulation and evaluation hot paths.
+
+    python benchmarks/run_benchmarks.py                      # run, write results, compare with the baseline
+    python benchmarks/run_benchmarks.py --update-baseline    # run and store the results as the new baseline
+    python benchmarks/run_benchmarks.py --pop-sizes 20 50    # skip the slow generation benchmarks
+
+Results are written as JSON (seconds per operation and throughput for every
+benchmark). When a baseline file exists, the script exits with status 1 if any
+benchmark is slower than the baseline by more than --threshold.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import neat
+import numpy as np
+import utils
+from arena import Arena
+from robot import Robot
+from sensors import Sensors
+from generated_network import GeneratedNetwork
+from speciation import species_set_type
+
+CONFIG_PATH = os.path.join(ROOT, "neat_config.txt")
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS = os.path.join(BENCHMARK_DIR, "results.json")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+
+def load_config(pop_size):
+    config = neat.Config(neat.genome.DefaultGenome, neat.reproduction.DefaultReproduction,
+                         species_set_type(CONFIG_PATH), neat.stagnation.DefaultStagnation, CONFIG_PATH)
+    config.pop_size = pop_size
+    return config
+
+
+def make_population(pop_size, seed=0):
+    random.seed(seed)
+    config = load_config(pop_size)
+    return config, list(neat.Population(config).population.items())
+
+
+def best_time(fn, number, repeat):
+    """ Best time of one call of fn over repeat runs of number calls each. """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def result(seconds, unit, **throughput):
+    entry = {"seconds_per_op": seconds, "unit": unit, "ops_per_second": 1.0 / seconds}
+    entry.update(throughput)
+    return entry
+
+
+def two_robot_arena():
+    robot1 = Robot(None, start_pos=(0.4, 0.5))
+    robot2 = Robot(None, start_pos=(0.5, 0.5))
+    robot2.angle = 3.0
+    return Arena(robots=[robot1, robot2]), robot1, robot2
+
+
+def bench_sensors_get(repeat):
+    arena, robot1, _ = two_robot_arena()
+    return result(best_time(lambda: Sensors.get(robot1, arena), 20000, repeat), "call")
+
+
+def bench_robot_apply_action(repeat):
+    robot = Robot(None, start_pos=(0.5, 0.5))
+    action = (0.3, 0.2, 0.7)
+    return result(best_time(lambda: robot.apply_action(action), 20000, repeat), "call")
+
+
+def bench_arena_apply_damage(repeat):
+    arena, robot1, robot2 = two_robot_arena()
+    robot1.last_action = robot2.last_action = (0.0, 0.0, 1.0)
+
+    def apply_damage():
+        robot1.health = robot2.health = robot1.max_health
+        arena.apply_damage()
+    return result(best_time(apply_damage, 20000, repeat), "call")
+
+
+def bench_simulate_battle(make_opponent, repeat):
+    config, genomes = make_population(2)
+    net = neat.nn.FeedForwardNetwork.create(genomes[0][1], config)
+    stats = {}
+
+    def battle():
+        utils.simulate_battle(net, make_opponent(), stats)
+    seconds = best_time(battle, 5, repeat)
+    return result(seconds, "battle", steps_per_second=stats["steps"] / seconds)
+
+
+def bench_eval_genomes(pop_size, repeat):
+    config, genomes = make_population(pop_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = utils.filename_for_fitness_history
+        utils.filename_for_fitness_history = os.path.join(tmp, "history.csv")
+        try:
+            def generation():
+                utils.generation_count = 0
+                with contextlib.redirect_stdout(io.StringIO()):
+                    utils.eval_genomes(genomes, config)
+            seconds = best_time(generation, 1, repeat)
+        finally:
+            utils.filename_for_fitness_history = history
+    stats = utils.generation_stats
+    return result(seconds, "generation", battles_per_second=stats["battles"] / seconds,
+                  steps_per_second=stats["steps"] / seconds)
+
+
+def run_benchmarks(pop_sizes, repeat, generation_repeat):
+    config, genomes = make_population(2)
+    benchmarks = [
+        ("sensors_get", lambda: bench_sensors_get(repeat)),
+        ("robot_apply_action", lambda: bench_robot_apply_action(repeat)),
+        ("arena_apply_damage", lambda: bench_arena_apply_damage(repeat)),
+        ("simulate_battle_random", lambda: bench_simulate_battle(lambda: utils.RandomWrapper(random.Random(0)), repeat)),
+        ("simulate_battle_static", lambda: bench_simulate_battle(utils.StaticWrapper, repeat)),
+        ("simulate_battle_chaser", lambda: bench_simulate_battle(utils.ChaserWrapper, repeat)),
+        ("simulate_battle_network", lambda: bench_simulate_battle(
+            lambda: neat.nn.FeedForwardNetwork.create(genomes[1][1], config), repeat)),
+        ("simulate_battle_generated", lambda: bench_simulate_battle(
+            lambda: GeneratedNetwork.create(genomes[1][1], config), repeat)),
+    ]
+    for pop_size in pop_sizes:
+        benchmarks.append((f"eval_genomes_pop{pop_size}",
+                           lambda pop_size=pop_size: bench_eval_genomes(pop_size, generation_repeat)))
+
+    results = {}
+    for name, bench in benchmarks:
+        results[name] = bench()
+        print(f"{name:<28} {results[name]['seconds_per_op'] * 1e6:14.2f} us/{results[name]['unit']}")
+    return results
+
+
+def compare_results(results, baseline, threshold):
+    """
+    Returns the benchmarks slower than the baseline by more than threshold
+    (a fraction: 0.2 means 20% slower), as (name, current / baseline time ratio).
+    """
+    regressions = []
+    for name, entry in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ratio = entry["seconds_per_op"] / reference["seconds_per_op"]
+        if ratio > 1.0 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the simulation and evaluation hot paths")
+    parser.add_argument("--output", default=DEFAULT_RESULTS, help="JSON file for the results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON file with the baseline results")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail if a benchmark is slower than the baseline by more than this fraction")
+    parser.add_argument("--pop-sizes", type=int, nargs="*", default=[20, 50, 200],
+                        help="Population sizes of the eval_genomes benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of the micro benchmarks (best is kept)")
+    parser.add_argument("--generation-repeat", type=int, default=1,
+                        help="Repetitions of the eval_genomes benchmarks (best is kept)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.pop_sizes, args.repeat, args.generation_repeat)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "benchmarks": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["benchmarks"]
+    regressions = compare_results(results, baseline, args.threshold)
+    for name, ratio in regressions:
+        print(f"REGRESSION {name}: {ratio:.2f}x the baseline time")
+    if regressions:
+        return 1
+    print(f"No benchmark slower than the baseline by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
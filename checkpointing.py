@@ -0,0 +1,103 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import gzip
+import os
+import pickle
+import random
+import threading
+import neat
+import numpy as np
+import utils
+
+
+def write_atomic(path, data):
+    """
+    Writes bytes to a temporary file and renames it over path, so a crash
+    while writing never leaves a truncated checkpoint behind.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RunCheckpointer(neat.reporting.BaseReporter):
+    """
+    NEAT reporter that saves the whole run every `every` generations:
+    the Population object (genomes, species, reproduction state and the other
+    reporters), the Python and NumPy RNG states, the run seed, the generation
+    counter used for logging and the hall of fame.
+    The state is pickled on the main thread, while compressing and writing the
+    file happen on a background thread, so the next generation starts right away.
+    """
+    def __init__(self, population, path="checkpoint.pkl.gz", every=10):
+        self.population = population
+        self.path = path
+        self.every = every
+        self._writer = None
+
+    def end_generation(self, config, population, species_set):
+        # Population.run increments its generation counter after end_generation
+        completed = self.population.generation + 1
+        if self.every > 0 and completed % self.every == 0:
+            self.save(completed)
+
+    def save(self, completed_generations):
+        reporters = self.population.reporters.reporters
+        self.population.reporters.reporters = [r for r in reporters if r is not self]
+        try:
+            state = {
+                "generation": completed_generations,
+                "population": self.population,
+                "random_state": random.getstate(),
+                "numpy_random_state": np.random.get_state(),
+                "generation_count": utils.generation_count,
+                "run_seed": utils.run_seed,
+                "hall_of_fame": utils.hall_of_fame,
+            }
+            data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            self.population.reporters.reporters = reporters
+
+        # The match telemetry of the saved generations must be on disk too
+        if utils.telemetry is not None:
+            utils.telemetry.flush()
+
+        # Only one write at a time, so checkpoints are never written out of order
+        self.wait()
+        self._writer = threading.Thread(target=self._write, args=(data,))
+        self._writer.start()
+
+    def _write(self, data):
+        write_atomic(self.path, gzip.compress(data, compresslevel=6))
+
+    def wait(self):
+        """ Blocks until the last checkpoint is on disk. """
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+
+
+def load_checkpoint(path):
+    """
+    Restores a run saved by RunCheckpointer: RNG states, run seed, generation
+    counter and hall of fame are put back in place, and the restored neat.Population is returned.
+    """
+    with gzip.open(path, "rb") as f:
+        state = pickle.load(f)
+
+    population = state["population"]
+    population.generation = state["generation"]
+    random.setstate(state["random_state"])
+    np.random.set_state(state["numpy_random_state"])
+    utils.generation_count = state["generation_count"]
+    utils.run_seed = state["run_seed"]
+    utils.hall_of_fame = state["hall_of_fame"]
+    if utils.hall_of_fame is not None:
+        # the archive file may contain champions added after the checkpoint
+        utils.hall_of_fame.save()
+    return population
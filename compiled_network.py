@@ -0,0 +1,172 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import neat
+import numpy as np
+from neat.activations import sigmoid_activation
+from neat.aggregations import sum_aggregation
+
+
+def sigmoid(z):
+    # same formula as neat.activations.sigmoid_activation
+    z = np.clip(5.0 * z, -60.0, 60.0)
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class CompiledNetwork:
+    """
+    Feed-forward network compiled into layered weight matrices.
+    Every node gets a slot in a value vector: inputs first, then hidden and output
+    nodes in evaluation order, then one slot that is always 0 (used by outputs
+    that are not connected, like FeedForwardNetwork does).
+    Each layer is a (num_slots, layer_width) matrix, so a whole batch of sensor
+    vectors is evaluated with one matrix product per layer.
+    """
+    def __init__(self, num_inputs, num_slots, layers, output_slots):
+        self.num_inputs = num_inputs
+        self.num_slots = num_slots
+        self.layers = layers  # list of (weights, bias, response, dest_slots)
+        self.output_slots = output_slots
+
+    @staticmethod
+    def create(genome, config):
+        """ Compiles a genome (same phenotype as FeedForwardNetwork.create). """
+        return CompiledNetwork.from_network(neat.nn.FeedForwardNetwork.create(genome, config))
+
+    @staticmethod
+    def from_network(net):
+        """ Compiles an existing neat.nn.FeedForwardNetwork. """
+        slots = {key: i for i, key in enumerate(net.input_nodes)}
+        depth = {key: 0 for key in net.input_nodes}
+        nodes_by_depth = {}
+
+        for node, act_func, agg_func, bias, response, links in net.node_evals:
+            if act_func is not sigmoid_activation or agg_func is not sum_aggregation:
+                raise ValueError("Only sigmoid activation and sum aggregation can be compiled")
+            slots[node] = len(slots)
+            # A node can be evaluated as soon as all its inputs are known
+            depth[node] = 1 + max((depth[i] for i, _ in links), default=0)
+            nodes_by_depth.setdefault(depth[node], []).append((node, bias, response, links))
+
+        zero_slot = len(slots)
+        num_slots = zero_slot + 1
+
+        layers = []
+        for d in sorted(nodes_by_depth):
+            layer_nodes = nodes_by_depth[d]
+            weights = np.zeros((num_slots, len(layer_nodes)))
+            bias = np.empty(len(layer_nodes))
+            response = np.empty(len(layer_nodes))
+            dest = np.empty(len(layer_nodes), dtype=np.int64)
+            for j, (node, node_bias, node_response, links) in enumerate(layer_nodes):
+                for i, w in links:
+                    weights[slots[i], j] += w
+                bias[j] = node_bias
+                response[j] = node_response
+                dest[j] = slots[node]
+            layers.append((weights, bias, response, dest))
+
+        output_slots = np.array([slots.get(key, zero_slot) for key in net.output_nodes], dtype=np.int64)
+        return CompiledNetwork(len(net.input_nodes), num_slots, layers, output_slots)
+
+    def to_array(self):
+        """
+        Flattens the network parameters into one float64 array:
+        [num_inputs, num_slots, num_layers, num_outputs, output slots,
+         then for every layer: width, dest slots, bias, response, weights].
+        """
+        parts = [[self.num_inputs, self.num_slots, len(self.layers), len(self.output_slots)], self.output_slots]
+        for weights, bias, response, dest in self.layers:
+            parts += [[len(bias)], dest, bias, response, weights.ravel()]
+        return np.concatenate([np.asarray(p, dtype=np.float64) for p in parts])
+
+    @staticmethod
+    def from_array(data):
+        """ Rebuilds a network flattened by to_array (data can be a memory-mapped view). """
+        num_inputs, num_slots, num_layers, num_outputs = (int(v) for v in data[:4])
+        pos = 4
+        output_slots = np.asarray(data[pos:pos + num_outputs], dtype=np.int64)
+        pos += num_outputs
+        layers = []
+        for _ in range(num_layers):
+            width = int(data[pos])
+            pos += 1
+            dest = np.asarray(data[pos:pos + width], dtype=np.int64)
+            bias = data[pos + width:pos + 2 * width]
+            response = data[pos + 2 * width:pos + 3 * width]
+            pos += 3 * width
+            weights = data[pos:pos + num_slots * width].reshape(num_slots, width)
+            pos += num_slots * width
+            layers.append((weights, bias, response, dest))
+        return CompiledNetwork(num_inputs, num_slots, layers, output_slots)
+
+    def activate_batch(self, inputs):
+        """
+        Evaluates a batch of input vectors, shape (batch, num_inputs).
+        Returns an array of shape (batch, num_outputs).
+        """
+        inputs = np.asarray(inputs, dtype=np.float64)
+        values = np.zeros((inputs.shape[0], self.num_slots))
+        values[:, :self.num_inputs] = inputs
+        for weights, bias, response, dest in self.layers:
+            values[:, dest] = sigmoid(bias + response * (values @ weights))
+        return values[:, self.output_slots]
+
+    def activate(self, inputs):
+        """ Drop-in replacement for FeedForwardNetwork.activate. """
+        if len(inputs) != self.num_inputs:
+            raise RuntimeError("Expected {0:n} inputs, got {1:n}".format(self.num_inputs, len(inputs)))
+        return self.activate_batch([inputs])[0].tolist()
+
+
+class NetworkStack:
+    """
+    Many compiled networks padded to the same shape and stacked, so that rows
+    belonging to different genomes are evaluated in a single call.
+    Padded nodes write to an extra scratch slot that no network reads.
+    """
+    def __init__(self, networks):
+        self.num_networks = len(networks)
+        self.num_inputs = networks[0].num_inputs
+        self.num_slots = max(net.num_slots for net in networks) + 1
+        scratch = self.num_slots - 1
+        num_layers = max(len(net.layers) for net in networks)
+        num_outputs = len(networks[0].output_slots)
+
+        self.layers = []
+        for l in range(num_layers):
+            width = max((len(net.layers[l][1]) for net in networks if l < len(net.layers)), default=0)
+            weights = np.zeros((self.num_networks, self.num_slots, width))
+            bias = np.zeros((self.num_networks, width))
+            response = np.zeros((self.num_networks, width))
+            dest = np.full((self.num_networks, width), scratch, dtype=np.int64)
+            for g, net in enumerate(networks):
+                if l >= len(net.layers):
+                    continue
+                net_weights, net_bias, net_response, net_dest = net.layers[l]
+                k = len(net_bias)
+                weights[g, :net.num_slots, :k] = net_weights
+                bias[g, :k] = net_bias
+                response[g, :k] = net_response
+                dest[g, :k] = net_dest
+            self.layers.append((weights, bias, response, dest))
+
+        self.output_slots = np.empty((self.num_networks, num_outputs), dtype=np.int64)
+        for g, net in enumerate(networks):
+            self.output_slots[g] = net.output_slots
+
+    def activate(self, network_index, inputs):
+        """
+        Row b of inputs is fed to network network_index[b].
+        Returns an array of shape (batch, num_outputs).
+        """
+        network_index = np.asarray(network_index, dtype=np.int64)
+        inputs = np.asarray(inputs, dtype=np.float64)
+        rows = np.arange(len(network_index))[:, None]
+        values = np.zeros((len(network_index), self.num_slots))
+        values[:, :self.num_inputs] = inputs
+        for weights, bias, response, dest in self.layers:
+            z = np.einsum('bs,bsk->bk', values, weights[network_index])
+            values[rows, dest[network_index]] = sigmoid(bias[network_index] + response[network_index] * z)
+        return values[rows, self.output_slots[network_index]]
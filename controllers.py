@@ -8,11 +8,15 @@ class RandomController:
     """
     Basic controller generating random actions for movement and shooting.
     Useful as a baseline for performance evaluation.
+    An explicit random.Random instance can be passed to make it reproducible.
     """
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
+
     def act(self):
-        steering = random.uniform(-1, 1)
-        throttle = random.uniform(0, 1)
-        shoot = random.random() < 0.1
+        steering = self.rng.uniform(-1, 1)
+        throttle = self.rng.uniform(0, 1)
+        shoot = self.rng.random() < 0.1
         return steering, throttle, shoot
 
 
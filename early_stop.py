@@ -0,0 +1,126 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import math
+import numpy as np
+
+# Max distance a robot can travel in one step: |action[0]| <= 1 times the 0.05 speed factor
+MAX_MOVE_PER_STEP = 0.05
+# Tolerance on the reach test, so rounding never stops a battle that could still change
+REACH_EPSILON = 1e-9
+
+
+class EarlyStop:
+    """
+    Decides when the outcome of a battle can no longer change, so that
+    simulate_battle can stop before MAX_STEPS.
+    Rules, checked after every step:
+    - out of reach (always on): the robots are so far apart that even moving
+      straight at each other they cannot get within SHOOT_RANGE in the steps left;
+    - repeated state (deterministic controllers only): positions, angles and health
+      are exactly the same as in an earlier step, so the battle loops without damage
+      (with action_repeat > 1, also at the same point of the repeat with the same
+      held actions, since the controllers are not queried every step);
+    - stalled (mode "stall" only, statistical): for stall_steps steps both robots
+      touched a wall, out of SHOOT_RANGE, repeating the same actions.
+    A settled battle is credited with the survival reward of a full-length battle.
+    """
+    def __init__(self, max_steps, mode="exact", stall_steps=30, deterministic=True, action_repeat=1):
+        self.max_steps = max_steps
+        self.mode = mode
+        self.stall_steps = stall_steps
+        self.deterministic = deterministic
+        self.action_repeat = action_repeat
+        self.seen_states = set()
+        self.stalled_for = 0
+        self.last_actions = None
+
+    def settled(self, step, robot1, robot2, arena, action1, action2):
+        dx = robot2.x - robot1.x
+        dy = robot2.y - robot1.y
+        distance = math.sqrt(dx * dx + dy * dy)
+
+        # Out of reach for the rest of the battle
+        remaining = self.max_steps - 1 - step
+        if distance - 2 * MAX_MOVE_PER_STEP * remaining > arena.SHOOT_RANGE + REACH_EPSILON:
+            return True
+
+        if not self.deterministic:
+            return False
+
+        # Exact repetition of an earlier state
+        state = (robot1.x, robot1.y, robot1.angle, robot1.health,
+                 robot2.x, robot2.y, robot2.angle, robot2.health)
+        phase = (step + 1) % self.action_repeat
+        if phase:
+            # the next step repeats the held actions instead of querying the controllers
+            state += (phase, tuple(action1), tuple(action2))
+        if state in self.seen_states:
+            return True
+        self.seen_states.add(state)
+
+        if self.mode != "stall":
+            return False
+
+        # Both robots stuck against walls, out of range, repeating the same actions
+        actions = (tuple(action1), tuple(action2))
+        stuck = (actions == self.last_actions
+                 and touches_wall(robot1.x, robot1.y, arena) and touches_wall(robot2.x, robot2.y, arena)
+                 and distance > arena.SHOOT_RANGE)
+        self.stalled_for = self.stalled_for + 1 if stuck else 0
+        self.last_actions = actions
+        return self.stalled_for >= self.stall_steps
+
+
+def touches_wall(x, y, arena):
+    return x <= 0 or x >= arena.width or y <= 0 or y >= arena.height
+
+
+class BatchEarlyStop:
+    """
+    Same rules as EarlyStop for the battles of a BatchArena.
+    deterministic is a boolean array with one entry per battle.
+    """
+    def __init__(self, num_battles, max_steps, mode="exact", stall_steps=30, deterministic=None, action_repeat=1):
+        self.max_steps = max_steps
+        self.mode = mode
+        self.stall_steps = stall_steps
+        self.action_repeat = action_repeat
+        self.deterministic = np.ones(num_battles, dtype=bool) if deterministic is None else np.asarray(deterministic)
+        self.seen_states = [set() for _ in range(num_battles)]
+        self.stalled_for = np.zeros(num_battles, dtype=np.int64)
+        self.last_actions = np.full((2, num_battles, 3), np.nan)
+
+    def settled(self, step, arena, idx, actions):
+        """ Returns a boolean mask over idx of the battles whose outcome is settled. """
+        dx = arena.x[1, idx] - arena.x[0, idx]
+        dy = arena.y[1, idx] - arena.y[0, idx]
+        distance = np.sqrt(dx * dx + dy * dy)
+
+        remaining = self.max_steps - 1 - step
+        settled = distance - 2 * MAX_MOVE_PER_STEP * remaining > arena.SHOOT_RANGE + REACH_EPSILON
+
+        deterministic = self.deterministic[idx]
+        phase = (step + 1) % self.action_repeat
+        for row in np.flatnonzero(deterministic & ~settled):
+            battle = idx[row]
+            state = (arena.x[0, battle], arena.y[0, battle], arena.angle[0, battle], arena.health[0, battle],
+                     arena.x[1, battle], arena.y[1, battle], arena.angle[1, battle], arena.health[1, battle])
+            if phase:
+                state += (phase, tuple(actions[0, row]), tuple(actions[1, row]))
+            if state in self.seen_states[battle]:
+                settled[row] = True
+            self.seen_states[battle].add(state)
+
+        if self.mode == "stall":
+            x = arena.x[:, idx]
+            y = arena.y[:, idx]
+            walls = (x <= 0) | (x >= arena.width) | (y <= 0) | (y >= arena.height)
+            same_actions = (actions == self.last_actions[:, idx]).all(axis=(0, 2))
+            stuck = deterministic & same_actions & walls.all(axis=0) & (distance > arena.SHOOT_RANGE)
+            self.stalled_for[idx] = np.where(stuck, self.stalled_for[idx] + 1, 0)
+            self.last_actions[:, idx] = actions
+            settled |= deterministic & (self.stalled_for[idx] >= self.stall_steps)
+
+        return settled
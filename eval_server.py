@@ -0,0 +1,384 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+"""
+Local evaluation server: keeps the NEAT config, the worker pool and the networks
+warm, so notebooks and scripts can get fitness values without starting main.py.
+
+    python eval_server.py --socket /tmp/robots.sock --workers 4     # Unix socket
+    python eval_server.py --stdio                                   # stdin/stdout
+
+    from eval_server import EvaluationClient
+    with EvaluationClient("/tmp/robots.sock") as client:
+        results = client.evaluate([{"net1": genome, "net2": "Chaser"},
+                                   {"net1": genome, "net2": "Random", "seed": 3},
+                                   {"net1": genome, "net2": other_genome}])
+
+A match has net1 and net2, each a NEAT genome (turned into a network with the
+server's config and cached by content), a network object with activate(), or for
+net2 an opponent type ("Random", "Static", "Chaser"; Random takes a seed). Every
+result is {"fitness": (f1, f2), "steps", "damage1", "damage2"} with the values
+simulate_battle would return. Requests that arrive together are run as one batch.
+Messages are pickled, so the server is meant for local, trusted clients only.
+"""
+
+import argparse
+import itertools
+import os
+import pickle
+import queue
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.connection import Listener, Client
+import neat
+import utils
+from match_cache import genome_hash
+from generated_network import GeneratedNetwork
+from speciation import species_set_type
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOCKET = "/tmp/coevolution_eval.sock"
+DEFAULT_CONFIG = os.path.join(ROOT, "neat_config.txt")
+OPPONENT_TYPES = ("Random", "Static", "Chaser")
+
+
+# Worker functions: a task is (net1, net2, seed), net2 being a network or an opponent type
+def worker_match(task):
+    net1, net2, seed = task
+    if isinstance(net2, str):
+        net2 = utils.make_opponent(net2, seed)
+    stats = {}
+    fitness = utils.simulate_battle(net1, net2, stats)
+    return fitness, stats
+
+def worker_match_batch(tasks):
+    pairs = [(net1, utils.make_opponent(net2, seed) if isinstance(net2, str) else net2)
+             for net1, net2, seed in tasks]
+    stats = []
+    fitness = utils.simulate_battles(pairs, stats)
+    return list(zip(fitness, stats))
+
+
+class StreamChannel:
+    """ send()/recv() of pickled messages over a pair of byte streams, each prefixed by its length. """
+    HEADER = struct.Struct(">I")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def send(self, message):
+        data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+        self.writer.write(self.HEADER.pack(len(data)) + data)
+        self.writer.flush()
+
+    def recv(self):
+        header = self.reader.read(self.HEADER.size)
+        if len(header) < self.HEADER.size:
+            raise EOFError
+        size, = self.HEADER.unpack(header)
+        return pickle.loads(self.reader.read(size))
+
+    def close(self):
+        self.writer.close()
+        self.reader.close()
+
+
+class EvaluationServer:
+    """
+    Serves match requests from any number of connections. Each connection has a
+    reader thread that queues its requests; one batcher thread waits up to
+    batch_window seconds after the first pending request, then runs the matches
+    of all the queued requests with a single run_battles call and sends every
+    request its own results.
+    """
+    def __init__(self, config_path=DEFAULT_CONFIG, workers=1, batch_engine=False, generated_networks=False,
+                 batch_window=0.005, max_batch=4096, max_networks=4096):
+        self.config = neat.Config(neat.genome.DefaultGenome, neat.reproduction.DefaultReproduction,
+                                  species_set_type(config_path), neat.stagnation.DefaultStagnation, config_path)
+        self.workers = workers
+        self.batch_engine = batch_engine
+        self.generated_networks = generated_networks
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_networks = max_networks
+        self.networks = OrderedDict()
+        self.pending = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "matches": 0, "networks_built": 0}
+        self.listener = None
+        self.stopped = threading.Event()
+
+    def network(self, item):
+        """ A genome becomes a network, built once per genome content; anything else is used as is. """
+        if not isinstance(item, neat.genome.DefaultGenome):
+            if not hasattr(item, "activate"):
+                raise ValueError(f"Not a genome nor a network: {type(item).__name__}")
+            return item
+        key = genome_hash(item)
+        net = self.networks.get(key)
+        if net is None:
+            if self.generated_networks:
+                net = GeneratedNetwork.create(item, self.config)
+            else:
+                net = neat.nn.FeedForwardNetwork.create(item, self.config)
+            self.networks[key] = net
+            self.stats["networks_built"] += 1
+            if len(self.networks) > self.max_networks:
+                self.networks.popitem(last=False)
+        else:
+            self.networks.move_to_end(key)
+        return net
+
+    def tasks(self, request):
+        tasks = []
+        for match in request["matches"]:
+            net2 = match["net2"]
+            if isinstance(net2, str):
+                if net2 not in OPPONENT_TYPES:
+                    raise ValueError(f"Unknown opponent type: {net2}")
+            else:
+                net2 = self.network(net2)
+            tasks.append((self.network(match["net1"]), net2, match.get("seed")))
+        return tasks
+
+    def submit(self, request, reply):
+        """ Queues a request; reply(message) is called with the response. """
+        if not isinstance(request, dict):
+            reply({"id": None, "error": f"A request is a dict, got {type(request).__name__}"})
+            return
+        command = request.get("command", "evaluate")
+        if command == "ping":
+            reply({"id": request.get("id"), "stats": dict(self.stats)})
+        elif command == "shutdown":
+            reply({"id": request.get("id"), "stats": dict(self.stats)})
+            self.stop()
+        else:
+            self.pending.put((request, reply))
+
+    def _next_batch(self):
+        """ Blocks for a request, then collects the others arriving within batch_window. """
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.batch_window
+        size = request_size(batch[0][0]) if batch[0] is not None else 0
+        while batch[-1] is not None and size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is not None:
+                size += request_size(item[0])
+        return batch
+
+    def _run_batches(self):
+        while True:
+            batch = self._next_batch()
+            items = [item for item in batch if item is not None]
+            all_tasks = []
+            accepted = []
+            for request, reply in items:
+                try:
+                    tasks = self.tasks(request)
+                except Exception as e:
+                    # a malformed request only fails for its own client, the batcher keeps running
+                    reply({"id": request.get("id"), "error": f"{type(e).__name__}: {e}"})
+                    continue
+                accepted.append((request, reply, len(all_tasks), len(tasks)))
+                all_tasks += tasks
+
+            try:
+                if all_tasks:
+                    results = utils.run_battles(worker_match, all_tasks, worker_match_batch)
+                    self.stats["batches"] += 1
+                    self.stats["matches"] += len(all_tasks)
+            except Exception as e:
+                # e.g. a network whose activate() fails: the server keeps running
+                for request, reply, _, _ in accepted:
+                    reply({"id": request.get("id"), "error": f"{type(e).__name__}: {e}"})
+                accepted = []
+            for request, reply, start, count in accepted:
+                self.stats["requests"] += 1
+                reply({"id": request.get("id"), "results": [
+                    {"fitness": fitness, "steps": stats["steps"], "damage1": stats["damage1"],
+                     "damage2": stats["damage2"]}
+                    for fitness, stats in results[start:start + count]]})
+            if len(items) < len(batch):
+                return
+
+    def _serve_connection(self, channel):
+        lock = threading.Lock()
+
+        def reply(message):
+            with lock:
+                try:
+                    channel.send(message)
+                except OSError:
+                    pass  # the client went away
+        try:
+            while not self.stopped.is_set():
+                self.submit(channel.recv(), reply)
+        except (EOFError, OSError):
+            pass
+
+    def serve(self, socket_path=None, stdio=False):
+        """ Serves until a shutdown request (or the end of stdin in stdio mode). """
+        if not stdio:
+            self.listener = listen(socket_path)
+        utils.use_batch_engine = self.batch_engine
+        utils.start_worker_pool(self.workers)
+        batcher = threading.Thread(target=self._run_batches, daemon=True)
+        batcher.start()
+        try:
+            if stdio:
+                channel = StreamChannel(sys.stdin.buffer, sys.stdout.buffer)
+                self._serve_connection(channel)
+                self.stop()
+            else:
+                print(f"Evaluation server listening on {socket_path}", file=sys.stderr)
+                while True:
+                    try:
+                        connection = self.listener.accept()
+                    except OSError:
+                        break
+                    if self.stopped.is_set():
+                        connection.close()
+                        break
+                    threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+            batcher.join()
+        finally:
+            self.stop()
+            if self.listener is not None:
+                self.listener.close()
+            utils.close_worker_pool()
+
+    def stop(self):
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        # the batcher finishes the queued requests, then exits
+        self.pending.put(None)
+        if self.listener is not None:
+            # closing the socket does not interrupt accept(): connect once to wake it up
+            try:
+                Client(self.listener.address, family="AF_UNIX").close()
+            except OSError:
+                pass
+
+
+def request_size(request):
+    """ Number of matches of a request (0 when it has no list of matches, tasks() reports the error). """
+    try:
+        return len(request.get("matches", ()))
+    except TypeError:
+        return 0
+
+
+def listen(socket_path):
+    """
+    Unix socket listener that only this user can connect to. A socket file left
+    by a server that is gone is replaced; a path where a server is still
+    listening, or that is not a socket, is an error.
+    """
+    if os.path.lexists(socket_path):
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            raise FileExistsError(f"{socket_path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.remove(socket_path)
+        else:
+            raise FileExistsError(f"An evaluation server is already listening on {socket_path}")
+        finally:
+            probe.close()
+    # the socket is created with mode 0o600, there is no moment when others can connect
+    umask = os.umask(0o177)
+    try:
+        return Listener(socket_path, family="AF_UNIX")
+    finally:
+        os.umask(umask)
+
+
+class EvaluationClient:
+    """
+    Client of a running server (socket_path) or of a server started as a
+    subprocess in stdio mode (EvaluationClient.spawn()).
+    """
+    def __init__(self, socket_path=DEFAULT_SOCKET, channel=None, process=None):
+        self.channel = channel if channel is not None else Client(socket_path, family="AF_UNIX")
+        self.process = process
+        self._ids = itertools.count()
+
+    @staticmethod
+    def spawn(*server_args):
+        """ Starts `python eval_server.py --stdio [server_args]` and connects to it. """
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, "eval_server.py"), "--stdio"]
+                                   + list(server_args), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return EvaluationClient(channel=StreamChannel(process.stdout, process.stdin), process=process)
+
+    def request(self, message):
+        message = dict(message, id=next(self._ids))
+        self.channel.send(message)
+        response = self.channel.recv()
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    def evaluate(self, matches):
+        """ Results of a list of matches, in order (see the module docstring). """
+        return self.request({"matches": list(matches)})["results"]
+
+    def ping(self):
+        """ Counters of the server: requests, batches, matches and networks built. """
+        return self.request({"command": "ping"})["stats"]
+
+    def shutdown(self):
+        self.request({"command": "shutdown"})
+        self.close()
+
+    def close(self):
+        self.channel.close()
+        if self.process is not None:
+            self.process.wait()
+            self.process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local evaluation server for robot battles")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Unix socket path (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--stdio", action="store_true", help="Serve one client on stdin/stdout instead")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="NEAT config used to build networks from genomes")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes kept warm (default: 1, serial)")
+    parser.add_argument("--batch-engine", action="store_true", help="Simulate every batch with the NumPy batch engine")
+    parser.add_argument("--generated-networks", action="store_true",
+                        help="Build networks from genomes as generated Python code")
+    parser.add_argument("--batch-window", type=float, default=0.005,
+                        help="Seconds to wait for more requests to batch together (default: 0.005)")
+    args = parser.parse_args()
+
+    server = EvaluationServer(args.config, args.workers, args.batch_engine, args.generated_networks,
+                              args.batch_window)
+    try:
+        server.serve(None if args.stdio else args.socket, stdio=args.stdio)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import math
+from statistics import NormalDist
+import utils
+
+# Opponent types of the final test, in the order they are reported
+FINAL_OPPONENTS = ("Random", "Static", "Chaser")
+# Weight of each type in the overall win rate: the split of the fixed 100-match test
+FINAL_SHARES = {"Random": 0.2, "Static": 0.4, "Chaser": 0.4}
+# Same rule as main.process_results: a match is won when f1 - f2 >= 1 (smaller gaps are draws)
+WIN_MARGIN = 1.0
+
+
+def wilson_interval(wins, matches, confidence=0.95):
+    """
+    Wilson score interval of a win rate: (low, high).
+    Unlike the normal approximation it stays inside [0, 1] and has
+    a non-zero width also when every match is won or lost.
+    """
+    if matches == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    z2 = z * z
+    p = wins / matches
+    center = (p + z2 / (2 * matches)) / (1 + z2 / matches)
+    half = z * math.sqrt(p * (1 - p) / matches + z2 / (4 * matches * matches)) / (1 + z2 / matches)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class OpponentEstimate:
+    """
+    Win-rate estimate against one opponent type. Against a deterministic
+    opponent every match ends the same way: one match gives the exact win rate
+    (an interval of width 0).
+    """
+    def __init__(self, opponent_type):
+        self.opponent_type = opponent_type
+        self.exact = utils.is_deterministic_opponent(opponent_type)
+        self.matches = 0
+        self.wins = 0
+
+    def add(self, f1, f2):
+        self.matches += 1
+        if f1 - f2 >= WIN_MARGIN:
+            self.wins += 1
+
+    @property
+    def win_rate(self):
+        return self.wins / self.matches if self.matches else 0.0
+
+    def interval(self, confidence):
+        if self.exact and self.matches:
+            return self.win_rate, self.win_rate
+        return wilson_interval(self.wins, self.matches, confidence)
+
+    def wanted(self, target_width, confidence, max_matches):
+        """ Number of matches still worth playing (at most max_matches in total). """
+        if self.exact:
+            return 0 if self.matches else 1
+        if self.matches >= max_matches or (self.matches > 0 and self.width(confidence) <= target_width):
+            return 0
+        return max_matches - self.matches
+
+    def width(self, confidence):
+        low, high = self.interval(confidence)
+        return high - low
+
+
+def adaptive_final_evaluation(winner_net, target_width=0.1, confidence=0.95, batch_size=None,
+                              max_matches=1000):
+    """
+    Tests the best genome in rounds until the confidence interval of the win rate
+    against every opponent type is narrower than target_width (or the type has
+    played max_matches). Deterministic opponents (Static, Chaser) are played once,
+    their win rate is exact. Every round plays batch_size more matches against each
+    type that is still uncertain, all in one run_battles call, so they use the
+    worker pool and the batch engine like the generations do.
+    Random opponent i gets the same seed as in test_best_genome_against_random_opponents.
+
+    Returns:
+        results: list of [match_number, who_won, winner_fitness, opponent_fitness, opponent_type]
+        estimates: dict opponent type -> OpponentEstimate
+    """
+    if batch_size is None:
+        batch_size = max(10, 2 * utils.worker_count)
+    estimates = {opponent_type: OpponentEstimate(opponent_type) for opponent_type in FINAL_OPPONENTS}
+    results = []
+
+    while True:
+        tasks = []
+        for estimate in estimates.values():
+            wanted = min(batch_size, estimate.wanted(target_width, confidence, max_matches))
+            for i in range(estimate.matches, estimate.matches + wanted):
+                seed = utils.derive_seed("final", "Random", i) if estimate.opponent_type == "Random" else None
+                tasks.append((i, winner_net, estimate.opponent_type, seed))
+        if not tasks:
+            break
+
+        battles = utils.run_battles(utils.worker_external_battle, tasks, utils.worker_external_battle_batch)
+        for (_, _, opp_type, _), ((f1,), stats) in zip(tasks, battles):
+            f2 = stats["opponent_fitness"]
+            estimates[opp_type].add(f1, f2)
+            winner_label = "Winner" if f1 >= f2 else opp_type
+            results.append([len(results) + 1, winner_label, f1, f2, opp_type])
+    return results, estimates
+
+
+def print_intervals(estimates, confidence):
+    """ One line per opponent type: matches played, win rate and its confidence interval. """
+    print(f"Win rate per opponent type ({confidence:.0%} confidence intervals):")
+    for estimate in estimates.values():
+        low, high = estimate.interval(confidence)
+        interval = "exact, deterministic opponent" if estimate.exact else f"[{low * 100:.1f}%, {high * 100:.1f}%]"
+        print(f" - {estimate.opponent_type:<7} {estimate.matches:5d} matches, "
+              f"win rate {estimate.win_rate * 100:5.1f}% {interval}")
+
+
+def overall_win_rate(estimates):
+    """
+    Win rate over all types, weighted like the fixed test: deterministic types
+    play a single match, so the raw pooled rate would be the Random win rate.
+    """
+    return sum(FINAL_SHARES[t] * e.win_rate for t, e in estimates.items())
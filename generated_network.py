@@ -0,0 +1,115 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import math
+from collections import OrderedDict
+import neat
+from neat.activations import sigmoid_activation
+from neat.aggregations import sum_aggregation
+from match_cache import genome_hash
+
+# sum() adds floats one after the other up to Python 3.11, so an unrolled a + b + c
+# gives the same value; newer versions compensate the rounding, so there the
+# generated code calls sum() like sum_aggregation does.
+SEQUENTIAL_SUM = sum([1e100, 1.0, -1e100]) == 0.0
+
+
+def prune(net):
+    """
+    Returns the node evals of a FeedForwardNetwork that can affect its outputs:
+    links with weight 0.0 are dropped (they only add a signed zero, which the sigmoid
+    ignores), then every node that no longer reaches an output is removed.
+    """
+    node_evals = [(node, act, agg, bias, response, [(i, w) for i, w in links if w != 0.0])
+                  for node, act, agg, bias, response, links in net.node_evals]
+    needed = set(net.output_nodes)
+    kept = []
+    for node_eval in reversed(node_evals):
+        if node_eval[0] in needed:
+            kept.append(node_eval)
+            needed.update(i for i, _ in node_eval[5])
+    kept.reverse()
+    return kept
+
+
+def generate_source(net, name="activate"):
+    """
+    Python source of a function equivalent to net.activate: one local variable per
+    node, the weighted sums unrolled with the weights as literals and the sigmoid inlined.
+    Only sigmoid activation and sum aggregation are supported.
+    """
+    variables = {key: f"i{n}" for n, key in enumerate(net.input_nodes)}
+    lines = [f"def {name}(inputs):",
+             f"    if len(inputs) != {len(net.input_nodes)}:",
+             f"        raise RuntimeError(\"Expected {len(net.input_nodes)} inputs, got {{0:n}}\".format(len(inputs)))",
+             f"    {', '.join(variables[key] for key in net.input_nodes)}, = inputs"]
+    for node, act_func, agg_func, bias, response, links in prune(net):
+        if act_func is not sigmoid_activation or agg_func is not sum_aggregation:
+            raise ValueError("Only sigmoid activation and sum aggregation can be generated")
+        terms = [f"{variables[i]} * {w!r}" for i, w in links]
+        if not terms:
+            total = "0"
+        elif SEQUENTIAL_SUM:
+            total = " + ".join(terms)
+        else:
+            total = f"sum(({', '.join(terms)},))"
+        variables[node] = f"n{node}"
+        # max(-60.0, min(60.0, z)) of sigmoid_activation, written as comparisons
+        lines.append(f"    z = 5.0 * ({bias!r} + {response!r} * ({total}))")
+        lines.append("    z = z if z < 60.0 else 60.0")
+        lines.append(f"    {variables[node]} = 1.0 / (1.0 + exp(-(z if z > -60.0 else -60.0)))")
+    outputs = [variables.get(key, "0.0") for key in net.output_nodes]
+    lines.append(f"    return [{', '.join(outputs)}]")
+    return "\n".join(lines) + "\n"
+
+
+class GeneratedNetwork:
+    """
+    Drop-in replacement for FeedForwardNetwork.activate, built from generated
+    straight-line Python code (see generate_source). Outputs are bit-for-bit
+    the same as FeedForwardNetwork. Pickled as its source, so it can be sent
+    to worker processes.
+    """
+    def __init__(self, source):
+        self.source = source
+        namespace = {"exp": math.exp}
+        exec(compile(source, "<generated network>", "exec"), namespace)
+        self.activate = namespace["activate"]
+
+    @staticmethod
+    def from_network(net):
+        return GeneratedNetwork(generate_source(net))
+
+    @staticmethod
+    def create(genome, config):
+        """ Same phenotype as FeedForwardNetwork.create. """
+        return GeneratedNetwork.from_network(neat.nn.FeedForwardNetwork.create(genome, config))
+
+    def __reduce__(self):
+        return GeneratedNetwork, (self.source,)
+
+
+class GeneratedNetworkCache:
+    """
+    Generated networks by genome content hash, so elites and unchanged genomes
+    are not compiled again in later generations. Keeps the last max_entries.
+    """
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, genome, config):
+        return self.lookup(genome_hash(genome), lambda: GeneratedNetwork.create(genome, config))
+
+    def lookup(self, key, build):
+        """ Network cached for a content hash, or build() when there is none. """
+        net = self.entries.get(key)
+        if net is None:
+            net = build()
+            self.entries[key] = net
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return net
@@ -0,0 +1,189 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import hashlib
+import os
+import numpy as np
+from compiled_network import CompiledNetwork
+
+# File layout: one float64 .npy array, so it can be memory-mapped with np.load(mmap_mode="r")
+#   [FORMAT_VERSION, revision, num_entries,
+#    num_entries index rows of (offset, length, insertion, generation, genome_key, fitness,
+#    content hash as 4 unsigned 32-bit words),
+#    flattened network parameters (CompiledNetwork.to_array)]
+# Version 1 files (no insertion counter nor content hash) can still be loaded.
+FORMAT_VERSION = 2
+HEADER_SIZE = 3
+INDEX_FIELDS = 10
+V1_INDEX_FIELDS = 5
+HASH_WORDS = 4
+
+# Fixed sensor vectors used to compare the behaviour of two archived networks
+PROBE_INPUTS = np.random.default_rng(0).uniform(0.0, 1.0, size=(32, 7))
+
+
+class HallOfFame:
+    """
+    Bounded archive of past champions stored as compiled network parameters.
+    The archive outlives a run, so entries are identified by content (the
+    genome hash) and ordered by an insertion counter, not by the genome key and
+    generation number, which start again from scratch in every run.
+    When the archive is full, an entry is evicted either by age (first inserted
+    first) or by diversity (the older member of the two archived networks with
+    the most similar outputs on PROBE_INPUTS).
+    """
+    def __init__(self, path, capacity=50, eviction="age"):
+        if eviction not in ("age", "diversity"):
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.path = path
+        self.capacity = capacity
+        self.eviction = eviction
+        self.revision = 0
+        self.params = []
+        self.insertions = []
+        self.generations = []
+        self.genome_keys = []
+        self.fitnesses = []
+        self.contents = []
+        self._behaviours = []
+
+    def __len__(self):
+        return len(self.params)
+
+    def add(self, network, generation, genome_key, fitness, content=None):
+        """
+        Adds a champion (a CompiledNetwork). content is a 16-byte digest of the
+        genome (match_cache.genome_hash), by default a digest of the network
+        parameters. A champion that is already archived, e.g. an elite that stays
+        the best for several generations, is not added twice.
+        """
+        params = network.to_array()
+        if content is None:
+            content = params_digest(params)
+        if content in self.contents:
+            return False
+        self.params.append(params)
+        self.insertions.append(max(self.insertions, default=-1) + 1)
+        self.generations.append(generation)
+        self.genome_keys.append(genome_key)
+        self.fitnesses.append(fitness)
+        self.contents.append(content)
+        self._behaviours.append(None)
+        while len(self) > self.capacity:
+            self._remove(self._eviction_index())
+        return True
+
+    def _eviction_index(self):
+        if self.eviction == "age":
+            return int(np.argmin(self.insertions))
+
+        behaviours = np.array([self._behaviour(i) for i in range(len(self))])
+        distances = np.linalg.norm(behaviours[:, None, :] - behaviours[None, :, :], axis=2)
+        np.fill_diagonal(distances, np.inf)
+        i, j = np.unravel_index(np.argmin(distances), distances.shape)
+        return int(i) if self.insertions[i] <= self.insertions[j] else int(j)
+
+    def _behaviour(self, index):
+        if self._behaviours[index] is None:
+            self._behaviours[index] = self.network(index).activate_batch(PROBE_INPUTS).ravel()
+        return self._behaviours[index]
+
+    def _remove(self, index):
+        for field in (self.params, self.insertions, self.generations, self.genome_keys, self.fitnesses,
+                      self.contents, self._behaviours):
+            del field[index]
+
+    def network(self, index):
+        return CompiledNetwork.from_array(self.params[index])
+
+    def entry_id(self, index):
+        """ Identifier of an archived champion that does not change when other entries are evicted. """
+        return ("hall_of_fame", self.contents[index])
+
+    def sample(self, k, rng):
+        """ Indices of k distinct archived champions (all of them if the archive is smaller). """
+        return sorted(rng.sample(range(len(self)), min(k, len(self))))
+
+    def save(self):
+        """
+        Writes the archive to a temporary file and renames it over self.path,
+        so readers never see a half-written file.
+        """
+        self.revision += 1
+        header = [FORMAT_VERSION, self.revision, len(self)]
+        index = []
+        offset = HEADER_SIZE + INDEX_FIELDS * len(self)
+        for params, insertion, generation, genome_key, fitness, content in zip(
+                self.params, self.insertions, self.generations, self.genome_keys, self.fitnesses, self.contents):
+            index += [offset, len(params), insertion, generation, genome_key, fitness]
+            index += np.frombuffer(content, dtype="<u4").tolist()
+            offset += len(params)
+        data = np.concatenate([np.asarray(header + index, dtype=np.float64)] + self.params)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def load(path, capacity=50, eviction="age"):
+        """
+        Opens an archive file memory-mapped: the network parameters are views on the
+        file, so several processes loading it share the same pages.
+        """
+        data = np.load(path, mmap_mode="r")
+        version = int(data[0])
+        if version not in (1, FORMAT_VERSION):
+            raise ValueError(f"Unsupported hall of fame format: {data[0]}")
+        archive = HallOfFame(path, capacity, eviction)
+        archive.revision = int(data[1])
+        num_entries = int(data[2])
+        fields = INDEX_FIELDS if version == FORMAT_VERSION else V1_INDEX_FIELDS
+        for row in range(num_entries):
+            start = HEADER_SIZE + fields * row
+            if version == FORMAT_VERSION:
+                offset, length, insertion, generation, genome_key, fitness = data[start:start + 6]
+                content = np.asarray(data[start + 6:start + 6 + HASH_WORDS], dtype="<u4").tobytes()
+            else:
+                # version 1: entries were written oldest first, and only the network identifies them
+                offset, length, generation, genome_key, fitness = data[start:start + V1_INDEX_FIELDS]
+                insertion = row
+                content = None
+            params = data[int(offset):int(offset) + int(length)]
+            archive.params.append(params)
+            archive.insertions.append(int(insertion))
+            archive.generations.append(int(generation))
+            archive.genome_keys.append(int(genome_key))
+            archive.fitnesses.append(float(fitness))
+            archive.contents.append(content if content is not None else params_digest(params))
+            archive._behaviours.append(None)
+        return archive
+
+    @staticmethod
+    def open(path, capacity=50, eviction="age"):
+        """ Loads the archive at path if it exists, otherwise starts an empty one. """
+        if os.path.exists(path):
+            return HallOfFame.load(path, capacity, eviction)
+        return HallOfFame(path, capacity, eviction)
+
+
+def params_digest(params):
+    """ 16-byte digest of a network parameter array, used when no genome hash is given. """
+    return hashlib.blake2b(np.ascontiguousarray(params, dtype=np.float64).tobytes(), digest_size=16).digest()
+
+
+# Archives opened by this process, keyed by path, with their revision
+_open_archives = {}
+
+
+def open_archive(path, revision):
+    """
+    Returns the memory-mapped archive at path, reloading it only when the
+    requested revision is newer than the one already open in this process.
+    """
+    archive = _open_archives.get(path)
+    if archive is None or archive.revision != revision:
+        archive = HallOfFame.load(path)
+        _open_archives[path] = archive
+    return archive
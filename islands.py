@@ -0,0 +1,164 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import contextlib
+import copy
+import multiprocessing
+import os
+import queue
+import random
+import neat
+import utils
+
+# utils settings copied into every island process (set by main.py before the run)
+ISLAND_SETTINGS = ("use_batch_engine", "use_matrix_networks", "schedule_strategy", "schedule_opponents",
+                   "early_stop_mode", "early_stop_steps", "match_cache", "generated_networks",
+                   "action_repeat")
+# Seconds an island waits for the migrants of its neighbour before giving up
+MIGRATION_TIMEOUT = 3600
+
+
+def island_file(history_path, index, suffix):
+    """ Path of a per-island file next to the combined fitness history. """
+    return os.path.join(os.path.dirname(history_path), f"island_{index}_{suffix}")
+
+
+class MigrationReporter(neat.reporting.BaseReporter):
+    """ Keeps copies of the best genomes of the last evaluated generation. """
+    def __init__(self, migrants):
+        self.migrants = migrants
+        self.best = []
+
+    def post_evaluate(self, config, population, species, best_genome):
+        ranked = sorted(population.values(), key=lambda genome: genome.fitness, reverse=True)
+        self.best = [copy.deepcopy(genome) for genome in ranked[:self.migrants]]
+
+
+def receive_migrants(population, migrants):
+    """
+    Puts the migrants into the new generation in place of offspring (elites,
+    which keep their fitness, are never replaced) and speciates it again.
+    Migrants get new keys from the island's own genome indexer.
+    """
+    offspring = [key for key, genome in population.population.items() if genome.fitness is None]
+    for old_key, migrant in zip(reversed(offspring), migrants):
+        del population.population[old_key]
+        population.reproduction.ancestors.pop(old_key, None)
+        migrant = copy.deepcopy(migrant)
+        migrant.key = next(population.reproduction.genome_indexer)
+        migrant.fitness = None
+        population.population[migrant.key] = migrant
+        population.reproduction.ancestors[migrant.key] = tuple()
+    population.species.speciate(population.config, population.population, population.generation)
+
+
+def run_island(index, config, generations, migration_interval, migrants, run_seed, settings,
+               history_path, inbox, outbox, results):
+    """
+    Body of an island process: a whole neat.Population with its own eval_genomes
+    and fitness history. Every migration_interval generations the best genomes are
+    sent to the next island and the ones of the previous island are received.
+    Progress and the final winner are reported on the results queue.
+    """
+    utils.run_seed = run_seed
+    random.seed(run_seed)
+    for name, value in settings.items():
+        setattr(utils, name, value)
+    utils.generation_count = 0
+    utils.filename_for_fitness_history = island_file(history_path, index, "fitness_history.csv")
+
+    population = neat.Population(config)
+    reporter = MigrationReporter(migrants)
+    population.add_reporter(reporter)
+
+    with open(island_file(history_path, index, "run.log"), "w") as log, contextlib.redirect_stdout(log):
+        completed = 0
+        stopped = False
+        while completed < generations:
+            chunk = min(migration_interval, generations - completed)
+            if not stopped:
+                winner = population.run(utils.eval_genomes, chunk)
+                # the fitness threshold ends the run early: the island keeps taking part in migrations
+                stopped = population.generation < completed + chunk
+                results.put(("progress", index, population.generation, winner.fitness))
+            completed += chunk
+            if completed < generations and migrants > 0:
+                # send first, then wait for the neighbour: the ring never deadlocks
+                outbox.put(reporter.best)
+                incoming = inbox.get(timeout=MIGRATION_TIMEOUT)
+                if not stopped:
+                    receive_migrants(population, incoming)
+    results.put(("done", index, population.best_genome))
+
+
+def run_islands(config, num_islands, generations, migration_interval=5, migrants=2):
+    """
+    Island model: num_islands populations of config.pop_size genomes evolve in
+    separate processes, each playing its own round-robin, so the cost grows
+    linearly with the number of islands. Islands form a ring: every
+    migration_interval generations each one sends its best `migrants` genomes
+    to the next one over a multiprocessing queue.
+    Island i uses a run seed derived from utils.run_seed and i, so the run is reproducible.
+    Writes island_<i>_fitness_history.csv files and their population average to
+    utils.filename_for_fitness_history.
+    Returns the island winner with the best external fitness, the only part of
+    the fitness measured against the same opponents on every island.
+    """
+    history_path = utils.filename_for_fitness_history
+    settings = {name: getattr(utils, name) for name in ISLAND_SETTINGS}
+    queues = [multiprocessing.Queue() for _ in range(num_islands)]
+    results = multiprocessing.Queue()
+    processes = []
+    for index in range(num_islands):
+        # island i receives from island i - 1 and sends to island i + 1
+        args = (index, config, generations, migration_interval, migrants, utils.derive_seed("island", index),
+                settings, history_path, queues[index], queues[(index + 1) % num_islands], results)
+        process = multiprocessing.Process(target=run_island, args=args, daemon=True)
+        process.start()
+        processes.append(process)
+
+    winners = {}
+    try:
+        while len(winners) < num_islands:
+            try:
+                message = results.get(timeout=1.0)
+            except queue.Empty:
+                failed = [i for i, p in enumerate(processes) if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Island {failed[0]} failed, see {island_file(history_path, failed[0], 'run.log')}")
+                continue
+            kind, index, value = message[0], message[1], message[2:]
+            if kind == "progress":
+                generation, best_fitness = value
+                print(f" > [Island {index}] generation {generation}/{generations}, best fitness {best_fitness:.2f}")
+            else:
+                winners[index] = value[0]
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    combine_histories([island_file(history_path, i, "fitness_history.csv") for i in range(num_islands)],
+                      history_path)
+    return max(winners.values(), key=lambda genome: (genome.fitness_external, genome.fitness))
+
+
+def combine_histories(paths, output):
+    """ Writes the per-generation average of the island fitness histories (same CSV format). """
+    rows = {}
+    for path in paths:
+        with open(path) as f:
+            for line in f.readlines()[1:]:
+                if line.strip():
+                    gen, avg_int, avg_ext = line.split(",")
+                    rows.setdefault(int(gen), []).append((float(avg_int), float(avg_ext)))
+    with open(output, "w") as f:
+        f.write("Generation,Avg_Internal_Score_Per_Match,Avg_External_Score_Per_Match\n")
+        for gen in sorted(rows):
+            values = rows[gen]
+            avg_int = sum(v[0] for v in values) / len(values)
+            avg_ext = sum(v[1] for v in values) / len(values)
+            f.write(f"{gen},{avg_int:.2f},{avg_ext:.2f}\n")
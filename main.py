@@ -9,7 +9,22 @@ import pickle
 import time
 import datetime
 import sys
+import os
 from utils import print_ascii_logo, eval_genomes, test_best_genome_against_random_opponents, print_summary
+from utils import start_worker_pool, close_worker_pool, truncate_fitness_history
+import utils
+from match_cache import MatchCache
+from scheduling import SCHEDULES
+from hall_of_fame import HallOfFame
+from checkpointing import RunCheckpointer, load_checkpoint
+from phase_timing import PhaseTimer, ReportingTimer
+from telemetry import TelemetryWriter
+from final_evaluation import adaptive_final_evaluation, overall_win_rate, print_intervals
+from islands import run_islands
+from run_db import RunDatabase, RunRecorder
+from speciation import species_set_type
+from generated_network import GeneratedNetwork, GeneratedNetworkCache
+from population_buffer import PopulationBuffer
 GENERATIONS = 15
 
 def process_results(results, crushing_threshold=50.0):
@@ -37,18 +52,31 @@ def process_results(results, crushing_threshold=50.0):
     return wins, crushing_wins, draws, losses, crushing_losses
 
 
-def main(verbose: bool = False, generations: int = None, pop_size: int = None):
+def main(verbose: bool = False, generations: int = None, pop_size: int = None, workers: int = None,
+         batch_engine: bool = False, matrix_networks: bool = False, cache_mb: int = 0,
+         schedule: str = "round_robin", opponents: int = 10, hall_of_fame: str = None,
+         hof_size: int = 50, hof_opponents: int = 3, hof_eviction: str = "age",
+         checkpoint: str = "checkpoint.pkl.gz", checkpoint_every: int = 10, resume: bool = False,
+         early_stop: str = None, stall_steps: int = 30, seed: int = 0, timing: bool = False,
+         telemetry: str = None, record_final: str = None, final_ci_width: float = None,
+         final_confidence: float = 0.95, final_max_matches: int = 1000, islands: int = 1,
+         migration_interval: int = 5, migrants: int = 2, generated_networks: bool = False,
+         shared_population: bool = False, action_repeat: int = 1, final_action_repeat: int = None,
+         run_db: str = None):
+    options = dict(locals())
     start_time = time.time()
     print_ascii_logo()
-    # Set random seed for reproducibility, used in genome evaluation
+    # Set random seed for reproducibility, used by NEAT for the genomes
     # when the other istances use the same seed, the genomes will be the same
-    random.seed(0)
+    # Every battle derives its own RNG from the same run seed (see utils.battle_rng)
+    random.seed(seed)
+    utils.run_seed = seed
 
     # Load NEAT configuration (same structure as course notebook)
     config = neat.Config(
         neat.genome.DefaultGenome,
         neat.reproduction.DefaultReproduction,
-        neat.species.DefaultSpeciesSet,
+        species_set_type("neat_config.txt"),
         neat.stagnation.DefaultStagnation,
         "neat_config.txt"
     )
@@ -58,8 +86,29 @@ def main(verbose: bool = False, generations: int = None, pop_size: int = None):
         config.pop_size = pop_size
         print(f"Overriding population size to: {pop_size}")
 
-    # Initialize population of neural networks
-    population = neat.Population(config)
+    if generated_networks and matrix_networks:
+        raise ValueError("--generated-networks cannot be combined with --matrix-networks")
+    if islands > 1 and (resume or hall_of_fame is not None or telemetry is not None or timing or run_db is not None
+                        or shared_population):
+        raise ValueError("--islands cannot be combined with --resume, --hall-of-fame, --telemetry, --timing, "
+                         "--run-db or --shared-population")
+    if shared_population and not (islands > 1 or (workers is not None and workers > 1)):
+        raise ValueError("--shared-population needs --workers greater than 1")
+    if islands > 1 and workers is not None and workers > 1:
+        # every island evaluates its own population serially in its process
+        print(f"--workers {workers} is not used by the islands"
+              + (", only by the adaptive final test" if final_ci_width is not None else ", ignoring it"))
+
+    if resume:
+        # Continue a previous run: population, reporters, RNG states and
+        # generation counter all come from the checkpoint
+        population = load_checkpoint(checkpoint)
+        config = population.config
+        truncate_fitness_history(utils.generation_count)
+        print(f"Resuming from {checkpoint} after generation {population.generation}")
+    else:
+        # Initialize population of neural networks
+        population = neat.Population(config)
 
     # Determine number of generations
     n_generations = generations if generations is not None else GENERATIONS
@@ -68,17 +117,130 @@ def main(verbose: bool = False, generations: int = None, pop_size: int = None):
     print(f"Generations: {n_generations}")
     print(f"Population size: {config.pop_size}")
 
-    # Report evolution progress and statistics
-    if verbose:
-        population.add_reporter(neat.StdOutReporter(True))
+    # Report evolution progress and statistics (restored from the checkpoint when resuming)
+    if not resume:
+        if verbose:
+            population.add_reporter(neat.StdOutReporter(True))
+        else:
+            population.add_reporter(neat.StdOutReporter(False))
+        population.add_reporter(neat.StatisticsReporter())
+
+    # Save the whole run periodically, so it can be continued with --resume
+    checkpointer = RunCheckpointer(population, checkpoint, checkpoint_every)
+    if checkpoint_every > 0:
+        population.add_reporter(checkpointer)
+
+    # Time of every phase of each generation, next to the fitness history.
+    # The timer goes first among the reporters (a restored one is replaced)
+    for reporter in [r for r in population.reporters.reporters if isinstance(r, (PhaseTimer, ReportingTimer))]:
+        population.reporters.remove(reporter)
+    if timing:
+        timing_path = os.path.join(os.path.dirname(utils.filename_for_fitness_history), "phase_timing.csv")
+        # a resumed run plays again the generations after its checkpoint
+        utils.phase_timer = PhaseTimer(timing_path, start_generation=utils.generation_count)
+        population.reporters.reporters.insert(0, utils.phase_timer)
+        print(f"Phase timing written to {timing_path}")
+
+    # One record per match in an append-only columnar store
+    if telemetry is not None:
+        # a fresh run starts at generation 0, so the rows of an earlier run are dropped
+        utils.telemetry = TelemetryWriter(telemetry, start_generation=utils.generation_count)
+        print(f"Match telemetry written to {telemetry}")
+
+    # Run and per-generation metadata in a SQLite database shared by many runs
+    for reporter in [r for r in population.reporters.reporters if isinstance(r, RunRecorder)]:
+        population.reporters.remove(reporter)
+    database = None
+    if run_db is not None:
+        database = RunDatabase(run_db)
+        params = {"seed": seed, "pop_size": config.pop_size, "generations": n_generations,
+                  "elitism": config.reproduction_config.elitism,
+                  "species_elitism": config.stagnation_config.species_elitism}
+        run_id = database.start_run(os.path.basename(os.getcwd()), params, options,
+                                    resume_generation=utils.generation_count if resume else None)
+        population.add_reporter(RunRecorder(database, run_id))
+        print(f"Run metadata written to {run_db} (run {run_id})")
+
+    # The reporting phase of the timer ends after every other reporter
+    if timing:
+        population.add_reporter(ReportingTimer(utils.phase_timer))
+
+    # Simulate each generation's match list in lockstep with NumPy
+    utils.use_batch_engine = batch_engine
+    utils.use_matrix_networks = matrix_networks
+    if batch_engine:
+        print("Using the vectorized batch battle engine")
+        if matrix_networks:
+            print("Networks are evaluated as stacked NumPy matrices")
+        else:
+            # every network is still activated one battle at a time
+            print("Without --matrix-networks the batch engine is not faster than the serial path")
+
+    # Networks compiled to Python code, cached by genome content across generations
+    if generated_networks:
+        utils.generated_networks = GeneratedNetworkCache()
+        print("Using generated network code")
+
+    # Stop battles whose result can no longer change
+    utils.early_stop_mode = early_stop
+    utils.early_stop_steps = stall_steps
+    if early_stop is not None:
+        print(f"Early battle termination: {early_stop}")
+
+    # Query the controllers every action_repeat steps (frame skip)
+    if final_action_repeat is None:
+        final_action_repeat = action_repeat
+    if action_repeat < 1 or final_action_repeat < 1:
+        raise ValueError("--action-repeat and --final-action-repeat must be at least 1")
+    utils.action_repeat = action_repeat
+    if action_repeat > 1:
+        print(f"Action repeat: controllers queried every {action_repeat} steps")
+
+    # Choose who fights whom inside the population
+    utils.schedule_strategy = schedule
+    utils.schedule_opponents = opponents
+    if schedule != "round_robin":
+        print(f"Opponent schedule: {schedule} ({opponents} opponents per genome)")
+
+    # Archive of past champions, kept on disk across runs
+    if hall_of_fame is not None and utils.hall_of_fame is None:
+        utils.hall_of_fame = HallOfFame.open(hall_of_fame, capacity=hof_size, eviction=hof_eviction)
+        utils.hall_of_fame_opponents = hof_opponents
+        print(f"Hall of fame: {hall_of_fame} ({len(utils.hall_of_fame)} champions, "
+              f"{hof_opponents} opponents per genome)")
+
+    # Cache deterministic match results across generations (elites are not re-simulated)
+    if cache_mb and cache_mb > 0:
+        utils.match_cache = MatchCache(max_bytes=cache_mb * 1024 * 1024)
+        print(f"Match cache enabled ({cache_mb} MB)")
+
+    if islands > 1:
+        # Island model: one process per population, the best genomes migrate along a ring
+        print(f"Island model: {islands} islands of {config.pop_size} genomes, "
+              f"{migrants} migrants every {migration_interval} generations")
+        winner = run_islands(config, islands, n_generations, migration_interval, migrants)
     else:
-        population.add_reporter(neat.StdOutReporter(False))
-    population.add_reporter(neat.StatisticsReporter())
+        # One process pool is kept alive for the whole run (serial if workers <= 1)
+        if workers is not None and workers > 1:
+            print(f"Parallel evaluation with {workers} worker processes")
+            if shared_population:
+                utils.population_buffer = PopulationBuffer()
+                print(f"Networks shared through {utils.population_buffer.path}")
+        start_worker_pool(workers)
 
-    # Run neuroevolution for a fixed number of generations
-    # signature: run(fitness_function, n_generations) -> best_genome
-    # NEAT calls eval_genomes for each generation
-    winner = population.run(eval_genomes, n_generations)
+        # Run neuroevolution for a fixed number of generations
+        # signature: run(fitness_function, n_generations) -> best_genome
+        # NEAT calls eval_genomes for each generation
+        try:
+            winner = population.run(eval_genomes, max(0, n_generations - population.generation))
+        finally:
+            close_worker_pool()
+            if utils.population_buffer is not None:
+                utils.population_buffer.close()
+                utils.population_buffer = None
+            checkpointer.wait()
+            if utils.telemetry is not None:
+                utils.telemetry.close()
 
     print("\n=== PHASE 2: Best genome found ===")
     
@@ -89,9 +251,10 @@ def main(verbose: bool = False, generations: int = None, pop_size: int = None):
     # Approximate averages based on config (assuming standard run)
     # pop_size is in config.pop_size
     # External matches is 6 (fixed in utils.py)
-    # Internal matches is pop_size - 1
+    # Internal matches is pop_size - 1 with round-robin, or the number stored by eval_genomes
     pop_size = config.pop_size
-    avg_int = fit_int / (pop_size - 1) if pop_size > 1 else 0.0
+    num_int = getattr(winner, "matches_internal", pop_size - 1)
+    avg_int = fit_int / num_int if num_int > 0 else 0.0
     avg_ext = fit_ext / 6.0
     
     print(f"Best Genome ID: {winner.key}")
@@ -111,10 +274,31 @@ def main(verbose: bool = False, generations: int = None, pop_size: int = None):
         pickle.dump(winner, f)
 
     # Test best controller against random opponents
-    winner_net = neat.nn.FeedForwardNetwork.create(winner, config)
+    if generated_networks:
+        winner_net = GeneratedNetwork.create(winner, config)
+    else:
+        winner_net = neat.nn.FeedForwardNetwork.create(winner, config)
     print("\n=== PHASE 3: Testing best genome against random opponents ===")
+    # the workers of the adaptive test are started below, so they see this value too
+    utils.action_repeat = final_action_repeat
+    if final_action_repeat != action_repeat:
+        print(f"Final test action repeat: {final_action_repeat}")
 
-    results = test_best_genome_against_random_opponents(winner_net)
+    estimates = None
+    if final_ci_width is not None:
+        # Adaptive test: rounds of parallel matches until every interval is narrow enough
+        if record_final is not None:
+            print("--record-final is only available with the fixed final test, not recording")
+        start_worker_pool(workers)
+        try:
+            results, estimates = adaptive_final_evaluation(winner_net, final_ci_width, final_confidence,
+                                                           max_matches=final_max_matches)
+        finally:
+            close_worker_pool()
+    else:
+        results = test_best_genome_against_random_opponents(winner_net, trajectories=record_final)
+        if record_final is not None:
+            print(f"Test matches recorded to {record_final} (python replay.py {record_final} --list)")
 
     crushing_threshold = 50.0
 
@@ -123,12 +307,20 @@ def main(verbose: bool = False, generations: int = None, pop_size: int = None):
 
     effective_wins = wins + crushing_wins
     win_rate = (effective_wins / total_matches) if total_matches > 0 else 0.0
+    if estimates is not None:
+        win_rate = overall_win_rate(estimates)
 
     print(f"Matches: {total_matches}")
     print(f"Wins: {wins + crushing_wins} ({wins} normal, {crushing_wins} crushing)")
     print(f"Draws: {draws}")
     print(f"Losses: {losses + crushing_losses}")
-    print(f"Win Rate: {win_rate * 100:.1f}%")
+    print(f"Win Rate: {win_rate * 100:.1f}%" + (" (weighted 20% Random, 40% Static, 40% Chaser)"
+                                                 if estimates is not None else ""))
+    if estimates is not None:
+        print_intervals(estimates, final_confidence)
+    if database is not None:
+        database.finish_run(run_id, time.time() - start_time, winner, win_rate)
+        database.close()
 
     # SUMMARIZE EXECUTION
     end_time = time.time()
@@ -159,13 +351,201 @@ if __name__ == "__main__":
         type=int,
         help="Population size (overrides config file)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for genome evaluation (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--shared-population",
+        action="store_true",
+        help="With --workers, publish each generation's networks once in shared memory (tasks carry only indices)",
+    )
+    parser.add_argument(
+        "--batch-engine",
+        action="store_true",
+        help="Simulate all battles of a generation in lockstep with the NumPy batch engine "
+             "(only faster together with --matrix-networks)",
+    )
+    parser.add_argument(
+        "--matrix-networks",
+        action="store_true",
+        help="With --batch-engine, evaluate all networks as stacked NumPy matrices",
+    )
+    parser.add_argument(
+        "--generated-networks",
+        action="store_true",
+        help="Play genomes with generated straight-line Python networks (same results as FeedForwardNetwork)",
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=0,
+        help="Memory cap in MB of the cross-generation match cache (default: 0, disabled)",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=sorted(SCHEDULES),
+        default="round_robin",
+        help="Opponent schedule for the internal battles (default: round_robin)",
+    )
+    parser.add_argument(
+        "--opponents",
+        type=int,
+        default=10,
+        help="Opponents per genome for the sampled schedules (default: 10); with balanced, one genome "
+             "plays one more when both this and the population are odd",
+    )
+    parser.add_argument(
+        "--hall-of-fame",
+        help="Path of the hall-of-fame archive of past champions (created if missing)",
+    )
+    parser.add_argument(
+        "--hof-size",
+        type=int,
+        default=50,
+        help="Maximum number of champions kept in the hall of fame (default: 50)",
+    )
+    parser.add_argument(
+        "--hof-opponents",
+        type=int,
+        default=3,
+        help="Archived champions played by each genome per generation (default: 3)",
+    )
+    parser.add_argument(
+        "--hof-eviction",
+        choices=["age", "diversity"],
+        default="age",
+        help="How champions are evicted from a full hall of fame (default: age)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default="checkpoint.pkl.gz",
+        help="Path of the run checkpoint (default: checkpoint.pkl.gz)",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=10,
+        help="Save a checkpoint every N generations (default: 10, 0 disables it)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the run saved in the checkpoint file",
+    )
+    parser.add_argument(
+        "--early-stop",
+        choices=["exact", "stall"],
+        help="End battles early once their result is settled (exact: provably, stall: also stalled robots)",
+    )
+    parser.add_argument(
+        "--stall-steps",
+        type=int,
+        default=30,
+        help="Steps robots must stay stalled before --early-stop stall ends the battle (default: 30)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Run seed for NEAT and for every battle (default: 0)",
+    )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="Write the time of every phase of each generation to phase_timing.csv",
+    )
+    parser.add_argument(
+        "--telemetry",
+        type=str,
+        default=None,
+        help="Directory of the per-match telemetry store (default: disabled)",
+    )
+    parser.add_argument(
+        "--record-final",
+        type=str,
+        default=None,
+        help="Record every match of the final test to this trajectory file (.npy), see replay.py",
+    )
+    parser.add_argument(
+        "--final-ci-width",
+        type=float,
+        default=None,
+        help="Play the final test in parallel rounds until the win-rate confidence interval "
+             "of every opponent type is narrower than this (default: fixed 100 matches)",
+    )
+    parser.add_argument(
+        "--final-confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of the final-test intervals (default: 0.95)",
+    )
+    parser.add_argument(
+        "--final-max-matches",
+        type=int,
+        default=1000,
+        help="Maximum final-test matches per opponent type with --final-ci-width (default: 1000)",
+    )
+    parser.add_argument(
+        "--islands",
+        type=int,
+        default=1,
+        help="Evolve this many populations of --pop-size genomes in parallel processes (default: 1)",
+    )
+    parser.add_argument(
+        "--migration-interval",
+        type=int,
+        default=5,
+        help="Generations between migrations of the island model (default: 5)",
+    )
+    parser.add_argument(
+        "--migrants",
+        type=int,
+        default=2,
+        help="Best genomes sent by each island to the next one at every migration (default: 2)",
+    )
+    parser.add_argument(
+        "--action-repeat",
+        type=int,
+        default=1,
+        help="Query the controllers every K steps and repeat their actions in between (default: 1)",
+    )
+    parser.add_argument(
+        "--final-action-repeat",
+        type=int,
+        default=None,
+        help="Action repeat of the final test (default: same as --action-repeat)",
+    )
+    parser.add_argument(
+        "--run-db",
+        type=str,
+        default=None,
+        help="SQLite database receiving the run metadata and per-generation stats, see run_db.py",
+    )
     args = parser.parse_args()
 
     try:
-        main(verbose=args.verbose, generations=args.generations, pop_size=args.pop_size)
+        main(verbose=args.verbose, generations=args.generations, pop_size=args.pop_size, workers=args.workers,
+             batch_engine=args.batch_engine, matrix_networks=args.matrix_networks,
+             cache_mb=args.cache_mb, schedule=args.schedule, opponents=args.opponents,
+             hall_of_fame=args.hall_of_fame, hof_size=args.hof_size, hof_opponents=args.hof_opponents,
+             hof_eviction=args.hof_eviction, checkpoint=args.checkpoint,
+             checkpoint_every=args.checkpoint_every, resume=args.resume,
+             early_stop=args.early_stop, stall_steps=args.stall_steps, seed=args.seed,
+             timing=args.timing, telemetry=args.telemetry, record_final=args.record_final,
+             final_ci_width=args.final_ci_width, final_confidence=args.final_confidence,
+             final_max_matches=args.final_max_matches, islands=args.islands,
+             migration_interval=args.migration_interval, migrants=args.migrants,
+             generated_networks=args.generated_networks, shared_population=args.shared_population,
+             action_repeat=args.action_repeat, final_action_repeat=args.final_action_repeat,
+             run_db=args.run_db)
         
     except (KeyboardInterrupt, EOFError):
         print("\nExecution interrupted by user.")
         sys.exit(0)
     except Exception as e:
         print(f"An error occurred: {e}")
+        # non-zero status, so sweep.py can tell a failed run from a finished one
+        sys.exit(1)
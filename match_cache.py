@@ -0,0 +1,78 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import hashlib
+import sys
+from collections import OrderedDict
+
+
+def genome_hash(genome):
+    """
+    Canonical hash of the network expressed by a genome: node genes
+    (bias, response, activation, aggregation) and enabled connections with
+    their weights, sorted by key. Genome id and fitness are not included, so an
+    elite copied into the next generation keeps the same hash.
+    Floats are written with repr(), which is exact.
+    """
+    parts = []
+    for key in sorted(genome.nodes):
+        node = genome.nodes[key]
+        parts.append(f"n{key}:{node.bias!r}:{node.response!r}:{node.activation}:{node.aggregation}")
+    for key in sorted(genome.connections):
+        conn = genome.connections[key]
+        if conn.enabled:
+            parts.append(f"c{key[0]},{key[1]}:{conn.weight!r}")
+    return hashlib.blake2b(";".join(parts).encode(), digest_size=16).digest()
+
+
+class MatchCache:
+    """
+    LRU cache of deterministic match results.
+    Keys are tuples such as (hash1, hash2) for a battle between two genomes
+    (ordered, because the two sides start at different positions) or
+    (hash, "Static") for a match against a scripted opponent.
+    The number of entries is bounded by a memory cap in bytes.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_per_entry = MatchCache._entry_size()
+
+    @staticmethod
+    def _entry_size():
+        # approximate size of one entry: key tuple with two 16-byte digests,
+        # result tuple of two floats and the OrderedDict node
+        key = (bytes(16), bytes(16))
+        value = (0.0, 0.0)
+        size = sys.getsizeof(key) + sum(sys.getsizeof(k) for k in key)
+        size += sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+        return size + 100
+
+    @property
+    def max_entries(self):
+        return max(1, self.max_bytes // self.bytes_per_entry)
+
+    def get(self, key):
+        """ Returns the cached result or None, marking the entry as recently used. """
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
@@ -0,0 +1,113 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import os
+import time
+import neat
+import utils
+
+# Phases of one generation, in the order they happen.
+# The eval_genomes phases are closed by utils.lap(); reporting (post_evaluate of the
+# other reporters: console output, statistics), reproduction (NEAT reproduction and
+# speciation) and other (the rest of the reporters: species output, checkpoints)
+# are measured by the reporters around the evaluation.
+PHASES = ("network_creation", "internal_battles", "hall_of_fame", "external_matches",
+          "aggregation", "logging", "reporting", "reproduction", "other")
+COLUMNS = ("generation", "population", "species") + PHASES + (
+    "total", "battles", "steps", "avg_battle_length", "steps_saved")
+
+
+class PhaseTimer(neat.reporting.BaseReporter):
+    """
+    Records the wall-clock time of every phase of a generation and the number of
+    battles and steps simulated, and appends one CSV row per generation to path.
+    Must be the first reporter of the population, and its ReportingTimer the last
+    one, so that reporting is measured from the end of the evaluation to the end
+    of the other reporters and reproduction from there to the end of speciation.
+    When phase timing is off (utils.phase_timer is None) utils.lap() returns immediately.
+    A run resumed at start_generation drops the rows of the generations it plays again.
+    """
+    def __init__(self, path, start_generation=0):
+        self.path = path
+        self.truncate(start_generation)
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.generation = None
+        self.population_size = 0
+        self._last_lap = None
+        self._generation_start = None
+        self._evaluated = None
+        self._reported = None
+
+    def truncate(self, generation):
+        """ Drops the rows of generation >= generation (a new run rewrites the file at generation 0). """
+        if generation == 0 or not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            lines = f.readlines()
+        kept = lines[:1] + [line for line in lines[1:] if line.strip() and int(line.split(",")[0]) < generation]
+        with open(self.path, "w") as f:
+            f.writelines(kept)
+
+    def lap(self, phase):
+        """ Charges the time since the previous lap to phase (None only sets the mark). """
+        now = time.perf_counter()
+        if phase is not None:
+            self.times[phase] += now - self._last_lap
+        self._last_lap = now
+
+    def reported(self):
+        """ Marks the end of the post_evaluate calls of the other reporters. """
+        self._reported = time.perf_counter()
+
+    def start_generation(self, generation):
+        self.generation = generation
+        if self._generation_start is None:
+            self._generation_start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self._evaluated = time.perf_counter()
+        self.population_size = len(population)
+
+    def end_generation(self, config, population, species_set):
+        self._write_row(len(species_set.species))
+
+    def found_solution(self, config, generation, best):
+        # the fitness threshold stops the run before reproduction
+        if self._evaluated is not None:
+            self._write_row(0)
+
+    def _write_row(self, num_species):
+        now = time.perf_counter()
+        reported = self._reported if self._reported is not None else self._evaluated
+        self.times["reporting"] = reported - self._evaluated
+        self.times["reproduction"] = now - reported
+        total = now - self._generation_start
+        self.times["other"] = max(0.0, total - sum(self.times[p] for p in PHASES if p != "other"))
+
+        stats = utils.generation_stats
+        battles = stats["battles"]
+        row = [self.generation, self.population_size, num_species]
+        row += [f"{self.times[p]:.6f}" for p in PHASES]
+        row += [f"{total:.6f}", battles, stats["steps"],
+                f"{stats['steps'] / battles:.2f}" if battles else "0", stats["steps_saved"]]
+
+        new_file = not os.path.exists(self.path) or self.generation == 0
+        with open(self.path, "w" if new_file else "a") as f:
+            if new_file:
+                f.write(",".join(COLUMNS) + "\n")
+            f.write(",".join(str(v) for v in row) + "\n")
+
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self._generation_start = now
+        self._evaluated = None
+        self._reported = None
+
+
+class ReportingTimer(neat.reporting.BaseReporter):
+    """ Last reporter of the population: closes the reporting phase of a PhaseTimer. """
+    def __init__(self, timer):
+        self.timer = timer
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.timer.reported()
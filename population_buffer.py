@@ -0,0 +1,152 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import neat
+from neat.activations import sigmoid_activation
+from neat.aggregations import sum_aggregation
+from generated_network import GeneratedNetwork, GeneratedNetworkCache
+
+# File layout: one float64 .npy array, memory-mapped by the workers (like the hall of fame)
+#   [FORMAT_VERSION, revision, num_networks, generated, hashed, num_inputs, num_outputs,
+#    input keys, output keys, num_networks offsets,
+#    when hashed, the genome content hash of every network as 4 u32 words,
+#    then for every network: num_nodes and, for every node in evaluation order,
+#    node key, bias, response, num_links, (source key, weight) for every link]
+FORMAT_VERSION = 2
+HEADER_SIZE = 7
+HASH_WORDS = 4
+FILE_NAME = "population.npy"
+
+
+def encode_network(net):
+    """ Flattens the node evals of a FeedForwardNetwork (sigmoid and sum only). """
+    values = [len(net.node_evals)]
+    for node, act_func, agg_func, bias, response, links in net.node_evals:
+        if act_func is not sigmoid_activation or agg_func is not sum_aggregation:
+            raise ValueError("Only sigmoid activation and sum aggregation can be shared")
+        values += [node, bias, response, len(links)]
+        for i, w in links:
+            values += [i, w]
+    return np.asarray(values, dtype=np.float64)
+
+
+def decode_network(data, offset, input_keys, output_keys):
+    """ Rebuilds the FeedForwardNetwork stored at offset: same nodes, links and floats. """
+    num_nodes = int(data[offset])
+    pos = offset + 1
+    node_evals = []
+    for _ in range(num_nodes):
+        node, bias, response, num_links = data[pos:pos + 4]
+        pos += 4
+        links = data[pos:pos + 2 * int(num_links)].reshape(-1, 2)
+        pos += 2 * int(num_links)
+        node_evals.append((int(node), sigmoid_activation, sum_aggregation, float(bias), float(response),
+                           [(int(i), float(w)) for i, w in links]))
+    return neat.nn.FeedForwardNetwork(list(input_keys), list(output_keys), node_evals)
+
+
+class SharedNetwork:
+    """
+    Reference to network `index` of a published population. Pickling it sends only
+    (path, revision, index); unpickling it in a worker returns the network itself,
+    decoded once per process and revision (see attach_network), so tasks that
+    carry it need no change in the worker functions.
+    """
+    def __init__(self, path, revision, index):
+        self.path = path
+        self.revision = revision
+        self.index = index
+
+    def __reduce__(self):
+        return attach_network, (self.path, self.revision, self.index)
+
+
+class PopulationBuffer:
+    """
+    Networks of the current generation in one flat file in shared memory
+    (/dev/shm when available). publish() writes them once per generation and
+    returns SharedNetwork references to put in the battle tasks instead of the
+    networks, so the worker pool receives a few bytes per task.
+    """
+    def __init__(self, directory=None):
+        if directory is None:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            directory = tempfile.mkdtemp(prefix="population_", dir=base)
+        self.directory = directory
+        self.path = os.path.join(directory, FILE_NAME)
+        self.revision = 0
+
+    def publish(self, networks, input_keys, output_keys, generated=False, contents=None):
+        """
+        Writes a list of FeedForwardNetwork and returns one SharedNetwork per network.
+        With generated=True the workers play them as GeneratedNetwork; given the
+        genome content hashes (match_cache.genome_hash) of the networks, they keep
+        the generated networks across revisions instead of compiling them again.
+        """
+        self.revision += 1
+        blocks = [encode_network(net) for net in networks]
+        hashes = [] if contents is None else [np.frombuffer(content, dtype=np.uint32) for content in contents]
+        offsets = []
+        offset = HEADER_SIZE + len(input_keys) + len(output_keys) + len(blocks) + HASH_WORDS * len(hashes)
+        for block in blocks:
+            offsets.append(offset)
+            offset += len(block)
+        header = [FORMAT_VERSION, self.revision, len(blocks), int(generated), int(contents is not None),
+                  len(input_keys), len(output_keys)]
+        data = np.concatenate([np.asarray(header + list(input_keys) + list(output_keys) + offsets,
+                                          dtype=np.float64)] + hashes + blocks)
+
+        # written aside and renamed, so workers still reading the last revision are not affected
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp_path, self.path)
+        return [SharedNetwork(self.path, self.revision, i) for i in range(len(blocks))]
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+# Population opened by this process: (path, revision, data, decoded networks by index)
+_attached = None
+# Generated networks of this process by genome content hash, kept across revisions
+_generated = GeneratedNetworkCache()
+
+
+def attach_network(path, revision, index):
+    """
+    Returns network `index` of the population published at path with the given
+    revision. The file is memory-mapped again only when the revision changes and
+    every network is decoded at most once per revision; generated networks with
+    a content hash are compiled once per process.
+    """
+    global _attached
+    if _attached is None or _attached[0] != path or _attached[1] != revision:
+        data = np.load(path, mmap_mode="r")
+        if int(data[0]) != FORMAT_VERSION or int(data[1]) != revision:
+            raise ValueError(f"Population buffer {path} is at revision {int(data[1])}, expected {revision}")
+        _attached = (path, revision, data, {})
+    _, _, data, networks = _attached
+    net = networks.get(index)
+    if net is None:
+        num_networks, generated, hashed, num_inputs, num_outputs = (int(v) for v in data[2:HEADER_SIZE])
+        input_keys = [int(k) for k in data[HEADER_SIZE:HEADER_SIZE + num_inputs]]
+        output_keys = [int(k) for k in data[HEADER_SIZE + num_inputs:HEADER_SIZE + num_inputs + num_outputs]]
+        offsets = HEADER_SIZE + num_inputs + num_outputs
+        offset = int(data[offsets + index])
+        decode = lambda: decode_network(data, offset, input_keys, output_keys)
+        if generated and hashed:
+            start = offsets + num_networks + HASH_WORDS * index
+            content = np.asarray(data[start:start + HASH_WORDS], dtype=np.uint32).tobytes()
+            net = _generated.lookup(content, lambda: GeneratedNetwork.from_network(decode()))
+        elif generated:
+            net = GeneratedNetwork.from_network(decode())
+        else:
+            net = decode()
+        networks[index] = net
+    return net
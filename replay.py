@@ -0,0 +1,127 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+"""
+Headless replay of recorded battles (see trajectory.py), without re-simulating them.
+
+    python replay.py trajectories.npy --list
+    python replay.py trajectories.npy --battle 3 --output battle_3.gif
+    python replay.py trajectories.npy --battle 3 --output frames_3/ --every 5
+"""
+
+import argparse
+import math
+import os
+import matplotlib
+matplotlib.use("Agg")  # no display needed
+import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation, PillowWriter
+from matplotlib.patches import Circle, Wedge
+import numpy as np
+from trajectory import load_trajectories, battle_length, FIELDS
+
+# Same rules as Arena, used to draw the shooting cone
+SHOOT_RANGE = 0.2
+SHOOT_ANGLE = math.radians(30)
+COLORS = ("tab:blue", "tab:red")
+X, Y, ANGLE, HEALTH, MOVE, ROTATE, SHOOT = range(len(FIELDS))
+
+
+class BattleView:
+    """ Matplotlib figure of one battle; update(t) draws the state after row t. """
+    def __init__(self, trajectory, title="", trail=40):
+        self.trajectory = trajectory
+        self.trail = trail
+        self.figure, self.ax = plt.subplots(figsize=(5, 5))
+        self.ax.set_xlim(-0.05, 1.05)
+        self.ax.set_ylim(-0.05, 1.05)
+        self.ax.set_aspect("equal")
+        self.ax.add_patch(plt.Rectangle((0, 0), 1, 1, fill=False, linewidth=2))
+        self.title = title
+        self.bodies = []
+        self.headings = []
+        self.trails = []
+        self.cones = []
+        for color in COLORS:
+            self.trails.append(self.ax.plot([], [], color=color, alpha=0.3, linewidth=1)[0])
+            self.headings.append(self.ax.plot([], [], color="black", linewidth=1.5)[0])
+            body = Circle((0, 0), 0.02, color=color)
+            cone = Wedge((0, 0), SHOOT_RANGE, 0, 0, color=color, alpha=0.2)
+            self.ax.add_patch(body)
+            self.ax.add_patch(cone)
+            self.bodies.append(body)
+            self.cones.append(cone)
+
+    def update(self, t):
+        state = self.trajectory[t]
+        for robot in range(2):
+            x, y, angle, health, _, _, shoot = state[robot]
+            self.bodies[robot].center = (x, y)
+            self.headings[robot].set_data([x, x + 0.05 * math.cos(angle)], [y, y + 0.05 * math.sin(angle)])
+            past = self.trajectory[max(0, t - self.trail):t + 1, robot]
+            self.trails[robot].set_data(past[:, X], past[:, Y])
+            cone = self.cones[robot]
+            cone.set_center((x, y))
+            cone.set_theta1(math.degrees(angle - SHOOT_ANGLE))
+            cone.set_theta2(math.degrees(angle + SHOOT_ANGLE))
+            cone.set_visible(bool(shoot > 0.5))
+        health1, health2 = state[0, HEALTH], state[1, HEALTH]
+        self.ax.set_title(f"{self.title}  step {t}  health {health1:.0f} / {health2:.0f}")
+        return self.bodies + self.headings + self.trails + self.cones
+
+    def close(self):
+        plt.close(self.figure)
+
+
+def render_battle(trajectory, output, title="", every=1, fps=30):
+    """
+    Renders one recorded battle. output ending in .gif gives an animation,
+    any other path is a directory that receives one PNG per rendered step.
+    Returns the number of rendered frames.
+    """
+    length = battle_length(trajectory)
+    steps = list(range(0, length, every))
+    if steps[-1] != length - 1:
+        steps.append(length - 1)
+    view = BattleView(np.asarray(trajectory[:length]), title)
+    try:
+        if output.endswith(".gif"):
+            animation = FuncAnimation(view.figure, view.update, frames=steps, blit=False)
+            animation.save(output, writer=PillowWriter(fps=fps))
+        else:
+            os.makedirs(output, exist_ok=True)
+            for t in steps:
+                view.update(t)
+                view.figure.savefig(os.path.join(output, f"frame_{t:04d}.png"))
+    finally:
+        view.close()
+    return len(steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded battles without re-simulating them")
+    parser.add_argument("path", help="Trajectory file written by the recorder (.npy)")
+    parser.add_argument("--list", action="store_true", help="List the recorded battles")
+    parser.add_argument("--battle", type=int, default=0, help="Index of the battle to render (default: 0)")
+    parser.add_argument("--output", default=None, help="Output .gif or frame directory")
+    parser.add_argument("--every", type=int, default=1, help="Render one step out of N (default: 1)")
+    parser.add_argument("--fps", type=int, default=30, help="Frames per second of the animation (default: 30)")
+    args = parser.parse_args()
+
+    data, labels = load_trajectories(args.path)
+    if args.list:
+        for i, label in enumerate(labels):
+            details = ", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in label.items())
+            print(f"{i:4d}: {battle_length(data[i]) - 1} steps, {details}")
+        return
+
+    label = labels[args.battle]
+    output = args.output or f"battle_{args.battle}.gif"
+    title = f"vs {label['opponent']}" if "opponent" in label else ""
+    frames = render_battle(data[args.battle], output, title, args.every, args.fps)
+    print(f"Rendered {frames} frames to {output}")
+
+
+if __name__ == "__main__":
+    main()
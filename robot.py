@@ -10,8 +10,9 @@ class Robot:
     Represents a robotic entity with position, orientation, and health.
     Handles the application of actions received from the controller.
     """
-    def __init__(self, controller, start_pos=(0.0, 0.0)):
+    def __init__(self, controller, start_pos=(0.0, 0.0), team=None):
         self.controller = controller
+        self.team = team           # robots of the same team do not target each other
         self.x, self.y = start_pos
         self.angle = 0.0           # facing right
         self.max_health = 100
@@ -47,3 +48,6 @@ class Robot:
 
     def is_dead(self):
         return self.health <= 0
+
+    def is_opponent(self, other):
+        return other is not self and (self.team is None or other.team != self.team)
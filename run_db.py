@@ -0,0 +1,266 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+"""
+SQLite database of run metadata, to compare many experiments with one query.
+
+    python main.py --generations 300 --run-db runs.sqlite          # written during the run
+    python run_db.py import results/*.csv --db runs.sqlite          # existing fitness histories
+    python run_db.py runs --db runs.sqlite                          # one line per run
+
+    import sqlite3
+    db = sqlite3.connect("runs.sqlite")
+    db.execute("SELECT pop_size, elitism, AVG(win_rate) FROM runs GROUP BY pop_size, elitism")
+
+Table runs has one row per run (parameters, settings, duration, winner, win rate),
+table generations one row per generation of a run (population averages, best
+fitness, species and time). Several runs, e.g. the runs of a sweep, can write to
+the same file at the same time.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+import neat
+import utils
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    directory TEXT,
+    source_file TEXT UNIQUE,        -- imported CSV file, NULL for runs of main.py
+    status TEXT NOT NULL,           -- running, done or imported
+    started TEXT,
+    finished TEXT,
+    seed INTEGER,
+    pop_size INTEGER,
+    generations INTEGER,
+    elitism INTEGER,
+    species_elitism INTEGER,
+    settings TEXT,                  -- JSON of the main.py options
+    duration REAL,
+    best_fitness REAL,
+    winner_nodes INTEGER,
+    winner_connections INTEGER,
+    win_rate REAL
+);
+CREATE TABLE IF NOT EXISTS generations (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    generation INTEGER NOT NULL,
+    avg_internal REAL,
+    avg_external REAL,
+    best_fitness REAL,
+    mean_fitness REAL,
+    species INTEGER,
+    seconds REAL,
+    battles INTEGER,
+    steps INTEGER,
+    PRIMARY KEY (run_id, generation)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_parameters ON runs (pop_size, elitism, species_elitism, generations);
+CREATE INDEX IF NOT EXISTS runs_seed ON runs (seed);
+CREATE INDEX IF NOT EXISTS runs_win_rate ON runs (win_rate);
+CREATE INDEX IF NOT EXISTS runs_directory ON runs (directory, status);
+CREATE INDEX IF NOT EXISTS generations_generation ON generations (generation);
+"""
+
+# Run parameters in result file names: pop_50_gen_300_elit_4 (results/) or
+# pop_50_gen_300_elit_4_selit_2_seed_0 (sweep.py run directories)
+NAME_PATTERN = re.compile(r"pop_(\d+)_gen_(\d+)_elit_(\d+)(?:_selit_(\d+))?(?:_seed_(\d+))?")
+HISTORY_FILE = "fitness_history.csv"
+
+
+def parse_run_name(name):
+    """ Parameters found in a run name, e.g. {"pop_size": 50, "generations": 300, "elitism": 4}. """
+    match = NAME_PATTERN.search(name)
+    if match is None:
+        return {}
+    values = dict(zip(("pop_size", "generations", "elitism", "species_elitism", "seed"), match.groups()))
+    return {key: int(value) for key, value in values.items() if value is not None}
+
+
+def read_history(path):
+    """ Rows (generation, avg_internal, avg_external) of a fitness history CSV. """
+    with open(path) as f:
+        lines = f.readlines()
+    if not lines or not lines[0].startswith("Generation,"):
+        raise ValueError(f"Not a fitness history: {path}")
+    rows = []
+    for line in lines[1:]:
+        if line.strip():
+            gen, avg_int, avg_ext = line.split(",")
+            rows.append((int(gen), float(avg_int), float(avg_ext)))
+    return rows
+
+
+class RunDatabase:
+    def __init__(self, path):
+        self.path = path
+        # runs of a sweep share the file: wait for the other writers instead of failing
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+    def start_run(self, name, params, settings, directory=None, resume_generation=None):
+        """
+        Adds a run and returns its id. With resume_generation, the last unfinished
+        run of the same directory is continued instead (its generations from
+        resume_generation on are dropped), if there is one.
+        """
+        directory = os.path.abspath(directory or os.getcwd())
+        with self.connection:
+            if resume_generation is not None:
+                row = self.connection.execute(
+                    "SELECT id FROM runs WHERE directory = ? AND status = 'running' ORDER BY id DESC LIMIT 1",
+                    (directory,)).fetchone()
+                if row is not None:
+                    self.connection.execute("DELETE FROM generations WHERE run_id = ? AND generation >= ?",
+                                            (row[0], resume_generation))
+                    return row[0]
+            cursor = self.connection.execute(
+                "INSERT INTO runs (name, directory, status, started, seed, pop_size, generations, elitism, "
+                "species_elitism, settings) VALUES (?, ?, 'running', ?, ?, ?, ?, ?, ?, ?)",
+                (name, directory, datetime.now().isoformat(timespec="seconds"), params.get("seed"),
+                 params.get("pop_size"), params.get("generations"), params.get("elitism"),
+                 params.get("species_elitism"), json.dumps(settings, sort_keys=True)))
+            return cursor.lastrowid
+
+    def log_generation(self, run_id, generation, avg_internal, avg_external, best_fitness=None,
+                       mean_fitness=None, species=None, seconds=None, battles=None, steps=None):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, generation, avg_internal, avg_external, best_fitness, mean_fitness, species,
+                 seconds, battles, steps))
+
+    def finish_run(self, run_id, duration, winner=None, win_rate=None):
+        """ Marks a run as done, with its winner's fitness and complexity and the final win rate. """
+        values = {"status": "done", "finished": datetime.now().isoformat(timespec="seconds"),
+                  "duration": duration, "win_rate": win_rate}
+        if winner is not None:
+            values.update(best_fitness=winner.fitness, winner_nodes=len(winner.nodes),
+                          winner_connections=sum(1 for c in winner.connections.values() if c.enabled))
+        with self.connection:
+            self.connection.execute(f"UPDATE runs SET {', '.join(f'{key} = ?' for key in values)} WHERE id = ?",
+                                    list(values.values()) + [run_id])
+
+    def import_csv(self, path):
+        """
+        Imports a fitness history CSV as a run with status "imported" and returns its id.
+        The parameters come from the file name (or from the directory name for
+        fitness_history.csv files); importing the same file again replaces it.
+        """
+        path = os.path.abspath(path)
+        rows = read_history(path)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = os.path.basename(os.path.dirname(path)) if os.path.basename(path) == HISTORY_FILE else stem
+        params = parse_run_name(name)
+        with self.connection:
+            self.connection.execute("DELETE FROM runs WHERE source_file = ?", (path,))
+            run_id = self.connection.execute(
+                "INSERT INTO runs (name, directory, source_file, status, finished, seed, pop_size, generations, "
+                "elitism, species_elitism) VALUES (?, ?, ?, 'imported', ?, ?, ?, ?, ?, ?)",
+                (name, os.path.dirname(path), path,
+                 datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds"),
+                 params.get("seed"), params.get("pop_size"), params.get("generations"), params.get("elitism"),
+                 params.get("species_elitism"))).lastrowid
+            self.connection.executemany(
+                "INSERT INTO generations (run_id, generation, avg_internal, avg_external) VALUES (?, ?, ?, ?)",
+                [(run_id,) + row for row in rows])
+        return run_id
+
+    def close(self):
+        self.connection.close()
+
+
+class RunRecorder(neat.reporting.BaseReporter):
+    """
+    NEAT reporter writing one row per generation to a RunDatabase: the population
+    averages computed by eval_genomes, best and mean fitness, species, wall-clock
+    time and battles simulated. The database is not saved in checkpoints.
+    """
+    def __init__(self, database, run_id):
+        self.database = database
+        self.run_id = run_id
+        self.generation = None
+        self.started = None
+        self.fitness = None
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.started = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        values = [genome.fitness for genome in population.values()]
+        self.fitness = (best_genome.fitness, sum(values) / len(values))
+
+    def end_generation(self, config, population, species_set):
+        self._write_row(len(species_set.species))
+
+    def found_solution(self, config, generation, best):
+        # the fitness threshold stops the run before reproduction
+        if self.fitness is not None:
+            self._write_row(None)
+
+    def _write_row(self, num_species):
+        avg_internal, avg_external = utils.generation_averages
+        stats = utils.generation_stats
+        self.database.log_generation(self.run_id, self.generation, avg_internal, avg_external, *self.fitness,
+                                     num_species, time.perf_counter() - self.started, stats["battles"],
+                                     stats["steps"])
+        self.fitness = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["database"] = None
+        return state
+
+
+def print_runs(database):
+    rows = database.connection.execute(
+        "SELECT runs.id, name, status, pop_size, elitism, COUNT(generation), MAX(avg_external), win_rate "
+        "FROM runs LEFT JOIN generations ON generations.run_id = runs.id GROUP BY runs.id ORDER BY runs.id")
+    print(f"{'id':>4}  {'name':<40} {'status':<9} {'pop':>4} {'elit':>4} {'gens':>5} {'best ext':>8} {'win rate':>8}")
+    for run_id, name, status, pop, elit, gens, best_ext, win_rate in rows:
+        print(f"{run_id:>4}  {name[:40]:<40} {status:<9} {pop if pop is not None else '-':>4} "
+              f"{elit if elit is not None else '-':>4} {gens:>5} "
+              f"{f'{best_ext:.2f}' if best_ext is not None else '-':>8} "
+              f"{f'{win_rate * 100:.1f}%' if win_rate is not None else '-':>8}")
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default="runs.sqlite", help="Database file (default: runs.sqlite)")
+    parser = argparse.ArgumentParser(description="Database of run metadata")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", parents=[common], help="Import fitness history CSV files")
+    import_parser.add_argument("files", nargs="+", help="e.g. results/*.csv or sweeps/*/fitness_history.csv")
+    commands.add_parser("runs", parents=[common], help="List the runs")
+    args = parser.parse_args()
+
+    database = RunDatabase(args.db)
+    try:
+        if args.command == "import":
+            for path in args.files:
+                try:
+                    database.import_csv(path)
+                    print(f"Imported {path}")
+                except ValueError as e:
+                    print(f"Skipped {path}: {e}")
+        else:
+            print_runs(database)
+    finally:
+        database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+"""
+Opponent scheduling strategies for the internal co-evolution battles.
+
+Every strategy is a generator that yields rounds: a round is a list of (i, j)
+pairs of genome indices, where i plays from the left start position (0.2, 0.5)
+and j from the right one (0.8, 0.5). The caller plays a round before asking for
+the next one, so adaptive strategies (Swiss) can read the updated `scores` list.
+Apart from round_robin, each genome plays about k matches, so the cost of a
+generation grows as O(N*k) instead of O(N^2).
+"""
+
+
+def round_robin(num_genomes, k, rng, scores):
+    """
+    Every pair of genomes fights once (k and rng are ignored).
+    """
+    yield [(i, j) for i in range(num_genomes) for j in range(i + 1, num_genomes)]
+
+
+def random_opponents(num_genomes, k, rng, scores):
+    """
+    Every genome challenges k distinct random opponents.
+    A genome can also be picked as opponent by others, so the number of
+    matches per genome varies around 2k.
+    """
+    k = min(k, num_genomes - 1)
+    pairs = []
+    for i in range(num_genomes):
+        # k of the other num_genomes - 1 indices, shifted past i (sampling a range is O(k))
+        for j in rng.sample(range(num_genomes - 1), k):
+            pairs.append((i, j + 1 if j >= i else j))
+    yield pairs
+
+
+def swiss(num_genomes, k, rng, scores):
+    """
+    k rounds of Swiss-style pairing: genomes are sorted by their current
+    average score and paired with the closest ranked genome they have not
+    met yet. The first round is a random pairing. With an odd number of
+    genomes the last unpaired genome sits out the round.
+    """
+    played = set()
+    for round_number in range(k):
+        order = list(range(num_genomes))
+        rng.shuffle(order)
+        if round_number > 0:
+            order.sort(key=lambda i: scores[i], reverse=True)
+
+        pairs = []
+        # unpaired positions of order as a linked list (following[p] is the next one,
+        # num_genomes the end), so pairing a genome only visits unpaired genomes
+        following = list(range(1, num_genomes + 1))
+        head = 0
+        while head < num_genomes and following[head] < num_genomes:
+            first = order[head]
+            # closest ranked opponent not met yet, or simply the next one
+            before, position = head, following[head]
+            while position < num_genomes and (min(first, order[position]), max(first, order[position])) in played:
+                before, position = position, following[position]
+            if position == num_genomes:
+                before, position = head, following[head]
+            opponent = order[position]
+            following[before] = following[position]
+            head = following[head]
+            played.add((min(first, opponent), max(first, opponent)))
+            # random sides, so no rank gets a systematic start position
+            pairs.append((first, opponent) if rng.random() < 0.5 else (opponent, first))
+        yield pairs
+
+
+def balanced(num_genomes, k, rng, scores):
+    """
+    Shared-sample design: genomes are placed on a random circle and each one
+    fights the k neighbours closest on the circle (k // 2 on each side, plus
+    the opposite genome when k is odd).
+    Every genome plays exactly k matches, and half of them from each start
+    position; when k and the population are both odd, the genome left without
+    an opposite one plays one more match, so one of them plays k + 1.
+    """
+    if k >= num_genomes - 1:
+        yield from round_robin(num_genomes, k, rng, scores)
+        return
+
+    order = list(range(num_genomes))
+    rng.shuffle(order)
+    pairs = []
+    for offset in range(1, k // 2 + 1):
+        for position in range(num_genomes):
+            pairs.append((order[position], order[(position + offset) % num_genomes]))
+    if k % 2 == 1:
+        half = num_genomes // 2
+        for position in range(half):
+            pairs.append((order[position], order[position + half]))
+        if num_genomes % 2 == 1:
+            # the last genome meets the one half a circle away, already paired
+            pairs.append((order[num_genomes - 1], order[half - 1]))
+    yield pairs
+
+
+SCHEDULES = {
+    "round_robin": round_robin,
+    "random": random_opponents,
+    "swiss": swiss,
+    "balanced": balanced,
+}
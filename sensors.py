@@ -3,6 +3,7 @@
 #    Degree Program: Computer Engineering
 
 import math
+from step_kernel import StepKernel, wrap_angle
 
 
 class Sensors:
@@ -18,8 +19,17 @@ class Sensors:
         Compute the sensor vector for a robot inside the arena.
         Returns a list of 7 floats with fixed size and ordering.
         """
+        # 1v1 arenas share the pairwise geometry computed by the step kernel
+        kernel = StepKernel.for_arena(arena)
+        if kernel is not None and (robot is kernel.robot1 or robot is kernel.robot2):
+            return list(kernel.sensors(robot))
+        return Sensors._compute(robot, Sensors._get_opponent(robot, arena), arena)
 
-        opponent = Sensors._get_opponent(robot, arena)
+    @staticmethod
+    def _compute(robot, opponent, arena):
+        """
+        Sensor vector of robot against a given opponent, computing the geometry from scratch.
+        """
         # Relative position to opponent
         dx = opponent.x - robot.x
         dy = opponent.y - robot.y
@@ -56,8 +66,14 @@ class Sensors:
     @staticmethod
     def _get_opponent(robot, arena):
         """
-        Return the opponent robot in a 1v1 arena.
+        Return the opponent robot: the other robot in a 1v1 arena,
+        the nearest living opponent in an arena with more robots.
         """
+        if len(arena.robots) > 2:
+            arena.build_index()
+            opponent = arena.nearest_opponent(robot)
+            if opponent is not None:
+                return opponent
         for r in arena.robots:
             if r is not robot:
                 return r
@@ -68,8 +84,4 @@ class Sensors:
         """
         Normalize angle to the range [-pi, pi].
         """
-        while angle > math.pi:
-            angle -= 2 * math.pi
-        while angle < -math.pi:
-            angle += 2 * math.pi
-        return angle
+        return wrap_angle(angle)
@@ -0,0 +1,73 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import math
+
+
+class UniformGrid:
+    """
+    Uniform grid over the arena, used by arenas with more than two robots.
+    Every robot is stored in the cell containing its position, so nearest-robot
+    and range queries only look at the cells around the query point instead of
+    at every robot in the arena.
+    The grid is rebuilt from scratch whenever the robots have moved.
+    """
+    def __init__(self, width, height, cell_size):
+        self.cell_size = cell_size
+        self.cols = max(1, math.ceil(width / cell_size))
+        self.rows = max(1, math.ceil(height / cell_size))
+        self.cells = {}
+
+    def cell_of(self, x, y):
+        # positions on (or past) the far walls belong to the last cell
+        col = min(max(int(x / self.cell_size), 0), self.cols - 1)
+        row = min(max(int(y / self.cell_size), 0), self.rows - 1)
+        return col, row
+
+    def rebuild(self, robots):
+        """ Indexes robots, a list of (index, robot) pairs. """
+        self.cells = {}
+        for index, robot in robots:
+            self.cells.setdefault(self.cell_of(robot.x, robot.y), []).append((index, robot))
+
+    def within(self, x, y, radius):
+        """
+        Candidates for a range query: every indexed (index, robot) whose cell
+        overlaps the square of half side radius around (x, y).
+        The exact distance test is left to the caller.
+        """
+        col_min, row_min = self.cell_of(x - radius, y - radius)
+        col_max, row_max = self.cell_of(x + radius, y + radius)
+        candidates = []
+        for col in range(col_min, col_max + 1):
+            for row in range(row_min, row_max + 1):
+                candidates += self.cells.get((col, row), ())
+        return candidates
+
+    def nearest(self, x, y, accept):
+        """
+        The (index, robot) closest to (x, y) among those for which accept(robot)
+        is true, or None. Ties go to the lower index.
+        Cells are visited in square rings around the cell of (x, y); the search
+        stops once the next ring cannot contain anything closer.
+        """
+        center_col, center_row = self.cell_of(x, y)
+        best = None
+        best_key = None
+        for ring in range(max(self.cols, self.rows)):
+            for col in range(center_col - ring, center_col + ring + 1):
+                for row in range(center_row - ring, center_row + ring + 1):
+                    if max(abs(col - center_col), abs(row - center_row)) != ring:
+                        continue
+                    for index, robot in self.cells.get((col, row), ()):
+                        if not accept(robot):
+                            continue
+                        key = (math.hypot(robot.x - x, robot.y - y), index)
+                        if best_key is None or key < best_key:
+                            best = (index, robot)
+                            best_key = key
+            # anything in the next ring is at least ring * cell_size away
+            if best_key is not None and best_key[0] <= ring * self.cell_size:
+                break
+        return best
@@ -0,0 +1,253 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import configparser
+import numpy as np
+from neat.config import ConfigParameter, DefaultClassConfig
+from neat.math_util import mean, stdev
+from neat.species import DefaultSpeciesSet, GenomeDistanceCache, Species
+
+# Pairs x genes computed at once by CachedSpeciesSet, to bound the memory of a batch
+MAX_BATCH_ELEMENTS = 1 << 20
+# Connection (in, out) keys are encoded as in * CONNECTION_KEY_BASE + out
+CONNECTION_KEY_BASE = 1 << 32
+
+
+def species_set_type(config_path):
+    """
+    Species set class selected by the config file: CachedSpeciesSet when it has
+    a [CachedSpeciesSet] section, otherwise neat's DefaultSpeciesSet.
+    """
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    return CachedSpeciesSet if parser.has_section(CachedSpeciesSet.__name__) else DefaultSpeciesSet
+
+
+class GeneTable:
+    """
+    Genes of one kind (nodes or connections) of a set of genomes: for every genome
+    its gene columns and values in its own gene order, which is the order
+    genome.distance adds them in, and all the (genome, column) pairs sorted, to
+    find the homologous genes of another genome with a binary search.
+    Columns number the gene keys present in these genomes only, so the table is
+    as large as the genes of the current population.
+    """
+    def __init__(self, encodings, num_values):
+        rows = len(encodings)
+        lengths = [len(ids) for ids, _ in encodings]
+        width = max(lengths + [0])
+        ids = np.concatenate([ids for ids, _ in encodings] + [np.zeros(0, dtype=np.int64)])
+        gene_ids, columns = np.unique(ids, return_inverse=True)
+        self.num_columns = len(gene_ids)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.order = np.full((rows, width), -1, dtype=np.int64)
+        self.ordered_values = np.zeros((num_values, rows, width))
+        starts = np.concatenate([[0], np.cumsum(self.lengths)])
+        genome_rows = np.repeat(np.arange(rows, dtype=np.int64), self.lengths)
+        for row, (_, values) in enumerate(encodings):
+            self.order[row, :lengths[row]] = columns[starts[row]:starts[row + 1]]
+            self.ordered_values[:, row, :lengths[row]] = values
+        keys = genome_rows * max(self.num_columns, 1) + columns
+        sort = np.argsort(keys, kind="stable")
+        # a last key above all the others, so that every binary search lands on a gene
+        self.keys = np.append(keys[sort], rows * max(self.num_columns, 1))
+        values = np.concatenate([values for _, values in encodings] + [np.zeros((num_values, 0))], axis=1)
+        self.values = np.concatenate([values[:, sort], np.zeros((num_values, 1))], axis=1)
+
+    def distances(self, a, b, weight_coefficient, disjoint_coefficient, num_floats):
+        """
+        Gene distance component of genome a[i] against genome b[i], as in
+        DefaultGenome.distance: homologous genes summed in the order of a,
+        disjoint genes, divided by the larger number of genes.
+        The first num_floats values are compared by absolute difference, the
+        others (activation, aggregation, enabled) add 1.0 when they differ.
+        """
+        order = self.order[a]
+        valid = order >= 0
+        query = b[:, None] * max(self.num_columns, 1) + np.where(valid, order, 0)
+        found = np.searchsorted(self.keys, query)
+        homologous = valid & (self.keys[found] == query)
+        values_a = self.ordered_values[:, a]
+        values_b = self.values[:, found]
+        d = np.abs(values_a[0] - values_b[0])
+        for k in range(1, num_floats):
+            d = d + np.abs(values_a[k] - values_b[k])
+        for k in range(num_floats, len(values_a)):
+            d = np.where(values_a[k] != values_b[k], d + 1.0, d)
+        d = np.where(homologous, d * weight_coefficient, 0.0)
+        # cumulative sum: added one after the other like the loop of genome.distance
+        total = np.cumsum(d, axis=1)[:, -1] if d.shape[1] else np.zeros(len(a))
+
+        disjoint = self.lengths[a] + self.lengths[b] - 2 * homologous.sum(axis=1)
+        largest = np.maximum(self.lengths[a], self.lengths[b])
+        return np.where(largest > 0, (total + disjoint_coefficient * disjoint) / np.maximum(largest, 1), 0.0)
+
+
+class CachedSpeciesSet(DefaultSpeciesSet):
+    """
+    Drop-in replacement of DefaultSpeciesSet giving the same species.
+    speciate() runs the same algorithm, but the genome distances it needs are
+    computed in batches with NumPy from array-encoded gene sets, and kept across
+    generations for the genomes that survive (elites and representatives).
+    Only the genomes of the current population are kept encoded.
+    Genomes are identified by key, since neat never changes a genome after
+    giving it its key. Every distance is bit-for-bit genome.distance.
+    """
+    def __init__(self, config, reporters):
+        super().__init__(config, reporters)
+        self.labels = {}
+        self.encodings = {}
+        self.known = {}
+
+    @classmethod
+    def parse_config(cls, param_dict):
+        return DefaultClassConfig(param_dict, [ConfigParameter('compatibility_threshold', float)])
+
+    def encode(self, genome):
+        """ Gene ids and values of the node and connection genes of a genome, in gene order. """
+        encoding = self.encodings.get(genome.key)
+        if encoding is None:
+            label = lambda name: self.labels.setdefault(name, len(self.labels))
+            node_values = [[n.bias for n in genome.nodes.values()], [n.response for n in genome.nodes.values()],
+                           [label(n.activation) for n in genome.nodes.values()],
+                           [label(n.aggregation) for n in genome.nodes.values()]]
+            # a connection key (in, out) as one integer: node keys are far below 2**31
+            connection_ids = [i * CONNECTION_KEY_BASE + o for i, o in genome.connections]
+            connection_values = [[c.weight for c in genome.connections.values()],
+                                 [float(c.enabled) for c in genome.connections.values()]]
+            encoding = ((np.fromiter(genome.nodes, dtype=np.int64, count=len(genome.nodes)),
+                         np.asarray(node_values).reshape(4, -1)),
+                        (np.asarray(connection_ids, dtype=np.int64).reshape(-1),
+                         np.asarray(connection_values).reshape(2, -1)))
+            self.encodings[genome.key] = encoding
+        return encoding
+
+    def tables(self, genomes):
+        """ Row of every genome key, and the GeneTable of nodes and of connections of the genomes. """
+        keys = list(genomes)
+        encodings = [self.encode(genomes[key]) for key in keys]
+        return ({key: row for row, key in enumerate(keys)},
+                GeneTable([e[0] for e in encodings], 4),
+                GeneTable([e[1] for e in encodings], 2))
+
+    def prefetch(self, genome_config, tables, firsts, seconds):
+        """ Computes first.distance(second) for every pair of keys not known yet. """
+        pairs = [(g0, g1) for g0 in firsts for g1 in seconds if (g0, g1) not in self.known]
+        if not pairs:
+            return
+        rows, nodes, connections = tables
+        width = max(nodes.order.shape[1] + connections.order.shape[1], 1)
+        chunk = max(1, MAX_BATCH_ELEMENTS // width)
+        for start in range(0, len(pairs), chunk):
+            block = pairs[start:start + chunk]
+            a = np.array([rows[g0] for g0, _ in block], dtype=np.int64)
+            b = np.array([rows[g1] for _, g1 in block], dtype=np.int64)
+            coefficients = (genome_config.compatibility_weight_coefficient,
+                            genome_config.compatibility_disjoint_coefficient)
+            distance = nodes.distances(a, b, *coefficients, 2) + connections.distances(a, b, *coefficients, 1)
+            self.known.update(zip(block, distance.tolist()))
+
+    def speciate(self, config, population, generation):
+        """ Same as DefaultSpeciesSet.speciate, with the distances computed ahead in batches. """
+        assert isinstance(population, dict)
+
+        compatibility_threshold = self.species_set_config.compatibility_threshold
+        genome_config = config.genome_config
+        genomes = dict(population)
+        for s in self.species.values():
+            genomes[s.representative.key] = s.representative
+        tables = self.tables(genomes)
+        distances = KnownDistances(self.known)
+
+        # Find the best representatives for each existing species.
+        # (built from the keys like neat does: set.pop() order depends on how the set was built)
+        unspeciated = set(population.keys())
+        self.prefetch(genome_config, tables, [s.representative.key for s in self.species.values()], unspeciated)
+        new_representatives = {}
+        new_members = {}
+        for sid, s in self.species.items():
+            candidates = []
+            for gid in unspeciated:
+                g = population[gid]
+                d = distances(s.representative, g)
+                candidates.append((d, g))
+
+            # The new representative is the genome closest to the current representative.
+            ignored_rdist, new_rep = min(candidates, key=lambda x: x[0])
+            new_rid = new_rep.key
+            new_representatives[sid] = new_rid
+            new_members[sid] = [new_rid]
+            unspeciated.remove(new_rid)
+
+        # Partition population into species based on genetic similarity.
+        self.prefetch(genome_config, tables, new_representatives.values(), unspeciated)
+        while unspeciated:
+            gid = unspeciated.pop()
+            g = population[gid]
+
+            # Find the species with the most similar representative.
+            candidates = []
+            for sid, rid in new_representatives.items():
+                rep = population[rid]
+                d = distances(rep, g)
+                if d < compatibility_threshold:
+                    candidates.append((d, sid))
+
+            if candidates:
+                ignored_sdist, sid = min(candidates, key=lambda x: x[0])
+                new_members[sid].append(gid)
+            else:
+                # No species is similar enough, create a new species, using
+                # this genome as its representative.
+                sid = next(self.indexer)
+                new_representatives[sid] = gid
+                new_members[sid] = [gid]
+                self.prefetch(genome_config, tables, [gid], unspeciated)
+
+        # Update species collection based on new speciation.
+        self.genome_to_species = {}
+        for sid, rid in new_representatives.items():
+            s = self.species.get(sid)
+            if s is None:
+                s = Species(sid, generation)
+                self.species[sid] = s
+
+            members = new_members[sid]
+            for gid in members:
+                self.genome_to_species[gid] = sid
+
+            member_dict = dict((gid, population[gid]) for gid in members)
+            s.update(population[rid], member_dict)
+
+        # Only the genomes of this population can be used again (as representatives or elites)
+        self.known = {pair: d for pair, d in self.known.items() if pair[0] in population and pair[1] in population}
+        self.encodings = {key: e for key, e in self.encodings.items() if key in population}
+
+        gdmean = mean(distances.distances.values())
+        gdstdev = stdev(distances.distances.values())
+        self.reporters.info(
+            'Mean genetic distance {0:.3f}, standard deviation {1:.3f}'.format(gdmean, gdstdev))
+
+
+class KnownDistances(GenomeDistanceCache):
+    """
+    GenomeDistanceCache reading the distances prefetched by CachedSpeciesSet:
+    it records the same pairs, so the reported mean genetic distance does not change.
+    """
+    def __init__(self, known):
+        super().__init__(None)
+        self.known = known
+
+    def __call__(self, genome0, genome1):
+        g0 = genome0.key
+        g1 = genome1.key
+        d = self.distances.get((g0, g1))
+        if d is None:
+            d = self.known[g0, g1]
+            self.distances[g0, g1] = d
+            self.distances[g1, g0] = d
+            self.misses += 1
+        else:
+            self.hits += 1
+        return d
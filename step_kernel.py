@@ -0,0 +1,207 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import math
+
+PI = math.pi
+TWO_PI = 2 * math.pi
+# Below this magnitude every subtraction of 2*pi done by the normalization loop
+# is exact, so the loop result equals the exact remainder computed in closed form
+EXACT_WRAP_LIMIT = 8 + TWO_PI
+
+
+def wrap_angle(angle):
+    """
+    Normalize angle to the range [-pi, pi], with exactly the same result as
+    the loops `while angle > pi: angle -= 2*pi` / `while angle < -pi: angle += 2*pi`.
+    """
+    if -math.pi <= angle <= math.pi:
+        return angle
+    if -EXACT_WRAP_LIMIT < angle < EXACT_WRAP_LIMIT:
+        wrapped = math.remainder(angle, TWO_PI)
+        # remainder breaks ties to even, the loops stop on the first bound they reach
+        if wrapped == -math.pi and angle > 0:
+            return math.pi
+        if wrapped == math.pi and angle < 0:
+            return -math.pi
+        return wrapped
+    # several turns away: keep the rounding of the step-by-step subtraction
+    while angle > math.pi:
+        angle -= TWO_PI
+    while angle < -math.pi:
+        angle += TWO_PI
+    return angle
+
+
+class StepKernel:
+    """
+    Fused per-step routine for a 1v1 arena.
+    The pairwise geometry (distance and the two bearings) is computed once for the
+    current positions and shared by the sensors of both robots and by the hit tests.
+    Positions are tracked by identity: Arena.keep_inside leaves an unclamped
+    coordinate untouched, so the geometry of the hit tests is reused by the sensors
+    of the next step unless a robot was pushed back inside the walls.
+    Sensor vectors are written into two preallocated buffers.
+    """
+    def __init__(self, arena):
+        self.arena = arena
+        self.robot1, self.robot2 = arena.robots
+        self.max_dist = math.hypot(arena.width, arena.height)
+        self.sensors1 = [0.0] * 7
+        self.sensors2 = [0.0] * 7
+        self._positions = None
+        self._geometry = None
+
+    @staticmethod
+    def for_arena(arena):
+        """ Kernel attached to a 1v1 arena, or None if the arena does not hold exactly two robots. """
+        robots = arena.robots
+        if len(robots) != 2:
+            return None
+        kernel = arena.__dict__.get("_kernel")
+        if kernel is None or kernel.robot1 is not robots[0] or kernel.robot2 is not robots[1]:
+            kernel = StepKernel(arena)
+            arena._kernel = kernel
+        return kernel
+
+    def geometry(self):
+        """
+        Returns (distance, bearing from robot1 to robot2, bearing from robot2 to robot1).
+        """
+        r1 = self.robot1
+        r2 = self.robot2
+        positions = self._positions
+        if (positions is None or positions[0] is not r1.x or positions[1] is not r1.y
+                or positions[2] is not r2.x or positions[3] is not r2.y):
+            dx = r2.x - r1.x
+            dy = r2.y - r1.y
+            # the reverse differences are computed too: negating would flip the sign of zero
+            self._geometry = (math.hypot(dx, dy), math.atan2(dy, dx), math.atan2(r1.y - r2.y, r1.x - r2.x))
+            self._positions = (r1.x, r1.y, r2.x, r2.y)
+        return self._geometry
+
+    def sensors(self, robot):
+        """ Same values as Sensors.get, written into the robot's sensor buffer. """
+        distance, bearing12, bearing21 = self.geometry()
+        if robot is self.robot1:
+            buffer = self.sensors1
+            bearing = bearing12
+        else:
+            buffer = self.sensors2
+            bearing = bearing21
+        width = self.arena.width
+        height = self.arena.height
+        buffer[0] = distance / self.max_dist
+        buffer[1] = wrap_angle(bearing - robot.angle) / math.pi
+        buffer[2] = robot.health / robot.max_health
+        buffer[3] = robot.x / width
+        buffer[4] = (width - robot.x) / width
+        buffer[5] = robot.y / height
+        buffer[6] = (height - robot.y) / height
+        return buffer
+
+    def apply_damage(self):
+        """ Same rules as Arena.apply_damage, sharing the pairwise geometry. """
+        r1 = self.robot1
+        r2 = self.robot2
+        action1 = getattr(r1, "last_action", None)
+        action2 = getattr(r2, "last_action", None)
+        shoots1 = action1 is not None and action1[2] > 0.5
+        shoots2 = action2 is not None and action2[2] > 0.5
+        if not (shoots1 or shoots2):
+            return
+        distance, bearing12, bearing21 = self.geometry()
+        if shoots1:
+            self._hit(r1, r2, distance, bearing12)
+        if shoots2:
+            self._hit(r2, r1, distance, bearing21)
+
+    def _hit(self, shooter, target, distance, bearing):
+        arena = self.arena
+        angle_diff = abs(wrap_angle(shooter.angle - bearing))
+        if distance <= arena.SHOOT_RANGE and angle_diff <= arena.SHOOT_ANGLE:
+            target.health -= arena.DAMAGE
+            shooter.damage_inflicted += arena.DAMAGE
+
+    def battle_step(self, controller1, controller2):
+        """
+        One step of utils.simulate_battle: both robots sense, then act, then
+        damage and wall clamping are applied. Returns the two actions.
+        Same computations as sensors(), apply_damage() and Arena.keep_inside,
+        written inline because this is the innermost loop of every battle.
+        """
+        r1 = self.robot1
+        r2 = self.robot2
+        arena = self.arena
+        width = arena.width
+        height = arena.height
+
+        distance, bearing12, bearing21 = self.geometry()
+        s1 = self.sensors1
+        s2 = self.sensors2
+        s1[0] = s2[0] = distance / self.max_dist
+        angle = bearing12 - r1.angle
+        if not -PI <= angle <= PI:
+            angle = wrap_angle(angle)
+        s1[1] = angle / PI
+        angle = bearing21 - r2.angle
+        if not -PI <= angle <= PI:
+            angle = wrap_angle(angle)
+        s2[1] = angle / PI
+        for robot, buffer in ((r1, s1), (r2, s2)):
+            buffer[2] = robot.health / robot.max_health
+            buffer[3] = robot.x / width
+            buffer[4] = (width - robot.x) / width
+            buffer[5] = robot.y / height
+            buffer[6] = (height - robot.y) / height
+
+        return self.act(controller1.activate(s1), controller2.activate(s2))
+
+    def act(self, action1, action2):
+        """
+        Second half of battle_step: both robots apply their actions, then damage
+        and wall clamping. Called alone when actions are repeated without querying
+        the controllers (see utils.action_repeat). Returns the two actions.
+        """
+        r1 = self.robot1
+        r2 = self.robot2
+        arena = self.arena
+        width = arena.width
+        height = arena.height
+        r1.apply_action(action1)
+        r2.apply_action(action2)
+
+        shoots1 = action1[2] > 0.5
+        shoots2 = action2[2] > 0.5
+        if shoots1 or shoots2:
+            distance, bearing12, bearing21 = self.geometry()
+            if distance <= arena.SHOOT_RANGE:
+                if shoots1 and abs(wrap_angle(r1.angle - bearing12)) <= arena.SHOOT_ANGLE:
+                    r2.health -= arena.DAMAGE
+                    r1.damage_inflicted += arena.DAMAGE
+                if shoots2 and abs(wrap_angle(r2.angle - bearing21)) <= arena.SHOOT_ANGLE:
+                    r1.health -= arena.DAMAGE
+                    r2.damage_inflicted += arena.DAMAGE
+
+        # max(0, min(v, limit)) only rebinds a coordinate that leaves the arena
+        for robot in (r1, r2):
+            if width < robot.x:
+                robot.x = width
+            if not robot.x > 0:
+                robot.x = 0
+            if height < robot.y:
+                robot.y = height
+            if not robot.y > 0:
+                robot.y = 0
+        return action1, action2
+
+    def step(self):
+        """
+        One step of Arena.step: each robot senses and acts in turn, using its own controller.
+        """
+        for robot in (self.robot1, self.robot2):
+            robot.apply_action(robot.controller.activate(self.sensors(robot)))
+        self.apply_damage()
+        self.arena.keep_inside(self.robot1)
+        self.arena.keep_inside(self.robot2)
@@ -0,0 +1,208 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+"""
+Runs a grid of experiments, each one a main.py run in its own directory.
+
+    python sweep.py --out sweeps/elitism --pop-size 20 50 --elitism 2 4 --generations 300 --seeds 0 1 2
+
+Every combination gets a directory like pop_50_gen_300_elit_4_selit_2_seed_0 with its
+own neat_config.txt, fitness_history.csv, checkpoint, best_robot.pkl and run.log.
+Runs are started as soon as enough cores of the budget are free (each run uses
+--workers-per-run of them). manifest.json in the output directory records the
+parameters and the state of every run. Running the same command again skips the
+finished runs and continues the unfinished ones from their checkpoint.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MAIN_PATH = os.path.join(ROOT, "main.py")
+BASE_CONFIG = os.path.join(ROOT, "neat_config.txt")
+MANIFEST_FILE = "manifest.json"
+CHECKPOINT_FILE = "checkpoint.pkl.gz"
+
+# Grid parameters: name in the run directory and where the value goes
+# (a neat_config.txt section and key, or None for the main.py arguments)
+PARAMETERS = (
+    ("pop_size", "pop", ("NEAT", "pop_size")),
+    ("generations", "gen", None),
+    ("elitism", "elit", ("DefaultReproduction", "elitism")),
+    ("species_elitism", "selit", ("DefaultStagnation", "species_elitism")),
+    ("seed", "seed", None),
+)
+
+
+def expand_grid(grid):
+    """ All combinations of a {parameter: [values]} grid, as a list of {parameter: value}. """
+    names = [name for name, _, _ in PARAMETERS]
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_name(params):
+    """ Directory name of a run, e.g. pop_50_gen_300_elit_4_selit_2_seed_0. """
+    return "_".join(f"{short}_{params[name]}" for name, short, _ in PARAMETERS)
+
+
+def override_config(text, overrides):
+    """
+    Replaces "key = value" lines of a NEAT config text.
+    overrides maps (section, key) to the new value; comments and layout are kept.
+    """
+    lines = text.splitlines(keepends=True)
+    section = None
+    missing = set(overrides)
+    for i, line in enumerate(lines):
+        header = re.match(r"\s*\[(.+)\]", line)
+        if header:
+            section = header.group(1).strip()
+            continue
+        match = re.match(r"(\s*)(\w+)(\s*=\s*)", line)
+        if match and (section, match.group(2)) in overrides:
+            lines[i] = f"{match.group(1)}{match.group(2)}{match.group(3)}{overrides[(section, match.group(2))]}\n"
+            missing.discard((section, match.group(2)))
+    if missing:
+        raise ValueError(f"Keys not found in the config: {sorted(missing)}")
+    return "".join(lines)
+
+
+def write_config(run_dir, params, base_config=BASE_CONFIG):
+    overrides = {location: params[name] for name, _, location in PARAMETERS if location is not None}
+    with open(base_config) as f:
+        text = override_config(f.read(), overrides)
+    with open(os.path.join(run_dir, "neat_config.txt"), "w") as f:
+        f.write(text)
+
+
+class Sweep:
+    """
+    Schedules the runs of a grid on a budget of cores.
+    A run is finished when main.py exits with status 0; interrupted or failed
+    runs are started again (from their checkpoint, if they saved one).
+    """
+    def __init__(self, out_dir, grid, cores, workers_per_run=1, extra_args=(), poll_interval=1.0):
+        self.out_dir = out_dir
+        self.cores = max(1, cores)
+        self.workers_per_run = max(1, min(workers_per_run, self.cores))
+        self.extra_args = list(extra_args)
+        self.poll_interval = poll_interval
+        self.manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+        os.makedirs(out_dir, exist_ok=True)
+
+        previous = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                previous = {run["name"]: run for run in json.load(f)["runs"]}
+        self.runs = []
+        for params in expand_grid(grid):
+            name = run_name(params)
+            run = previous.get(name, {"name": name, "params": params, "status": "pending"})
+            if run["status"] == "running":
+                # the sweep that started it was interrupted
+                run["status"] = "interrupted"
+            self.runs.append(run)
+        self.save_manifest()
+
+    def save_manifest(self):
+        manifest = {"updated": datetime.now().isoformat(timespec="seconds"), "cores": self.cores,
+                    "workers_per_run": self.workers_per_run, "runs": self.runs}
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def command(self, run, resume):
+        params = run["params"]
+        command = [sys.executable, MAIN_PATH, "--generations", str(params["generations"]),
+                   "--seed", str(params["seed"]), "--workers", str(self.workers_per_run),
+                   "--checkpoint", CHECKPOINT_FILE] + self.extra_args
+        if resume:
+            command.append("--resume")
+        return command
+
+    def start(self, run):
+        run_dir = os.path.join(self.out_dir, run["name"])
+        os.makedirs(run_dir, exist_ok=True)
+        resume = os.path.exists(os.path.join(run_dir, CHECKPOINT_FILE))
+        if not resume:
+            write_config(run_dir, run["params"])
+        command = self.command(run, resume)
+        with open(os.path.join(run_dir, "run.log"), "a") as log:
+            process = subprocess.Popen(command, cwd=run_dir, stdout=log, stderr=subprocess.STDOUT)
+        run.update(status="running", resumed=resume, command=command,
+                   started=datetime.now().isoformat(timespec="seconds"))
+        print(f"Started {run['name']}" + (" (resumed)" if resume else ""))
+        return process
+
+    def run(self):
+        """ Runs every unfinished run of the grid; returns the number of failed runs. """
+        queue = [run for run in self.runs if run["status"] != "done"]
+        print(f"{len(self.runs) - len(queue)} of {len(self.runs)} runs already done, "
+              f"{self.cores // self.workers_per_run} at a time")
+        running = {}
+        try:
+            while queue or running:
+                while queue and (len(running) + 1) * self.workers_per_run <= self.cores:
+                    run = queue.pop(0)
+                    running[run["name"]] = (run, self.start(run), time.time())
+                    self.save_manifest()
+                for name, (run, process, started) in list(running.items()):
+                    returncode = process.poll()
+                    if returncode is None:
+                        continue
+                    del running[name]
+                    run.update(status="done" if returncode == 0 else "failed", returncode=returncode,
+                               finished=datetime.now().isoformat(timespec="seconds"),
+                               seconds=round(time.time() - started, 1))
+                    print(f"Finished {name}: {run['status']} ({run['seconds']:.0f}s)")
+                    self.save_manifest()
+                if running:
+                    time.sleep(self.poll_interval)
+        finally:
+            # on interruption the runs stop too and are resumed next time
+            for run, process, _ in running.values():
+                process.terminate()
+                process.wait()
+                run["status"] = "interrupted"
+            self.save_manifest()
+        return sum(1 for run in self.runs if run["status"] == "failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a grid of experiments across all cores")
+    parser.add_argument("--out", default="sweeps", help="Output directory of the sweep (default: sweeps)")
+    parser.add_argument("--pop-size", type=int, nargs="+", default=[50], help="Population sizes")
+    parser.add_argument("--generations", type=int, nargs="+", default=[300], help="Numbers of generations")
+    parser.add_argument("--elitism", type=int, nargs="+", default=[2], help="Elitism values")
+    parser.add_argument("--species-elitism", type=int, nargs="+", default=[2], help="Species elitism values")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="Run seeds")
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1,
+                        help="Cores shared by all runs (default: all)")
+    parser.add_argument("--workers-per-run", type=int, default=1,
+                        help="Worker processes of each run (default: 1, so cores runs at a time)")
+    args, extra_args = parser.parse_known_args()
+
+    grid = {"pop_size": args.pop_size, "generations": args.generations, "elitism": args.elitism,
+            "species_elitism": args.species_elitism, "seed": args.seeds}
+    # unknown options (e.g. --batch-engine, --early-stop exact) are passed to every main.py run
+    sweep = Sweep(args.out, grid, args.cores, args.workers_per_run, extra_args)
+    try:
+        failed = sweep.run()
+    except KeyboardInterrupt:
+        print("\nSweep interrupted, run the same command again to continue it")
+        return 1
+    print(f"Manifest written to {sweep.manifest_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import json
+import os
+import numpy as np
+
+# One raw little-endian file per column, so every column can be memory-mapped on its own.
+# Rows are appended in generation order, so the generation column is sorted.
+COLUMNS = (
+    ("generation", "<i4"),
+    ("genome1", "<i8"),
+    ("genome2", "<i8"),   # genome id of the opponent, archived genome key for HallOfFame, -1 for scripted bots
+    ("opponent", "u1"),   # index into OPPONENT_TYPES
+    ("f1", "<f8"),
+    ("f2", "<f8"),
+    ("steps", "<i4"),     # -1 for results served by the match cache
+    ("damage1", "<i4"),
+    ("damage2", "<i4"),
+)
+OPPONENT_TYPES = ("Genome", "HallOfFame", "Random", "Static", "Chaser")
+SCHEMA_FILE = "schema.json"
+
+
+def column_path(directory, name):
+    return os.path.join(directory, name + ".bin")
+
+
+class TelemetryWriter:
+    """
+    Append-only columnar store with one record per match.
+    Records are collected in fixed-size NumPy buffers and written to the column
+    files (kept open for the whole run) only when the buffers are full or on flush(),
+    so memory use does not grow with the length of the run.
+    Records of generation >= start_generation already in the directory (left by an
+    earlier run, or played after the checkpoint a run is resumed from) are dropped,
+    so the generation column stays sorted.
+    """
+    def __init__(self, directory, buffer_rows=65536, start_generation=0):
+        self.directory = directory
+        self.buffer_rows = buffer_rows
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, SCHEMA_FILE), "w") as f:
+            json.dump({"columns": [list(c) for c in COLUMNS], "opponent_types": list(OPPONENT_TYPES)}, f, indent=2)
+        self.buffers = {name: np.empty(buffer_rows, dtype=dtype) for name, dtype in COLUMNS}
+        self.buffered = 0
+        self.files = {name: open(column_path(directory, name), "ab") for name, _ in COLUMNS}
+        self.truncate(start_generation)
+
+    def append(self, generation, genome1, genome2, opponent, f1, f2, steps, damage1, damage2):
+        """
+        Appends a block of matches of one generation.
+        All arguments except generation are sequences of the same length;
+        opponent holds names from OPPONENT_TYPES.
+        """
+        values = {"genome1": genome1, "genome2": genome2, "opponent": [OPPONENT_TYPES.index(o) for o in opponent],
+                  "f1": f1, "f2": f2, "steps": steps, "damage1": damage1, "damage2": damage2}
+        count = len(genome1)
+        start = 0
+        while start < count:
+            if self.buffered == self.buffer_rows:
+                self.flush()
+            n = min(count - start, self.buffer_rows - self.buffered)
+            rows = slice(self.buffered, self.buffered + n)
+            self.buffers["generation"][rows] = generation
+            for name, column in values.items():
+                self.buffers[name][rows] = column[start:start + n]
+            self.buffered += n
+            start += n
+
+    def flush(self):
+        """ Writes the buffered records to the column files. """
+        if self.buffered:
+            for name, _ in COLUMNS:
+                self.files[name].write(self.buffers[name][:self.buffered].tobytes())
+            self.buffered = 0
+        for f in self.files.values():
+            f.flush()
+
+    def truncate(self, generation):
+        """ Drops the records of generation >= generation, e.g. when resuming from a checkpoint. """
+        self.flush()
+        generations = TelemetryTable(self.directory).columns["generation"]
+        rows = int(np.searchsorted(generations, generation, side="left"))
+        del generations
+        for name, dtype in COLUMNS:
+            self.files[name].truncate(rows * np.dtype(dtype).itemsize)
+
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+
+
+class TelemetryTable:
+    """
+    Read-only view of a telemetry directory: every column is memory-mapped,
+    so only the pages that are actually read are loaded.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.columns = {}
+        for name, dtype in COLUMNS:
+            path = column_path(directory, name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            rows = size // np.dtype(dtype).itemsize
+            if rows == 0:
+                self.columns[name] = np.empty(0, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+        self.num_rows = min(len(column) for column in self.columns.values())
+
+    def __len__(self):
+        return self.num_rows
+
+    def rows(self, first_generation, last_generation=None):
+        """
+        Records of generations first_generation..last_generation (inclusive), as a dict of
+        column views. The generation column is sorted, so this is a binary search.
+        """
+        if last_generation is None:
+            last_generation = first_generation
+        generations = self.columns["generation"][:self.num_rows]
+        start = int(np.searchsorted(generations, first_generation, side="left"))
+        stop = int(np.searchsorted(generations, last_generation, side="right"))
+        return {name: column[start:stop] for name, column in self.columns.items()}
+
+    @staticmethod
+    def opponent_code(opponent_type):
+        return OPPONENT_TYPES.index(opponent_type)
@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from test_utils import load_config, make_genomes
+
+
+class Held:
+    """ Queries the controller every k calls and returns the last action in between. """
+    def __init__(self, controller, k):
+        self.controller = controller
+        self.k = k
+        self.calls = 0
+        self.action = None
+
+    def activate(self, inputs):
+        if self.calls % self.k == 0:
+            self.action = self.controller.activate(inputs)
+        self.calls += 1
+        return self.action
+
+
+class Counting:
+    def __init__(self, controller):
+        self.controller = controller
+        self.calls = 0
+
+    def activate(self, inputs):
+        self.calls += 1
+        return self.controller.activate(inputs)
+
+
+class TestActionRepeat(unittest.TestCase):
+    def setUp(self):
+        config = load_config(pop_size=8)
+        self.nets = [neat.nn.FeedForwardNetwork.create(g, config) for _, g in make_genomes(config)]
+
+    def build_pairs(self):
+        pairs = [(n1, n2) for n1 in self.nets for n2 in self.nets if n1 is not n2]
+        pairs += [(net, utils.make_opponent(t, 7)) for net in self.nets for t in ("Random", "Static", "Chaser")]
+        return pairs
+
+    def test_same_as_holding_the_actions(self):
+        # Movement, damage and clamping still run every step: the battle is the same
+        # as one played every step by controllers that hold their action for k steps
+        for k in (2, 3):
+            held = [utils.simulate_battle(Held(n1, k), Held(n2, k)) for n1, n2 in self.build_pairs()]
+            with patch('utils.action_repeat', k):
+                repeated = [utils.simulate_battle(n1, n2) for n1, n2 in self.build_pairs()]
+            self.assertEqual(repeated, held)
+
+    def test_controllers_queried_every_k_steps(self):
+        net1 = Counting(self.nets[0])
+        net2 = Counting(utils.make_opponent("Static"))
+        stats = {}
+        utils.simulate_battle(net1, net2, stats, repeat=4)
+        self.assertEqual(net1.calls, (stats["steps"] + 3) // 4)
+        self.assertEqual(net2.calls, net1.calls)
+
+    def test_exact_early_stop_keeps_fitness(self):
+        with patch('utils.action_repeat', 3):
+            expected = [utils.simulate_battle(n1, n2) for n1, n2 in self.build_pairs()]
+            with patch('utils.early_stop_mode', "exact"):
+                stopped = [utils.simulate_battle(n1, n2) for n1, n2 in self.build_pairs()]
+        self.assertEqual(stopped, expected)
+
+    def test_batch_engine_matches_serial(self):
+        for mode in (None, "exact", "stall"):
+            with patch('utils.action_repeat', 3), patch('utils.early_stop_mode', mode), \
+                    patch('utils.early_stop_steps', 5):
+                scalar_stats = []
+                scalar = []
+                for n1, n2 in self.build_pairs():
+                    battle_stats = {}
+                    scalar.append(utils.simulate_battle(n1, n2, battle_stats))
+                    scalar_stats.append(battle_stats)
+                batch_stats = []
+                batch = utils.simulate_battles(self.build_pairs(), batch_stats)
+            self.assertEqual(batch, scalar)
+            self.assertEqual(batch_stats, scalar_stats)
+
+    def test_final_test_repeat(self):
+        winner = Counting(self.nets[0])
+        results = utils.test_best_genome_against_random_opponents(winner, num_tests=5, repeat=5)
+        self.assertEqual(len(results), 5)
+        self.assertLessEqual(winner.calls, 5 * utils.MAX_STEPS // 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
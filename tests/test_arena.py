@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock
 import math
+import random
 import sys
 import os
 
@@ -92,6 +93,47 @@ class TestArena(unittest.TestCase):
         
         self.assertEqual(self.robot2.health, initial_health)
 
+    def test_many_robots_damage_matches_all_pairs(self):
+        rng = random.Random(0)
+        robots = [Robot(self.mock_controller, start_pos=(rng.uniform(0, 1), rng.uniform(0, 1)))
+                  for _ in range(64)]
+        for robot in robots:
+            robot.angle = rng.uniform(-math.pi, math.pi)
+            robot.last_action = (0, 0, rng.random())
+        reference = Arena(robots=[Robot(None, start_pos=(r.x, r.y)) for r in robots])
+        for copy, robot in zip(reference.robots, robots):
+            copy.angle = robot.angle
+            copy.last_action = robot.last_action
+
+        Arena(robots=robots).apply_damage()
+        for shooter in reference.robots:
+            if shooter.last_action[2] > 0.5:
+                for target in reference.robots:
+                    if target is not shooter:
+                        reference._check_and_apply_hit(shooter, target)
+        self.assertEqual([r.health for r in robots], [r.health for r in reference.robots])
+        self.assertEqual([r.damage_inflicted for r in robots], [r.damage_inflicted for r in reference.robots])
+        self.assertTrue(any(r.damage_inflicted for r in robots))
+
+    def test_teammates_are_not_hit_or_sensed(self):
+        shooter = Robot(self.mock_controller, start_pos=(0.2, 0.5), team="a")
+        teammate = Robot(self.mock_controller, start_pos=(0.3, 0.5), team="a")
+        enemy = Robot(self.mock_controller, start_pos=(0.35, 0.5), team="b")
+        arena = Arena(robots=[shooter, teammate, enemy])
+        shooter.last_action = (0, 0, 1.0)
+        arena.apply_damage()
+        self.assertEqual(teammate.health, teammate.max_health)
+        self.assertEqual(enemy.health, enemy.max_health - arena.DAMAGE)
+        # the sensors see the enemy, not the closer teammate
+        self.assertAlmostEqual(arena.get_sensors(shooter)[0], 0.15 / math.hypot(1.0, 1.0))
+
+    def test_is_done_when_one_side_is_left(self):
+        robots = [Robot(self.mock_controller, team=team) for team in ("a", "a", "b")]
+        arena = Arena(robots=robots)
+        self.assertFalse(arena.is_done())
+        robots[2].health = 0
+        self.assertTrue(arena.is_done())
+
     def test_normalize_angle(self):
         self.assertAlmostEqual(self.arena.normalize_angle(math.pi + 0.1), -math.pi + 0.1)
         self.assertAlmostEqual(self.arena.normalize_angle(-math.pi - 0.1), math.pi - 0.1)
@@ -0,0 +1,91 @@
+import unittest
+import math
+import sys
+import os
+
+import neat
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from batch_arena import BatchArena, normalize_angles, simulate_battles, controller_actions
+from compiled_network import CompiledNetwork
+from arena import Arena
+from test_utils import load_config, make_genomes, evaluate_fitness
+
+
+class TestBatchArena(unittest.TestCase):
+    def test_normalize_angles_matches_arena(self):
+        arena = Arena()
+        angles = [0.0, math.pi + 0.1, -math.pi - 0.1, 25.0, -40.0, 3 * math.pi]
+        expected = [arena.normalize_angle(a) for a in angles]
+        self.assertEqual(normalize_angles(angles).tolist(), expected)
+
+    def test_initial_state(self):
+        arena = BatchArena(3)
+        self.assertEqual(arena.x.shape, (2, 3))
+        self.assertTrue(arena.alive.all())
+        self.assertEqual(arena.health.tolist(), [[100] * 3, [100] * 3])
+
+    def test_matches_simulate_battle(self):
+        config = load_config(pop_size=6)
+        genomes = make_genomes(config)
+        nets = [neat.nn.FeedForwardNetwork.create(g, config) for _, g in genomes]
+
+        # Random opponents keep state, so both runs get freshly built pairs
+        def build():
+            built = []
+            for i in range(len(nets)):
+                for j in range(len(nets)):
+                    if i != j:
+                        built.append((nets[i], nets[j]))
+                built.append((nets[i], utils.make_opponent("Static")))
+                built.append((nets[i], utils.make_opponent("Chaser")))
+            for seed in range(4):
+                built.append((nets[seed], utils.make_opponent("Random", seed)))
+                built.append((utils.make_opponent("Chaser"), utils.make_opponent("Random", seed)))
+            return built
+
+        expected = [utils.simulate_battle(net1, net2) for net1, net2 in build()]
+        pairs = build()
+        fitness1, fitness2 = simulate_battles([p[0] for p in pairs], [p[1] for p in pairs], max_steps=utils.MAX_STEPS)
+        self.assertEqual(list(zip(fitness1.tolist(), fitness2.tolist())), expected)
+
+        # np.hypot and np.arctan2 (used with matrix networks) agree within float tolerance
+        pairs = build()
+        fitness1, fitness2 = simulate_battles([p[0] for p in pairs], [p[1] for p in pairs], max_steps=utils.MAX_STEPS,
+                                              exact=False)
+        np.testing.assert_allclose(np.stack([fitness1, fitness2], axis=1), expected, rtol=1e-9)
+
+    def test_compiled_networks_are_stacked(self):
+        config = load_config(pop_size=4)
+        nets = [neat.nn.FeedForwardNetwork.create(g, config) for _, g in make_genomes(config)]
+        compiled = [CompiledNetwork.from_network(net) for net in nets]
+        scripted = utils.make_opponent("Chaser")
+
+        arena = BatchArena(4)
+        idx = np.arange(4)
+        sensors = arena.get_sensors(idx)
+        actions = controller_actions(compiled, [compiled[1], compiled[0], scripted, compiled[3]])(idx, sensors)
+
+        np.testing.assert_allclose(actions[0, 2], nets[2].activate(sensors[0, 2].tolist()), rtol=1e-12)
+        np.testing.assert_allclose(actions[1, 0], nets[1].activate(sensors[1, 0].tolist()), rtol=1e-12)
+        self.assertEqual(actions[1, 2].tolist(), [float(a) for a in scripted.activate(sensors[1, 2].tolist())])
+
+    def test_batch_engine_eval_matches_serial(self):
+        config = load_config()
+        genomes = make_genomes(config)
+
+        serial = evaluate_fitness(genomes, config)
+        utils.use_batch_engine = True
+        try:
+            batched = evaluate_fitness(genomes, config)
+        finally:
+            utils.use_batch_engine = False
+        self.assertEqual(serial, batched)
+
+
+if __name__ == '__main__':
+    unittest.main()
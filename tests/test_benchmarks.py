@@ -0,0 +1,25 @@
+import unittest
+import sys
+import os
+
+# Add the benchmarks directory to path to allow importing the suite
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from run_benchmarks import compare_results, bench_robot_apply_action
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_compare_results_flags_slowdowns(self):
+        baseline = {"a": {"seconds_per_op": 1.0}, "b": {"seconds_per_op": 2.0}}
+        results = {"a": {"seconds_per_op": 1.2}, "b": {"seconds_per_op": 3.0}, "new": {"seconds_per_op": 9.0}}
+        self.assertEqual(compare_results(results, baseline, 0.25), [("b", 1.5)])
+        self.assertEqual(compare_results(results, baseline, 0.1), [("a", 1.2), ("b", 1.5)])
+
+    def test_result_entry(self):
+        entry = bench_robot_apply_action(repeat=1)
+        self.assertEqual(entry["unit"], "call")
+        self.assertGreater(entry["ops_per_second"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
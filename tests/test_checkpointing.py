@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import patch
+import random
+import sys
+import os
+import tempfile
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from checkpointing import RunCheckpointer, load_checkpoint, write_atomic
+from test_utils import load_config
+
+
+class TestCheckpointing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "checkpoint.pkl.gz")
+        self.patches = [
+            patch('utils.filename_for_fitness_history', os.path.join(self.tmp.name, "history.csv")),
+            patch('utils.generation_count', 0),
+            patch('builtins.print'),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def new_population(self):
+        random.seed(0)
+        utils.generation_count = 0
+        population = neat.Population(load_config(pop_size=6))
+        population.add_reporter(neat.StatisticsReporter())
+        return population
+
+    def test_write_atomic(self):
+        write_atomic(self.path, b"data")
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"data")
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_resume_gives_identical_results(self):
+        population = self.new_population()
+        winner = population.run(utils.eval_genomes, 3)
+        expected = [(g.key, g.fitness) for g in population.population.values()]
+
+        population = self.new_population()
+        checkpointer = RunCheckpointer(population, self.path, every=2)
+        population.add_reporter(checkpointer)
+        population.run(utils.eval_genomes, 2)
+        checkpointer.wait()
+
+        # scramble the global state, the checkpoint must restore it
+        random.seed(123)
+        utils.generation_count = 99
+        resumed = load_checkpoint(self.path)
+        self.assertEqual(resumed.generation, 2)
+        self.assertEqual(utils.generation_count, 2)
+        resumed_winner = resumed.run(utils.eval_genomes, 1)
+
+        self.assertEqual([(g.key, g.fitness) for g in resumed.population.values()], expected)
+        self.assertEqual(resumed_winner.fitness, winner.fitness)
+
+
+if __name__ == '__main__':
+    unittest.main()
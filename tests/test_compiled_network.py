@@ -0,0 +1,56 @@
+import unittest
+import random
+import sys
+import os
+
+import neat
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiled_network import CompiledNetwork, NetworkStack
+from test_utils import load_config
+
+
+def evolved_genomes(config, generations=5):
+    """Returns genomes with hidden nodes and pruned connections after a few mutations."""
+    random.seed(1)
+    population = neat.Population(config)
+    genomes = list(population.population.values())
+    for genome in genomes:
+        for _ in range(generations):
+            genome.mutate(config.genome_config)
+    return genomes
+
+
+class TestCompiledNetwork(unittest.TestCase):
+    def setUp(self):
+        self.config = load_config(pop_size=10)
+        self.genomes = evolved_genomes(self.config)
+        self.inputs = np.random.default_rng(0).uniform(-1, 1, size=(50, 7))
+
+    def test_matches_feed_forward_network(self):
+        for genome in self.genomes:
+            net = neat.nn.FeedForwardNetwork.create(genome, self.config)
+            compiled = CompiledNetwork.create(genome, self.config)
+            expected = [net.activate(list(row)) for row in self.inputs]
+            np.testing.assert_allclose(compiled.activate_batch(self.inputs), expected, rtol=1e-9, atol=1e-12)
+            self.assertEqual(len(compiled.activate(list(self.inputs[0]))), 3)
+
+    def test_wrong_input_size(self):
+        compiled = CompiledNetwork.create(self.genomes[0], self.config)
+        with self.assertRaises(RuntimeError):
+            compiled.activate([0.0] * 5)
+
+    def test_stack_matches_single_networks(self):
+        compiled = [CompiledNetwork.create(g, self.config) for g in self.genomes]
+        stack = NetworkStack(compiled)
+        network_index = np.arange(len(self.inputs)) % len(compiled)
+        outputs = stack.activate(network_index, self.inputs)
+        for row, g in enumerate(network_index):
+            np.testing.assert_allclose(outputs[row], compiled[g].activate_batch(self.inputs[row:row + 1])[0], rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
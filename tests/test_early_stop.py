@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from arena import Arena
+from robot import Robot
+from early_stop import EarlyStop
+from test_utils import load_config, make_genomes
+
+
+class Idle:
+    def activate(self, _):
+        return (0.0, 0.0, 0.0)
+
+
+class TestEarlyStop(unittest.TestCase):
+    def setUp(self):
+        config = load_config(pop_size=8)
+        self.nets = [neat.nn.FeedForwardNetwork.create(g, config) for _, g in make_genomes(config)]
+
+    def build_pairs(self):
+        pairs = [(n1, n2) for n1 in self.nets for n2 in self.nets if n1 is not n2]
+        pairs += [(net, utils.make_opponent(t, 7)) for net in self.nets for t in ("Random", "Static", "Chaser")]
+        return pairs
+
+    def test_out_of_reach(self):
+        arena = Arena()
+        robot1 = Robot(None, start_pos=(0.0, 0.0))
+        robot2 = Robot(None, start_pos=(1.0, 1.0))
+        early_stop = EarlyStop(300, deterministic=False)
+        self.assertFalse(early_stop.settled(0, robot1, robot2, arena, (0, 0, 0), (0, 0, 0)))
+        self.assertTrue(early_stop.settled(295, robot1, robot2, arena, (0, 0, 0), (0, 0, 0)))
+
+    def test_repeated_state_credits_full_survival(self):
+        stats = {}
+        with patch('utils.early_stop_mode', "exact"):
+            f1, f2 = utils.simulate_battle(Idle(), Idle(), stats)
+        self.assertEqual((f1, f2), utils.simulate_battle(Idle(), Idle()))
+        self.assertEqual(stats["steps"], 2)
+        self.assertEqual(stats["steps_saved"], utils.MAX_STEPS - 2)
+
+    def test_exact_mode_keeps_fitness(self):
+        expected = [utils.simulate_battle(n1, n2) for n1, n2 in self.build_pairs()]
+        stats = []
+        with patch('utils.early_stop_mode', "exact"):
+            for n1, n2 in self.build_pairs():
+                battle_stats = {}
+                stats.append((utils.simulate_battle(n1, n2, battle_stats), battle_stats["steps_saved"]))
+        self.assertEqual([fitness for fitness, _ in stats], expected)
+        self.assertGreater(sum(saved for _, saved in stats), 0)
+
+    def test_batch_engine_stops_the_same_battles(self):
+        for mode in ("exact", "stall"):
+            with patch('utils.early_stop_mode', mode), patch('utils.early_stop_steps', 5):
+                scalar_stats = []
+                scalar = []
+                for n1, n2 in self.build_pairs():
+                    battle_stats = {}
+                    scalar.append(utils.simulate_battle(n1, n2, battle_stats))
+                    scalar_stats.append(battle_stats)
+                batch_stats = []
+                batch = utils.simulate_battles(self.build_pairs(), batch_stats)
+            self.assertEqual(batch, scalar)
+            self.assertEqual(batch_stats, scalar_stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import socket
+import stat
+import sys
+import os
+import tempfile
+import threading
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from eval_server import EvaluationServer, EvaluationClient, listen
+from test_utils import load_config, make_genomes
+
+
+class TestEvalServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = load_config()
+        cls.genomes = [genome for _, genome in make_genomes(cls.config)]
+        cls.nets = [neat.nn.FeedForwardNetwork.create(genome, cls.config) for genome in cls.genomes]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "eval.sock")
+        self.server = EvaluationServer(batch_window=0.2)
+        self.thread = threading.Thread(target=self.server.serve, args=(self.socket_path,), daemon=True)
+        self.thread.start()
+        while self.server.listener is None:
+            self.server.stopped.wait(0.01)
+
+    def tearDown(self):
+        self.server.stop()
+        self.thread.join(timeout=10)
+        self.assertFalse(self.thread.is_alive())
+        self.tmp.cleanup()
+
+    def expected(self, net1, net2, seed=None):
+        if isinstance(net2, str):
+            net2 = utils.make_opponent(net2, seed)
+        return utils.simulate_battle(net1, net2)
+
+    def test_results_match_simulate_battle(self):
+        with EvaluationClient(self.socket_path) as client:
+            results = client.evaluate([
+                {"net1": self.genomes[0], "net2": self.genomes[1]},
+                {"net1": self.nets[2], "net2": "Chaser"},
+                {"net1": self.genomes[3], "net2": "Random", "seed": 7},
+            ])
+            self.assertEqual(results[0]["fitness"], self.expected(self.nets[0], self.nets[1]))
+            self.assertEqual(results[1]["fitness"], self.expected(self.nets[2], "Chaser"))
+            self.assertEqual(results[2]["fitness"], self.expected(self.nets[3], "Random", 7))
+            self.assertGreater(results[0]["steps"], 0)
+
+            # genomes are turned into networks once
+            client.evaluate([{"net1": self.genomes[0], "net2": "Static"}])
+            self.assertEqual(client.ping()["networks_built"], 3)
+
+            with self.assertRaises(ValueError):
+                client.evaluate([{"net1": self.genomes[0], "net2": "Sniper"}])
+            # the server is still serving after a bad request
+            self.assertEqual(len(client.evaluate([{"net1": self.nets[0], "net2": "Static"}])), 1)
+
+    def test_socket_is_private_and_not_taken_over(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+        with self.assertRaises(FileExistsError):
+            EvaluationServer().serve(self.socket_path)
+        # the running server still answers
+        with EvaluationClient(self.socket_path) as client:
+            self.assertEqual(client.ping()["networks_built"], 0)
+
+    def test_stale_socket_is_replaced(self):
+        path = os.path.join(self.tmp.name, "stale.sock")
+        stale = socket.socket(socket.AF_UNIX)
+        stale.bind(path)
+        stale.close()
+        listen(path).close()
+        with open(path + ".txt", "w") as f:
+            f.write("not a socket")
+        with self.assertRaises(FileExistsError):
+            listen(path + ".txt")
+
+    def test_bad_request_does_not_stop_the_batcher(self):
+        broken = neat.genome.DefaultGenome(99)
+        broken.nodes = {0: "not a node gene"}
+        with EvaluationClient(self.socket_path) as client:
+            for bad in ([{"net1": broken, "net2": "Static"}], 5):
+                with self.assertRaises(ValueError):
+                    client.request({"matches": bad})
+            results = client.evaluate([{"net1": self.nets[0], "net2": "Static"}])
+            self.assertEqual(results[0]["fitness"], self.expected(self.nets[0], "Static"))
+
+    def test_concurrent_requests_are_batched(self):
+        clients = [EvaluationClient(self.socket_path) for _ in range(3)]
+        results = [None] * 3
+
+        def evaluate(i):
+            results[i] = clients[i].evaluate([{"net1": self.nets[i], "net2": "Chaser"},
+                                              {"net1": self.nets[i], "net2": self.nets[i + 1]}])
+        threads = [threading.Thread(target=evaluate, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i in range(3):
+            self.assertEqual(results[i][0]["fitness"], self.expected(self.nets[i], "Chaser"))
+            self.assertEqual(results[i][1]["fitness"], self.expected(self.nets[i], self.nets[i + 1]))
+        stats = clients[0].ping()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["matches"], 6)
+        self.assertLess(stats["batches"], 3)
+        for client in clients:
+            client.close()
+
+    def test_stdio_server(self):
+        client = EvaluationClient.spawn("--batch-window", "0")
+        try:
+            results = client.evaluate([{"net1": self.genomes[0], "net2": "Static"}])
+            self.assertEqual(results[0]["fitness"], self.expected(self.nets[0], "Static"))
+        finally:
+            client.shutdown()
+        self.assertIsNone(client.process)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from final_evaluation import wilson_interval, adaptive_final_evaluation, overall_win_rate, FINAL_OPPONENTS
+
+
+class TestFinalEvaluation(unittest.TestCase):
+    def test_wilson_interval(self):
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=4)
+        self.assertAlmostEqual(high, 0.5962, places=4)
+        # never outside [0, 1], not empty when every match is won
+        low, high = wilson_interval(20, 20)
+        self.assertLess(low, 1.0)
+        self.assertEqual(high, 1.0)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+        # more matches, narrower interval
+        self.assertLess(wilson_interval(100, 200)[1] - wilson_interval(100, 200)[0],
+                        wilson_interval(50, 100)[1] - wilson_interval(50, 100)[0])
+
+    def test_stops_when_intervals_are_narrow(self):
+        results, estimates = adaptive_final_evaluation(utils.ChaserWrapper(), target_width=0.3, batch_size=5,
+                                                       max_matches=200)
+        self.assertEqual(set(estimates), set(FINAL_OPPONENTS))
+        self.assertEqual(len(results), sum(e.matches for e in estimates.values()))
+        random = estimates["Random"]
+        self.assertLessEqual(random.width(0.95), 0.3)
+        self.assertEqual(random.matches % 5, 0)
+        self.assertLess(random.matches, 200)
+
+    def test_deterministic_opponents_played_once(self):
+        results, estimates = adaptive_final_evaluation(utils.ChaserWrapper(), target_width=0.05, batch_size=5,
+                                                       max_matches=20)
+        for opponent_type in ("Static", "Chaser"):
+            self.assertEqual(estimates[opponent_type].matches, 1)
+            self.assertEqual(estimates[opponent_type].width(0.95), 0.0)
+            self.assertEqual(sum(1 for r in results if r[4] == opponent_type), 1)
+        self.assertEqual(estimates["Random"].matches, 20)
+
+    def test_overall_win_rate_weighted_like_fixed_test(self):
+        _, estimates = adaptive_final_evaluation(utils.ChaserWrapper(), target_width=0.5, batch_size=5)
+        expected = (0.2 * estimates["Random"].win_rate + 0.4 * estimates["Static"].win_rate
+                    + 0.4 * estimates["Chaser"].win_rate)
+        self.assertAlmostEqual(overall_win_rate(estimates), expected)
+
+    def test_max_matches(self):
+        results, estimates = adaptive_final_evaluation(utils.ChaserWrapper(), target_width=0.01, batch_size=4,
+                                                       max_matches=6)
+        self.assertEqual([e.matches for e in estimates.values()], [6, 1, 1])
+        self.assertEqual([r[0] for r in results], list(range(1, 9)))
+
+    def test_same_random_opponents_as_fixed_test(self):
+        results, _ = adaptive_final_evaluation(utils.ChaserWrapper(), target_width=1.0, batch_size=3)
+        random_fitness = [r[2:4] for r in results if r[4] == "Random"]
+        for i, fitness in enumerate(random_fitness):
+            opponent = utils.RandomWrapper(utils.battle_rng("final", "Random", i))
+            self.assertEqual(list(utils.simulate_battle(utils.ChaserWrapper(), opponent)), fitness)
+
+
+if __name__ == '__main__':
+    unittest.main()
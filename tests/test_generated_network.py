@@ -0,0 +1,81 @@
+import unittest
+import random
+import pickle
+import sys
+import os
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from generated_network import GeneratedNetwork, GeneratedNetworkCache, prune
+from test_utils import load_config, make_genomes, evaluate_fitness
+
+
+def mutated_genomes(config, count=10, mutations=30, seed=0):
+    """ Genomes with hidden nodes and deeper topologies than a fresh population. """
+    genomes = [genome for _, genome in make_genomes(config, seed)][:count]
+    for genome in genomes:
+        for _ in range(mutations):
+            genome.mutate(config.genome_config)
+    return genomes
+
+
+class TestGeneratedNetwork(unittest.TestCase):
+    def setUp(self):
+        self.config = load_config(10)
+
+    def test_same_outputs_as_feed_forward(self):
+        rng = random.Random(0)
+        for genome in mutated_genomes(self.config):
+            reference = neat.nn.FeedForwardNetwork.create(genome, self.config)
+            generated = GeneratedNetwork.create(genome, self.config)
+            restored = pickle.loads(pickle.dumps(generated))
+            for _ in range(50):
+                inputs = [rng.uniform(-2.0, 2.0) for _ in range(7)]
+                self.assertEqual(generated.activate(inputs), reference.activate(inputs))
+                self.assertEqual(restored.activate(inputs), reference.activate(inputs))
+        with self.assertRaises(RuntimeError):
+            generated.activate([0.0] * 6)
+
+    def test_pruning(self):
+        sigmoid = neat.activations.sigmoid_activation
+        total = neat.aggregations.sum_aggregation
+        # hidden node 5 only feeds output 0 through a 0.0 weight, output 2 is not connected
+        net = neat.nn.FeedForwardNetwork(list(range(-1, -8, -1)), [0, 1, 2], [
+            (5, sigmoid, total, 0.1, 1.0, [(-1, 1.0)]),
+            (0, sigmoid, total, 0.2, 1.0, [(5, 0.0), (-2, 0.5)]),
+            (1, sigmoid, total, -0.3, 2.0, [(-3, -1.5), (0, 0.7)]),
+        ])
+        self.assertEqual([node for node, *_ in prune(net)], [0, 1])
+        generated = GeneratedNetwork.from_network(net)
+        self.assertNotIn("n5", generated.source)
+        for inputs in ([0.3] * 7, [-1.0, 2.0, 0.0, -0.0, 5.0, 0.1, 1.0]):
+            self.assertEqual(generated.activate(inputs), net.activate(inputs))
+        self.assertEqual(generated.activate([0.3] * 7)[2], 0.0)
+
+    def test_cache(self):
+        cache = GeneratedNetworkCache(max_entries=2)
+        genomes = [genome for _, genome in make_genomes(self.config)][:3]
+        first = cache.get(genomes[0], self.config)
+        self.assertIs(cache.get(genomes[0], self.config), first)
+        cache.get(genomes[1], self.config)
+        cache.get(genomes[2], self.config)
+        self.assertEqual(len(cache.entries), 2)
+        self.assertIsNot(cache.get(genomes[0], self.config), first)
+
+    def test_eval_genomes_gives_same_fitness(self):
+        config = load_config()
+        genomes = make_genomes(config)
+        expected = evaluate_fitness(genomes, config)
+        utils.generated_networks = GeneratedNetworkCache()
+        try:
+            self.assertEqual(evaluate_fitness(genomes, config), expected)
+        finally:
+            utils.generated_networks = None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import random
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from compiled_network import CompiledNetwork
+from hall_of_fame import HallOfFame, open_archive
+from test_utils import load_config, make_genomes, evaluate_fitness
+
+
+class TestHallOfFame(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "hof.npy")
+        self.config = load_config(pop_size=6)
+        self.genomes = make_genomes(self.config)
+        self.networks = [CompiledNetwork.create(g, self.config) for _, g in self.genomes]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load(self):
+        archive = HallOfFame(self.path)
+        for generation, net in enumerate(self.networks[:3]):
+            archive.add(net, generation, 100 + generation, float(generation))
+        self.assertFalse(archive.add(self.networks[0], 5, 100, 0.0))
+        archive.save()
+
+        loaded = HallOfFame.load(self.path)
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(loaded.genome_keys, [100, 101, 102])
+        self.assertIsInstance(loaded.params[0], np.memmap)
+        inputs = np.full((1, 7), 0.5)
+        np.testing.assert_array_equal(loaded.network(2).activate_batch(inputs), self.networks[2].activate_batch(inputs))
+        self.assertIs(open_archive(self.path, loaded.revision), open_archive(self.path, loaded.revision))
+
+    def test_age_eviction(self):
+        archive = HallOfFame(self.path, capacity=2)
+        for generation, net in enumerate(self.networks[:4]):
+            archive.add(net, generation, generation, 0.0)
+        self.assertEqual(archive.generations, [2, 3])
+
+    def test_diversity_eviction(self):
+        archive = HallOfFame(self.path, capacity=2, eviction="diversity")
+        archive.add(self.networks[0], 0, 0, 0.0)
+        archive.add(self.networks[1], 1, 1, 0.0)
+        # a copy of network 0 (another genome) is the most redundant pair: the older copy goes
+        archive.add(self.networks[0], 2, 2, 0.0, content=b"another genome..")
+        self.assertEqual(archive.genome_keys, [1, 2])
+
+    def test_archive_shared_by_runs(self):
+        # a full archive of an earlier run, saved and opened again
+        archive = HallOfFame(self.path, capacity=3)
+        for generation, net in enumerate(self.networks[:3]):
+            archive.add(net, 10 + generation, 4 + generation, 0.0)
+        archive.save()
+
+        # genome keys and generations start again in the new run: its champions still get in
+        archive = HallOfFame.load(self.path, capacity=3)
+        self.assertTrue(archive.add(self.networks[3], 0, 7, 0.0))
+        self.assertTrue(archive.add(self.networks[4], 1, 4, 0.0))
+        self.assertEqual(archive.genome_keys, [6, 7, 4])
+        self.assertFalse(archive.add(self.networks[3], 2, 9, 0.0))
+        archive.save()
+        self.assertEqual(HallOfFame.load(self.path).contents, archive.contents)
+        self.assertEqual(len(set(archive.entry_id(i) for i in range(3))), 3)
+
+    def _evaluate_with_archive(self, name, workers=1):
+        archive = HallOfFame(os.path.join(self.tmp.name, name), capacity=5)
+        archive.add(self.networks[0], 0, 1000, 0.0)
+        archive.save()
+        utils.hall_of_fame = archive
+        utils.hall_of_fame_opponents = 1
+        utils.start_worker_pool(workers)
+        try:
+            return evaluate_fitness(self.genomes, self.config), archive
+        finally:
+            utils.close_worker_pool()
+            utils.hall_of_fame = None
+
+    def test_eval_with_hall_of_fame(self):
+        serial, archive = self._evaluate_with_archive("serial.npy")
+        parallel, _ = self._evaluate_with_archive("parallel.npy", workers=2)
+
+        self.assertEqual(serial, parallel)
+        self.assertTrue(all(genome.matches_internal == 6 for _, genome in self.genomes))
+        # the champion of the generation was archived
+        self.assertEqual(len(HallOfFame.load(archive.path)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
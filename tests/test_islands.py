@@ -0,0 +1,73 @@
+import unittest
+import random
+import sys
+import os
+import tempfile
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from islands import run_islands, receive_migrants, combine_histories, island_file
+from test_utils import load_config
+
+
+class TestIslands(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history = utils.filename_for_fitness_history
+
+    def tearDown(self):
+        utils.filename_for_fitness_history = self.history
+        self.tmp.cleanup()
+
+    def test_receive_migrants(self):
+        random.seed(0)
+        config = load_config()
+        population = neat.Population(config)
+        elite_key = next(iter(population.population))
+        population.population[elite_key].fitness = 10.0
+        donor = neat.Population(config)
+        migrants = list(donor.population.values())[:2]
+
+        receive_migrants(population, migrants)
+        self.assertEqual(len(population.population), 6)
+        self.assertIn(elite_key, population.population)
+        new_keys = sorted(population.population)[-2:]
+        self.assertEqual(new_keys, [7, 8])
+        for key in new_keys:
+            self.assertEqual(population.population[key].key, key)
+            self.assertIn(key, population.species.genome_to_species)
+        # the donor genomes are not modified
+        self.assertEqual([m.key for m in migrants], [1, 2])
+
+    def test_combine_histories(self):
+        paths = []
+        for i, rows in enumerate([["0,10.00,20.00", "1,12.00,22.00"], ["0,20.00,40.00", "1,14.00,30.00"]]):
+            paths.append(os.path.join(self.tmp.name, f"{i}.csv"))
+            with open(paths[-1], "w") as f:
+                f.write("Generation,Avg_Internal_Score_Per_Match,Avg_External_Score_Per_Match\n")
+                f.write("\n".join(rows) + "\n")
+        output = os.path.join(self.tmp.name, "combined.csv")
+        combine_histories(paths, output)
+        with open(output) as f:
+            self.assertEqual(f.read().splitlines()[1:], ["0,15.00,30.00", "1,13.00,26.00"])
+
+    def test_run_is_reproducible(self):
+        winners = []
+        histories = []
+        for run in range(2):
+            utils.filename_for_fitness_history = os.path.join(self.tmp.name, f"history_{run}.csv")
+            winners.append(run_islands(load_config(), 2, 3, migration_interval=1, migrants=2))
+            with open(utils.filename_for_fitness_history) as f:
+                histories.append(f.read())
+        self.assertEqual(winners[0].fitness, winners[1].fitness)
+        self.assertEqual(histories[0], histories[1])
+        self.assertEqual(len(histories[0].splitlines()), 1 + 3)
+        self.assertTrue(os.path.exists(island_file(utils.filename_for_fitness_history, 1, "run.log")))
+
+
+if __name__ == '__main__':
+    unittest.main()
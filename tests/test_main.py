@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 import sys
 import os
 
@@ -28,5 +29,23 @@ class TestMain(unittest.TestCase):
         self.assertEqual(losses, 1)
         self.assertEqual(crushing_losses, 1)
 
+    def test_islands_reject_shared_population(self):
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        try:
+            with patch('builtins.print'), self.assertRaises(ValueError):
+                main.main(islands=2, workers=2, shared_population=True)
+        finally:
+            os.chdir(cwd)
+
+    def test_shared_population_needs_workers(self):
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        try:
+            with patch('builtins.print'), self.assertRaises(ValueError):
+                main.main(workers=1, shared_population=True)
+        finally:
+            os.chdir(cwd)
+
 if __name__ == '__main__':
     unittest.main()
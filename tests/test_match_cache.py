@@ -0,0 +1,67 @@
+import unittest
+import copy
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from match_cache import MatchCache, genome_hash
+from test_utils import load_config, make_genomes, evaluate_fitness
+
+
+class TestMatchCache(unittest.TestCase):
+    def test_genome_hash(self):
+        config = load_config(pop_size=3)
+        genomes = make_genomes(config)
+        genome = genomes[0][1]
+        clone = copy.deepcopy(genome)
+        clone.key = 999
+        clone.fitness = 12.0
+
+        self.assertEqual(genome_hash(genome), genome_hash(clone))
+        self.assertNotEqual(genome_hash(genome), genome_hash(genomes[1][1]))
+
+        conn = next(iter(clone.connections.values()))
+        conn.weight += 1e-9
+        self.assertNotEqual(genome_hash(genome), genome_hash(clone))
+
+    def test_lru_eviction(self):
+        cache = MatchCache(max_bytes=1)
+        cache.bytes_per_entry = 1
+        cache.max_bytes = 2
+        cache.put("a", (1.0,))
+        cache.put("b", (2.0,))
+        cache.get("a")
+        cache.put("c", (3.0,))
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.hits, 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.misses, 1)
+
+    def test_cached_eval_matches_uncached(self):
+        config = load_config()
+        genomes = make_genomes(config)
+
+        expected = evaluate_fitness(genomes, config)
+        utils.match_cache = MatchCache()
+        try:
+            first = evaluate_fitness(genomes, config)
+            second = evaluate_fitness(genomes, config)
+            misses = utils.match_cache.misses
+        finally:
+            utils.match_cache = None
+
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        # round-robin and Static/Chaser matches are served from the cache the second time
+        # (the repeated Static/Chaser matches of a genome are simulated, and looked up, once)
+        self.assertEqual(misses, 15 + 6 * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+import csv
+import random
+import sys
+import os
+import tempfile
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from phase_timing import PhaseTimer, ReportingTimer, PHASES, COLUMNS
+from test_utils import load_config
+
+
+class TestPhaseTiming(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "phase_timing.csv")
+        self.patches = [
+            patch('utils.filename_for_fitness_history', os.path.join(self.tmp.name, "history.csv")),
+            patch('utils.generation_count', 0),
+            patch('builtins.print'),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        utils.phase_timer = None
+        self.tmp.cleanup()
+
+    def test_one_row_per_generation(self):
+        random.seed(0)
+        population = neat.Population(load_config(pop_size=6))
+        timer = PhaseTimer(self.path)
+        population.reporters.reporters.insert(0, timer)
+        population.add_reporter(neat.StatisticsReporter())
+        population.add_reporter(ReportingTimer(timer))
+        utils.phase_timer = timer
+        population.run(utils.eval_genomes, 3)
+
+        with open(self.path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(list(rows[0].keys()), list(COLUMNS))
+        self.assertEqual([int(row["generation"]) for row in rows], [0, 1, 2])
+        for row in rows:
+            self.assertEqual(int(row["population"]), 6)
+            # round-robin among 6 genomes plus 10 external matches each,
+            # of which the 4 vs Static and the 4 vs Chaser are simulated once
+            self.assertEqual(int(row["battles"]), 15 + 6 * 4)
+            self.assertGreater(float(row["avg_battle_length"]), 0)
+            times = [float(row[phase]) for phase in PHASES]
+            self.assertTrue(all(t >= 0 for t in times))
+            self.assertGreater(float(row["internal_battles"]), 0)
+            self.assertGreater(float(row["reporting"]), 0)
+            self.assertAlmostEqual(sum(times), float(row["total"]), places=4)
+
+    def test_resume_drops_later_rows(self):
+        with open(self.path, "w") as f:
+            f.write(",".join(COLUMNS) + "\n")
+            for generation in range(5):
+                f.write(",".join([str(generation)] + ["0"] * (len(COLUMNS) - 1)) + "\n")
+        PhaseTimer(self.path, start_generation=3)
+        with open(self.path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([int(row["generation"]) for row in rows], [0, 1, 2])
+
+    def test_lap_is_a_no_op_when_off(self):
+        utils.phase_timer = None
+        utils.lap("network_creation")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import pickle
+import random
+import sys
+import os
+import tempfile
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+import population_buffer
+from population_buffer import PopulationBuffer, SharedNetwork
+from generated_network import GeneratedNetwork, GeneratedNetworkCache
+from match_cache import genome_hash
+from test_utils import load_config, make_genomes, evaluate_fitness
+
+
+class TestPopulationBuffer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.buffer = PopulationBuffer(self.tmp.name)
+        self.config = load_config(8)
+        self.genomes = [genome for _, genome in make_genomes(self.config)]
+        for genome in self.genomes:
+            for _ in range(20):
+                genome.mutate(self.config.genome_config)
+        self.networks = [neat.nn.FeedForwardNetwork.create(genome, self.config) for genome in self.genomes]
+
+    def tearDown(self):
+        population_buffer._attached = None
+        self.tmp.cleanup()
+
+    def publish(self, generated=False):
+        return self.buffer.publish(self.networks, self.config.genome_config.input_keys,
+                                   self.config.genome_config.output_keys, generated)
+
+    def test_references_unpickle_to_the_same_networks(self):
+        references = self.publish()
+        rng = random.Random(0)
+        for reference, net in zip(references, self.networks):
+            self.assertIsInstance(reference, SharedNetwork)
+            restored = pickle.loads(pickle.dumps(reference))
+            self.assertEqual(restored.node_evals, net.node_evals)
+            for _ in range(20):
+                inputs = [rng.uniform(-1.0, 1.0) for _ in range(7)]
+                self.assertEqual(restored.activate(inputs), net.activate(inputs))
+        # a task carries a few bytes, however large the network is
+        task = (1, references[0], 2, references[1])
+        self.assertLess(len(pickle.dumps(task)), len(pickle.dumps((1, self.networks[0], 2, self.networks[1]))) / 4)
+        # a network is decoded once per revision
+        self.assertIs(pickle.loads(pickle.dumps(references[3])), pickle.loads(pickle.dumps(references[3])))
+
+    def test_new_revision(self):
+        first = self.publish()
+        pickle.loads(pickle.dumps(first[0]))
+        second = self.publish(generated=True)
+        self.assertEqual(second[0].revision, first[0].revision + 1)
+        restored = pickle.loads(pickle.dumps(second[0]))
+        self.assertIsInstance(restored, GeneratedNetwork)
+        self.assertEqual(restored.activate([0.5] * 7), self.networks[0].activate([0.5] * 7))
+        with self.assertRaises(ValueError):
+            pickle.loads(pickle.dumps(first[1]))
+
+    def test_generated_networks_kept_across_revisions(self):
+        contents = [genome_hash(genome) for genome in self.genomes]
+        generated = lambda: self.buffer.publish(self.networks, self.config.genome_config.input_keys,
+                                                self.config.genome_config.output_keys, True, contents)
+        first = pickle.loads(pickle.dumps(generated()[2]))
+        self.assertIsInstance(first, GeneratedNetwork)
+        self.assertEqual(first.activate([0.5] * 7), self.networks[2].activate([0.5] * 7))
+        # same genome in the next generation: the worker does not compile it again
+        self.assertIs(pickle.loads(pickle.dumps(generated()[2])), first)
+
+    def test_parallel_eval_with_shared_population(self):
+        config = load_config()
+        genomes = make_genomes(config)
+        serial = evaluate_fitness(genomes, config)
+        utils.start_worker_pool(2)
+        utils.population_buffer = self.buffer
+        try:
+            shared = evaluate_fitness(genomes, config)
+            utils.generated_networks = GeneratedNetworkCache()
+            generated = evaluate_fitness(genomes, config)
+        finally:
+            utils.population_buffer = None
+            utils.generated_networks = None
+            utils.close_worker_pool()
+        self.assertEqual(shared, serial)
+        self.assertEqual(generated, serial)
+
+
+if __name__ == '__main__':
+    unittest.main()
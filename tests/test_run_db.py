@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import patch
+import pickle
+import random
+import sys
+import os
+import tempfile
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from run_db import RunDatabase, RunRecorder, parse_run_name
+from test_utils import load_config
+
+
+class TestRunDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = RunDatabase(os.path.join(self.tmp.name, "runs.sqlite"))
+        self.patches = [
+            patch('utils.filename_for_fitness_history', os.path.join(self.tmp.name, "history.csv")),
+            patch('utils.generation_count', 0),
+            patch('builtins.print'),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.db.close()
+        self.tmp.cleanup()
+
+    def query(self, sql, *args):
+        return self.db.connection.execute(sql, args).fetchall()
+
+    def test_parse_run_name(self):
+        self.assertEqual(parse_run_name("pop_50_gen_300_elit_4"),
+                         {"pop_size": 50, "generations": 300, "elitism": 4})
+        self.assertEqual(parse_run_name("pop_20_gen_10_elit_2_selit_1_seed_3"),
+                         {"pop_size": 20, "generations": 10, "elitism": 2, "species_elitism": 1, "seed": 3})
+        self.assertEqual(parse_run_name("fitness_history"), {})
+
+    def test_import_csv(self):
+        path = os.path.join(self.tmp.name, "pop_20_gen_3_elit_2.csv")
+        with open(path, "w") as f:
+            f.write("Generation,Avg_Internal_Score_Per_Match,Avg_External_Score_Per_Match\n"
+                    "0,39.14,64.83\n1,56.04,68.29\n2,50.00,70.00\n")
+        run_id = self.db.import_csv(path)
+        self.assertEqual(self.query("SELECT name, status, pop_size, generations, elitism FROM runs WHERE id = ?",
+                                    run_id), [("pop_20_gen_3_elit_2", "imported", 20, 3, 2)])
+        self.assertEqual(self.query("SELECT generation, avg_internal, avg_external FROM generations"),
+                         [(0, 39.14, 64.83), (1, 56.04, 68.29), (2, 50.0, 70.0)])
+        # importing again replaces the run
+        self.db.import_csv(path)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM runs"), [(1,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM generations"), [(3,)])
+
+    def test_resume_continues_an_unfinished_run(self):
+        run_id = self.db.start_run("run", {"seed": 1}, {}, directory=self.tmp.name)
+        for gen in range(5):
+            self.db.log_generation(run_id, gen, 1.0, 2.0)
+        self.assertEqual(self.db.start_run("run", {"seed": 1}, {}, directory=self.tmp.name, resume_generation=3),
+                         run_id)
+        self.assertEqual(self.query("SELECT generation FROM generations"), [(0,), (1,), (2,)])
+
+        self.db.finish_run(run_id, 12.5, win_rate=0.5)
+        self.assertEqual(self.query("SELECT status, duration, win_rate FROM runs"), [("done", 12.5, 0.5)])
+        # a finished run is never continued
+        self.assertNotEqual(self.db.start_run("run", {}, {}, directory=self.tmp.name, resume_generation=3), run_id)
+
+    def test_recorder_writes_one_row_per_generation(self):
+        random.seed(0)
+        population = neat.Population(load_config(pop_size=6))
+        run_id = self.db.start_run("run", {"pop_size": 6}, {"generations": 3})
+        population.add_reporter(RunRecorder(self.db, run_id))
+        winner = population.run(utils.eval_genomes, 3)
+        self.db.finish_run(run_id, 1.0, winner, 0.25)
+
+        with open(utils.filename_for_fitness_history) as f:
+            history = [line.split(",") for line in f.readlines()[1:]]
+        rows = self.query("SELECT generation, avg_internal, avg_external, best_fitness, species, battles "
+                          "FROM generations WHERE run_id = ? ORDER BY generation", run_id)
+        self.assertEqual([row[0] for row in rows], [0, 1, 2])
+        for row, line in zip(rows, history):
+            self.assertEqual(f"{row[1]:.2f}", line[1])
+            self.assertEqual(f"{row[2]:.2f}", line[2].strip())
+            self.assertGreater(row[4], 0)
+            self.assertEqual(row[5], 15 + 6 * 4)
+        self.assertEqual(self.query("SELECT winner_nodes, winner_connections, win_rate FROM runs"),
+                         [(len(winner.nodes), sum(1 for c in winner.connections.values() if c.enabled), 0.25)])
+
+    def test_recorder_pickles_without_the_database(self):
+        recorder = pickle.loads(pickle.dumps(RunRecorder(self.db, 7)))
+        self.assertIsNone(recorder.database)
+        self.assertEqual(recorder.run_id, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
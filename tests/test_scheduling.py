@@ -0,0 +1,82 @@
+import unittest
+import random
+import sys
+import os
+from collections import Counter
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from scheduling import round_robin, random_opponents, swiss, balanced
+from test_utils import load_config, make_genomes, evaluate_fitness
+
+
+def all_pairs(schedule, num_genomes, k, scores=None):
+    scores = scores if scores is not None else [0.0] * num_genomes
+    return [pair for round_pairs in schedule(num_genomes, k, random.Random(0), scores) for pair in round_pairs]
+
+
+def matches_per_genome(pairs):
+    counts = Counter()
+    for i, j in pairs:
+        counts[i] += 1
+        counts[j] += 1
+    return counts
+
+
+class TestScheduling(unittest.TestCase):
+    def test_round_robin(self):
+        pairs = all_pairs(round_robin, 6, 0)
+        self.assertEqual(len(pairs), 15)
+        self.assertEqual(set(matches_per_genome(pairs).values()), {5})
+
+    def test_random_opponents(self):
+        pairs = all_pairs(random_opponents, 20, 4)
+        self.assertEqual(len(pairs), 80)
+        self.assertTrue(all(i != j for i, j in pairs))
+        self.assertEqual(set(Counter(i for i, _ in pairs).values()), {4})
+        # the k opponents of a genome are distinct, and every other genome can be drawn
+        self.assertEqual(len(set(pairs)), 80)
+        self.assertEqual({j for _, j in all_pairs(random_opponents, 3, 2)}, {0, 1, 2})
+
+    def test_balanced(self):
+        for num_genomes, k in [(20, 4), (20, 5), (9, 4)]:
+            pairs = all_pairs(balanced, num_genomes, k)
+            self.assertEqual(set(matches_per_genome(pairs).values()), {k})
+            self.assertEqual(len(set(pairs)), len(pairs))
+        # odd k and odd population: a single genome plays one more match
+        pairs = all_pairs(balanced, 9, 3)
+        self.assertEqual(sorted(Counter(matches_per_genome(pairs).values()).items()), [(3, 8), (4, 1)])
+        self.assertEqual(len({tuple(sorted(p)) for p in pairs}), len(pairs))
+        # with an even k every genome starts half of its matches on each side
+        pairs = all_pairs(balanced, 20, 4)
+        self.assertEqual(set(Counter(i for i, _ in pairs).values()), {2})
+
+    def test_swiss_rounds(self):
+        scores = list(range(10))
+        rounds = list(swiss(10, 3, random.Random(0), scores))
+        self.assertEqual(len(rounds), 3)
+        for round_pairs in rounds:
+            self.assertEqual(len(round_pairs), 5)
+            self.assertEqual(len(matches_per_genome(round_pairs)), 10)
+        # after the first round, top ranked genomes meet each other
+        self.assertIn(tuple(sorted(rounds[1][0])), [(8, 9), (7, 9)])
+
+    def test_eval_with_sampled_schedule(self):
+        config = load_config(pop_size=8)
+        genomes = make_genomes(config)
+        utils.schedule_strategy = "balanced"
+        utils.schedule_opponents = 2
+        try:
+            fitness = evaluate_fitness(genomes, config)
+        finally:
+            utils.schedule_strategy = "round_robin"
+            utils.schedule_opponents = 10
+        self.assertEqual(len(fitness), 8)
+        self.assertTrue(all(genome.matches_internal == 2 for _, genome in genomes))
+        self.assertTrue(all(f > 0 for f in fitness.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import math
+import random
+import sys
+import os
+
+# Add parent directory to path to allow importing modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robot import Robot
+from spatial_index import UniformGrid
+
+
+def random_robots(rng, n, teams=None):
+    return [(i, Robot(None, start_pos=(rng.uniform(0, 1), rng.uniform(0, 1)),
+                      team=rng.randrange(teams) if teams else None)) for i in range(n)]
+
+
+class TestUniformGrid(unittest.TestCase):
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(0)
+        for n in (3, 20, 200):
+            robots = random_robots(rng, n, teams=3)
+            grid = UniformGrid(1.0, 1.0, 0.2)
+            grid.rebuild(robots)
+            for _, robot in robots:
+                expected = min(((math.hypot(r.x - robot.x, r.y - robot.y), i) for i, r in robots
+                                if robot.is_opponent(r)), default=None)
+                found = grid.nearest(robot.x, robot.y, robot.is_opponent)
+                if expected is None:
+                    self.assertIsNone(found)
+                else:
+                    self.assertEqual(found[0], expected[1])
+
+    def test_within_returns_every_robot_in_range(self):
+        rng = random.Random(1)
+        robots = random_robots(rng, 100)
+        grid = UniformGrid(1.0, 1.0, 0.2)
+        grid.rebuild(robots)
+        for _, robot in robots:
+            candidates = {i for i, _ in grid.within(robot.x, robot.y, 0.2)}
+            in_range = {i for i, r in robots if math.hypot(r.x - robot.x, r.y - robot.y) <= 0.2}
+            self.assertTrue(in_range <= candidates)
+            # far cells are never visited
+            self.assertLess(len(candidates), len(robots))
+
+    def test_positions_on_the_walls(self):
+        grid = UniformGrid(1.0, 1.0, 0.3)
+        self.assertEqual((grid.cols, grid.rows), (4, 4))
+        self.assertEqual(grid.cell_of(1.0, 0), (3, 0))
+        self.assertEqual(grid.cell_of(-0.5, 2.0), (0, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import random
+import sys
+import os
+import tempfile
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from speciation import CachedSpeciesSet, species_set_type
+from test_utils import CONFIG_PATH
+
+
+def cached_config_path(directory):
+    """ Copy of neat_config.txt selecting CachedSpeciesSet. """
+    with open(CONFIG_PATH) as f:
+        text = f.read().replace("[DefaultSpeciesSet]", "[CachedSpeciesSet]")
+    path = os.path.join(directory, "neat_config.txt")
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def structure_fitness(genomes, config):
+    # cheap and deterministic, so that genomes grow and spread into many species
+    for _, genome in genomes:
+        genome.fitness = sum(c.weight for c in genome.connections.values() if c.enabled) + 0.1 * len(genome.nodes)
+
+
+class SpeciesLog(neat.reporting.BaseReporter):
+    def __init__(self):
+        self.entries = []
+
+    def end_generation(self, config, population, species_set):
+        self.entries.append((dict(species_set.genome_to_species),
+                             {sid: (s.representative.key, sorted(s.members)) for sid, s in species_set.species.items()}))
+
+    def info(self, msg):
+        self.entries.append(msg)
+
+
+class TestCachedSpeciesSet(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cached_path = cached_config_path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def config(self, species_set, path, pop_size=80, threshold=1.5):
+        config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, species_set,
+                             neat.DefaultStagnation, path)
+        config.pop_size = pop_size
+        config.species_set_config.compatibility_threshold = threshold
+        return config
+
+    def run_log(self, config, generations):
+        random.seed(5)
+        population = neat.Population(config)
+        log = SpeciesLog()
+        population.add_reporter(log)
+        population.run(structure_fitness, generations)
+        return log.entries, population
+
+    def test_selected_by_config_section(self):
+        self.assertIs(species_set_type(CONFIG_PATH), neat.DefaultSpeciesSet)
+        self.assertIs(species_set_type(self.cached_path), CachedSpeciesSet)
+
+    def test_distances_are_exact(self):
+        config = self.config(CachedSpeciesSet, self.cached_path)
+        _, population = self.run_log(config, 5)
+        genomes = population.population
+        keys = list(genomes)[:30]
+        species_set = CachedSpeciesSet(config.species_set_config, population.reporters)
+        species_set.prefetch(config.genome_config, species_set.tables(genomes), keys, keys)
+        for k0 in keys:
+            for k1 in keys:
+                self.assertEqual(species_set.known[k0, k1], genomes[k0].distance(genomes[k1], config.genome_config))
+
+    def test_same_species_as_default(self):
+        expected, default = self.run_log(self.config(neat.DefaultSpeciesSet, CONFIG_PATH), 12)
+        entries, cached = self.run_log(self.config(CachedSpeciesSet, self.cached_path), 12)
+        # species, representatives, members and the reported mean genetic distance
+        self.assertEqual(entries, expected)
+        self.assertGreater(len(cached.species.species), 5)
+        self.assertEqual(sorted(cached.population), sorted(default.population))
+
+    def test_cache_keeps_only_the_current_population(self):
+        _, population = self.run_log(self.config(CachedSpeciesSet, self.cached_path), 3)
+        species_set = population.species
+        self.assertTrue(species_set.known)
+        for g0, g1 in species_set.known:
+            self.assertIn(g0, population.population)
+            self.assertIn(g1, population.population)
+
+
+    def test_tables_cover_only_the_current_genes(self):
+        config = self.config(CachedSpeciesSet, self.cached_path, pop_size=60)
+        random.seed(5)
+        population = neat.Population(config)
+        columns = []
+
+        class ColumnLog(neat.reporting.BaseReporter):
+            def end_generation(self, config, genomes, species_set):
+                _, nodes, connections = species_set.tables(genomes)
+                found = (nodes.num_columns, connections.num_columns)
+                expected = (len({key for g in genomes.values() for key in g.nodes}),
+                            len({key for g in genomes.values() for key in g.connections}))
+                columns.append((found, expected, len(species_set.encodings) <= len(genomes)))
+        population.add_reporter(ColumnLog())
+        population.run(structure_fitness, 30)
+        # the genes of genomes gone in earlier generations are forgotten
+        for found, expected, encodings_bounded in columns:
+            self.assertEqual(found, expected)
+            self.assertTrue(encodings_bounded)
+
+
+if __name__ == '__main__':
+    unittest.main()
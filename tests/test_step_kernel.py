@@ -0,0 +1,171 @@
+import unittest
+import math
+import random
+import sys
+import os
+
+# Add parent directory to path to allow importing modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from arena import Arena
+from robot import Robot
+from sensors import Sensors
+from step_kernel import StepKernel, wrap_angle, EXACT_WRAP_LIMIT
+
+
+def loop_normalize(angle):
+    # the original normalization loops
+    while angle > math.pi:
+        angle -= 2 * math.pi
+    while angle < -math.pi:
+        angle += 2 * math.pi
+    return angle
+
+
+def reference_sensors(robot, opponent, arena):
+    dx = opponent.x - robot.x
+    dy = opponent.y - robot.y
+    angle_diff = loop_normalize(math.atan2(dy, dx) - robot.angle)
+    max_dist = math.hypot(arena.width, arena.height)
+    return [math.hypot(dx, dy) / max_dist, angle_diff / math.pi, robot.health / robot.max_health,
+            robot.x / arena.width, (arena.width - robot.x) / arena.width,
+            robot.y / arena.height, (arena.height - robot.y) / arena.height]
+
+
+def reference_hit(arena, shooter, target):
+    if shooter.last_action is None or shooter.last_action[2] <= 0.5:
+        return
+    dx = target.x - shooter.x
+    dy = target.y - shooter.y
+    angle_diff = abs(loop_normalize(shooter.angle - math.atan2(dy, dx)))
+    if math.hypot(dx, dy) <= arena.SHOOT_RANGE and angle_diff <= arena.SHOOT_ANGLE:
+        target.health -= arena.DAMAGE
+        shooter.damage_inflicted += arena.DAMAGE
+
+
+def reference_battle(controller1, controller2, steps):
+    """ The per-step code of simulate_battle before the step kernel. """
+    robot1 = Robot(controller1, start_pos=(0.2, 0.5))
+    robot2 = Robot(controller2, start_pos=(0.8, 0.5))
+    arena = Arena(robots=[robot1, robot2])
+    trace = []
+    for _ in range(steps):
+        sensors1 = reference_sensors(robot1, robot2, arena)
+        sensors2 = reference_sensors(robot2, robot1, arena)
+        trace.append(sensors1 + sensors2)
+        robot1.apply_action(controller1.activate(sensors1))
+        robot2.apply_action(controller2.activate(sensors2))
+        reference_hit(arena, robot1, robot2)
+        reference_hit(arena, robot2, robot1)
+        arena.keep_inside(robot1)
+        arena.keep_inside(robot2)
+    return trace, (robot1.health, robot2.health, robot1.damage_inflicted, robot2.damage_inflicted)
+
+
+def kernel_battle(controller1, controller2, steps):
+    robot1 = Robot(controller1, start_pos=(0.2, 0.5))
+    robot2 = Robot(controller2, start_pos=(0.8, 0.5))
+    kernel = StepKernel(Arena(robots=[robot1, robot2]))
+    trace = []
+
+    class Recording:
+        def __init__(self, controller):
+            self.controller = controller
+
+        def activate(self, sensors):
+            trace.append(list(sensors))
+            return self.controller.activate(sensors)
+
+    recording1, recording2 = Recording(controller1), Recording(controller2)
+    for _ in range(steps):
+        kernel.battle_step(recording1, recording2)
+    trace = [trace[i] + trace[i + 1] for i in range(0, len(trace), 2)]
+    return trace, (robot1.health, robot2.health, robot1.damage_inflicted, robot2.damage_inflicted)
+
+
+class TestWrapAngle(unittest.TestCase):
+    def test_matches_normalization_loop(self):
+        rng = random.Random(0)
+        angles = [rng.uniform(-EXACT_WRAP_LIMIT, EXACT_WRAP_LIMIT) for _ in range(20000)]
+        angles += [rng.uniform(-200.0, 200.0) for _ in range(2000)]
+        # bounds, ties and the edges of the closed-form range
+        for k in range(-6, 7):
+            angles += [k * math.pi, math.nextafter(k * math.pi, math.inf), math.nextafter(k * math.pi, -math.inf)]
+        angles += [EXACT_WRAP_LIMIT, -EXACT_WRAP_LIMIT, math.nextafter(EXACT_WRAP_LIMIT, 0.0), 0.0, -0.0]
+        for angle in angles:
+            self.assertEqual(wrap_angle(angle), loop_normalize(angle), angle)
+
+
+class TestStepKernel(unittest.TestCase):
+    def test_battle_matches_reference(self):
+        for seed in range(6):
+            # random controllers reach the walls and the corners, where clamping invalidates the geometry
+            trace, result = reference_battle(utils.RandomWrapper(random.Random(seed)),
+                                             utils.RandomWrapper(random.Random(seed + 100)), 300)
+            kernel_trace, kernel_result = kernel_battle(utils.RandomWrapper(random.Random(seed)),
+                                                        utils.RandomWrapper(random.Random(seed + 100)), 300)
+            self.assertEqual(kernel_trace, trace)
+            self.assertEqual(kernel_result, result)
+
+        # the chaser closes in and shoots, so the hit tests reuse the geometry
+        for seed in range(3):
+            trace, result = reference_battle(utils.ChaserWrapper(), utils.RandomWrapper(random.Random(seed)), 300)
+            kernel_trace, kernel_result = kernel_battle(utils.ChaserWrapper(),
+                                                        utils.RandomWrapper(random.Random(seed)), 300)
+            self.assertEqual(kernel_trace, trace)
+            self.assertEqual(kernel_result, result)
+
+    def test_robots_in_the_same_corner(self):
+        robot1 = Robot(None, start_pos=(0, 0))
+        robot2 = Robot(None, start_pos=(0, 0))
+        arena = Arena(robots=[robot1, robot2])
+        self.assertEqual(Sensors.get(robot1, arena), reference_sensors(robot1, robot2, arena))
+        self.assertEqual(Sensors.get(robot2, arena), reference_sensors(robot2, robot1, arena))
+
+    def test_geometry_follows_moved_robots(self):
+        robot1 = Robot(None, start_pos=(0.2, 0.5))
+        robot2 = Robot(None, start_pos=(0.8, 0.5))
+        arena = Arena(robots=[robot1, robot2])
+        Sensors.get(robot1, arena)
+        robot2.x = 0.3
+        self.assertEqual(Sensors.get(robot1, arena), reference_sensors(robot1, robot2, arena))
+
+    def test_sensors_reuse_buffers(self):
+        arena = Arena(robots=[Robot(None), Robot(None, start_pos=(0.8, 0.5))])
+        kernel = StepKernel.for_arena(arena)
+        self.assertIs(StepKernel.for_arena(arena), kernel)
+        self.assertIs(kernel.sensors(arena.robots[0]), kernel.sensors(arena.robots[0]))
+        # Sensors.get keeps returning a new list
+        self.assertIsNot(Sensors.get(arena.robots[0], arena), kernel.sensors1)
+
+    def test_arena_with_more_robots_uses_generic_path(self):
+        robots = [Robot(None, start_pos=(0.1 * i, 0.5)) for i in range(1, 4)]
+        arena = Arena(robots=robots)
+        self.assertIsNone(StepKernel.for_arena(arena))
+        self.assertEqual(Sensors.get(robots[0], arena), reference_sensors(robots[0], robots[1], arena))
+
+    def test_simulate_battle_is_unchanged(self):
+        for seed in range(4):
+            controller1 = utils.RandomWrapper(random.Random(seed))
+            controller2 = utils.RandomWrapper(random.Random(seed + 10))
+            robot1 = Robot(controller1, start_pos=(0.2, 0.5))
+            robot2 = Robot(controller2, start_pos=(0.8, 0.5))
+            arena = Arena(robots=[robot1, robot2])
+            for step in range(utils.MAX_STEPS):
+                robot1.apply_action(controller1.activate(reference_sensors(robot1, robot2, arena)))
+                robot2.apply_action(controller2.activate(reference_sensors(robot2, robot1, arena)))
+                reference_hit(arena, robot1, robot2)
+                reference_hit(arena, robot2, robot1)
+                arena.keep_inside(robot1)
+                arena.keep_inside(robot2)
+                if robot1.is_dead() or robot2.is_dead():
+                    break
+            expected = utils.compute_fitness(robot1, robot2, step)
+            fitness = utils.simulate_battle(utils.RandomWrapper(random.Random(seed)),
+                                            utils.RandomWrapper(random.Random(seed + 10)))
+            self.assertEqual(fitness, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
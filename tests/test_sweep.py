@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+import neat
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sweep
+from sweep import Sweep, expand_grid, run_name, override_config, write_config
+from speciation import species_set_type
+
+GRID = {"pop_size": [4], "generations": [1], "elitism": [1, 2], "species_elitism": [1], "seed": [0]}
+
+
+class FakeSweep(Sweep):
+    """ Runs a short Python command instead of main.py; runs named in fail exit with status 1. """
+    fail = ()
+
+    def command(self, run, resume):
+        status = 1 if run["name"] in self.fail else 0
+        return [sys.executable, "-c", f"print('resume={resume}'); raise SystemExit({status})"]
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.tmp.name, "sweep")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def manifest(self):
+        with open(os.path.join(self.out, "manifest.json")) as f:
+            return {run["name"]: run for run in json.load(f)["runs"]}
+
+    def test_grid_and_names(self):
+        runs = expand_grid(dict(GRID, seed=[0, 1]))
+        self.assertEqual(len(runs), 4)
+        self.assertEqual(run_name(runs[0]), "pop_4_gen_1_elit_1_selit_1_seed_0")
+        self.assertEqual(len({run_name(run) for run in runs}), 4)
+
+    def test_config_overrides(self):
+        text = "[NEAT]\n# comment\npop_size   = 50\n\n[DefaultReproduction]\nelitism = 2\n"
+        self.assertEqual(override_config(text, {("NEAT", "pop_size"): 8, ("DefaultReproduction", "elitism"): 4}),
+                         "[NEAT]\n# comment\npop_size   = 8\n\n[DefaultReproduction]\nelitism = 4\n")
+        with self.assertRaises(ValueError):
+            override_config(text, {("NEAT", "elitism"): 1})
+
+        os.makedirs(self.out)
+        write_config(self.out, {"pop_size": 12, "generations": 3, "elitism": 3, "species_elitism": 1, "seed": 0})
+        path = os.path.join(self.out, "neat_config.txt")
+        config = neat.Config(neat.genome.DefaultGenome, neat.reproduction.DefaultReproduction,
+                             species_set_type(path), neat.stagnation.DefaultStagnation, path)
+        self.assertEqual(config.pop_size, 12)
+        self.assertEqual(config.reproduction_config.elitism, 3)
+        self.assertEqual(config.stagnation_config.species_elitism, 1)
+
+    def test_manifest_and_resume(self):
+        FakeSweep.fail = ("pop_4_gen_1_elit_2_selit_1_seed_0",)
+        failed = FakeSweep(self.out, GRID, cores=2, poll_interval=0.01).run()
+        self.assertEqual(failed, 1)
+        runs = self.manifest()
+        self.assertEqual(runs["pop_4_gen_1_elit_1_selit_1_seed_0"]["status"], "done")
+        self.assertEqual(runs["pop_4_gen_1_elit_2_selit_1_seed_0"]["status"], "failed")
+        self.assertTrue(os.path.exists(os.path.join(self.out, "pop_4_gen_1_elit_1_selit_1_seed_0", "neat_config.txt")))
+        first_start = runs["pop_4_gen_1_elit_1_selit_1_seed_0"]["started"]
+
+        # only the failed run is started again, from its checkpoint
+        checkpoint = os.path.join(self.out, "pop_4_gen_1_elit_2_selit_1_seed_0", sweep.CHECKPOINT_FILE)
+        open(checkpoint, "w").close()
+        FakeSweep.fail = ()
+        self.assertEqual(FakeSweep(self.out, GRID, cores=2, poll_interval=0.01).run(), 0)
+        runs = self.manifest()
+        self.assertEqual(runs["pop_4_gen_1_elit_1_selit_1_seed_0"]["started"], first_start)
+        self.assertTrue(runs["pop_4_gen_1_elit_2_selit_1_seed_0"]["resumed"])
+        self.assertTrue(all(run["status"] == "done" for run in runs.values()))
+        with open(os.path.join(self.out, "pop_4_gen_1_elit_1_selit_1_seed_0", "run.log")) as f:
+            self.assertEqual(f.read(), "resume=False\n")
+
+    def test_main_run(self):
+        failed = Sweep(self.out, GRID | {"elitism": [1]}, cores=1, poll_interval=0.1).run()
+        self.assertEqual(failed, 0)
+        run_dir = os.path.join(self.out, "pop_4_gen_1_elit_1_selit_1_seed_0")
+        for name in ("fitness_history.csv", "best_robot.pkl", "run.log"):
+            self.assertTrue(os.path.exists(os.path.join(run_dir, name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
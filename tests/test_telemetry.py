@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from telemetry import TelemetryWriter, TelemetryTable, COLUMNS
+from test_utils import load_config, make_genomes, evaluate_fitness
+
+
+def append_generation(writer, generation, count):
+    ids = list(range(count))
+    writer.append(generation, ids, [-1] * count, ["Static"] * count, [float(i) for i in ids],
+                  [0.5] * count, [300] * count, [10] * count, [0] * count)
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "telemetry")
+
+    def tearDown(self):
+        utils.telemetry = None
+        self.tmp.cleanup()
+
+    def test_buffered_append_and_generation_filter(self):
+        writer = TelemetryWriter(self.directory, buffer_rows=7)
+        for generation in range(5):
+            append_generation(writer, generation, 10)
+        # 50 rows with a 7-row buffer: 49 already on disk
+        self.assertEqual(len(TelemetryTable(self.directory)), 49)
+        writer.close()
+
+        table = TelemetryTable(self.directory)
+        self.assertEqual(len(table), 50)
+        self.assertIsInstance(table.columns["f1"], np.memmap)
+        rows = table.rows(3)
+        self.assertEqual(rows["generation"].tolist(), [3] * 10)
+        self.assertEqual(rows["f1"].tolist(), [float(i) for i in range(10)])
+        self.assertEqual(len(table.rows(1, 2)["genome1"]), 20)
+        self.assertEqual(set(table.rows(0)["opponent"].tolist()), {TelemetryTable.opponent_code("Static")})
+
+    def test_truncate(self):
+        writer = TelemetryWriter(self.directory, buffer_rows=16)
+        for generation in range(4):
+            append_generation(writer, generation, 5)
+        writer.truncate(2)
+        append_generation(writer, 2, 3)
+        writer.close()
+        table = TelemetryTable(self.directory)
+        self.assertEqual(table.columns["generation"].tolist(), [0] * 5 + [1] * 5 + [2] * 3)
+
+    def test_new_writer_drops_later_generations(self):
+        writer = TelemetryWriter(self.directory)
+        for generation in range(3):
+            append_generation(writer, generation, 4)
+        writer.close()
+
+        # a fresh run in the same directory starts from scratch...
+        writer = TelemetryWriter(self.directory)
+        append_generation(writer, 0, 2)
+        writer.close()
+        self.assertEqual(TelemetryTable(self.directory).columns["generation"].tolist(), [0, 0])
+
+        # ... a resumed run keeps the generations before its checkpoint
+        writer = TelemetryWriter(self.directory)
+        for generation in range(3):
+            append_generation(writer, generation, 2)
+        writer.close()
+        writer = TelemetryWriter(self.directory, start_generation=2)
+        append_generation(writer, 2, 1)
+        writer.close()
+        self.assertEqual(TelemetryTable(self.directory).columns["generation"].tolist(), [0, 0, 1, 1, 2])
+
+    def test_eval_genomes_records_every_match(self):
+        config = load_config(pop_size=6)
+        utils.telemetry = TelemetryWriter(self.directory)
+        fitness = evaluate_fitness(make_genomes(config), config)
+        utils.telemetry.close()
+
+        table = TelemetryTable(self.directory)
+        # 15 round-robin battles and 10 external matches per genome
+        self.assertEqual(len(table), 15 + 60)
+        self.assertTrue((table.columns["steps"] > 0).all())
+        self.assertFalse(np.isnan(table.columns["f2"]).any())
+
+        # the recorded f1 values add up to the fitness of each genome
+        external = table.columns["opponent"] >= TelemetryTable.opponent_code("Random")
+        for genome_id, value in fitness.items():
+            internal_total = (table.columns["f1"][~external & (table.columns["genome1"] == genome_id)].sum()
+                              + table.columns["f2"][~external & (table.columns["genome2"] == genome_id)].sum())
+            external_total = table.columns["f1"][external & (table.columns["genome1"] == genome_id)].sum()
+            self.assertAlmostEqual(internal_total / 5 + external_total / 6, value)
+
+    def test_columns_have_fixed_size_records(self):
+        writer = TelemetryWriter(self.directory)
+        append_generation(writer, 0, 3)
+        writer.close()
+        for name, dtype in COLUMNS:
+            size = os.path.getsize(os.path.join(self.directory, name + ".bin"))
+            self.assertEqual(size, 3 * np.dtype(dtype).itemsize)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import random
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from robot import Robot
+from trajectory import TrajectoryFile, load_trajectories, battle_length, NUM_FIELDS
+
+try:
+    import replay
+except ImportError:
+    replay = None
+
+
+class TestTrajectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "trajectories.npy")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, opponents):
+        recording = TrajectoryFile(self.path, len(opponents), utils.MAX_STEPS)
+        fitness = []
+        for i, (net1, net2) in enumerate(opponents):
+            fitness.append(utils.simulate_battle(net1, net2, recorder=recording.recorder(i)))
+            recording.set_label(i, f1=fitness[-1][0], f2=fitness[-1][1])
+        recording.close()
+        return fitness
+
+    def test_recording_does_not_change_the_battle(self):
+        opponents = [(utils.ChaserWrapper(), utils.RandomWrapper(random.Random(0))),
+                     (utils.StaticWrapper(), utils.ChaserWrapper())]
+        fitness = self.record(opponents)
+        expected = [utils.simulate_battle(utils.ChaserWrapper(), utils.RandomWrapper(random.Random(0))),
+                    utils.simulate_battle(utils.StaticWrapper(), utils.ChaserWrapper())]
+        self.assertEqual(fitness, expected)
+
+        data, labels = load_trajectories(self.path)
+        self.assertIsInstance(data, np.memmap)
+        self.assertEqual(data.dtype, np.float32)
+        self.assertEqual(data.shape, (2, utils.MAX_STEPS + 1, 2, NUM_FIELDS))
+        self.assertEqual(labels[0]["f1"], fitness[0][0])
+        # starting positions, then nothing after the end of the battle
+        np.testing.assert_allclose(data[0, 0, :, :2], [[0.2, 0.5], [0.8, 0.5]], rtol=1e-6)
+        length = battle_length(data[0])
+        self.assertTrue(np.isnan(data[0, length:]).all())
+
+    def test_last_row_is_the_final_state(self):
+        stats = {}
+        recording = TrajectoryFile(self.path, 1, utils.MAX_STEPS)
+        recorder = recording.recorder(0)
+        utils.simulate_battle(utils.ChaserWrapper(), utils.StaticWrapper(), stats, recorder)
+        self.assertEqual(recorder.length, stats["steps"] + 1)
+        final = recording.data[0, recorder.length - 1]
+        self.assertEqual(final[0, 3] + final[1, 3] < 200, stats["damage1"] + stats["damage2"] > 0)
+        recording.close()
+
+    def test_final_evaluation_records_every_match(self):
+        utils.test_best_genome_against_random_opponents(utils.ChaserWrapper(), num_tests=10, trajectories=self.path)
+        data, labels = load_trajectories(self.path)
+        self.assertEqual(len(labels), 10)
+        self.assertEqual(sorted(label["opponent"] for label in labels).count("Static"), 4)
+        self.assertTrue(all(battle_length(battle) > 1 for battle in data))
+
+    @unittest.skipIf(replay is None, "matplotlib is not installed")
+    def test_replay_frames(self):
+        self.record([(utils.ChaserWrapper(), utils.StaticWrapper())])
+        data, _ = load_trajectories(self.path)
+        frames_dir = os.path.join(self.tmp.name, "frames")
+        frames = replay.render_battle(data[0], frames_dir, every=100)
+        self.assertEqual(len(os.listdir(frames_dir)), frames)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,48 @@
 import unittest
 from unittest.mock import MagicMock, patch
+import random
 import sys
 import os
+import tempfile
+
+import neat
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import utils
 from robot import Robot
+from speciation import species_set_type
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "neat_config.txt")
+
+
+def load_config(pop_size=6):
+    config = neat.Config(
+        neat.genome.DefaultGenome,
+        neat.reproduction.DefaultReproduction,
+        species_set_type(CONFIG_PATH),
+        neat.stagnation.DefaultStagnation,
+        CONFIG_PATH
+    )
+    config.pop_size = pop_size
+    return config
+
+
+def make_genomes(config, seed=0):
+    random.seed(seed)
+    population = neat.Population(config)
+    return list(population.population.items())
+
+
+def evaluate_fitness(genomes, config, seed=0):
+    """Runs eval_genomes with a given seed and returns {genome_id: fitness}."""
+    random.seed(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch('utils.filename_for_fitness_history', os.path.join(tmp, "history.csv")), \
+                patch('utils.generation_count', 0), patch('builtins.print'):
+            utils.eval_genomes(genomes, config)
+    return {genome_id: genome.fitness for genome_id, genome in genomes}
 
 class TestUtils(unittest.TestCase):
     def test_compute_fitness(self):
@@ -59,6 +94,80 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(f1, 0.9)
         self.assertEqual(f2, 0.9)
 
+    def test_simulate_free_for_all(self):
+        nets = [utils.ChaserWrapper() if i % 2 else utils.StaticWrapper() for i in range(16)]
+        fitness = utils.simulate_free_for_all(nets)
+        self.assertEqual(len(fitness), 16)
+        self.assertEqual(fitness, utils.simulate_free_for_all(nets))
+        self.assertTrue(any(f > 0 for f in fitness))
+
+        # two teams: the survivors of the winning side get the victory bonus
+        teams = [i % 2 for i in range(16)]
+        fitness = utils.simulate_free_for_all(nets, teams=teams)
+        self.assertTrue(any(f >= 100.0 for f in fitness))
+
+    def test_random_opponent_is_reproducible(self):
+        opponent1 = utils.make_opponent("Random", seed=42)
+        opponent2 = utils.make_opponent("Random", seed=42)
+        actions1 = [opponent1.activate(None) for _ in range(5)]
+        actions2 = [opponent2.activate(None) for _ in range(5)]
+        self.assertEqual(actions1, actions2)
+
+    def test_eval_does_not_depend_on_global_rng(self):
+        config = load_config()
+        genomes = make_genomes(config)
+        self.assertEqual(evaluate_fitness(genomes, config, seed=1), evaluate_fitness(genomes, config, seed=2))
+
+    def test_battle_rng_streams(self):
+        self.assertEqual(utils.derive_seed(3, "external", 7), utils.derive_seed(3, "external", 7))
+        self.assertNotEqual(utils.derive_seed(3, "external", 7), utils.derive_seed(4, "external", 7))
+        default_seed = utils.derive_seed(3, "external", 7)
+        with patch('utils.run_seed', 1):
+            self.assertNotEqual(utils.derive_seed(3, "external", 7), default_seed)
+
+    def test_final_evaluation_is_reproducible(self):
+        net = MagicMock()
+        net.activate.return_value = (0.5, 0.5, 1.0)
+        with patch('utils.MAX_STEPS', 20):
+            first = utils.test_best_genome_against_random_opponents(net, num_tests=10)
+            random.seed(99)
+            second = utils.test_best_genome_against_random_opponents(net, num_tests=10)
+        self.assertEqual(first, second)
+
+    def test_parallel_eval_matches_serial(self):
+        config = load_config()
+        genomes = make_genomes(config)
+
+        serial = evaluate_fitness(genomes, config)
+        utils.start_worker_pool(2)
+        try:
+            parallel = evaluate_fitness(genomes, config)
+        finally:
+            utils.close_worker_pool()
+
+        self.assertIsNone(utils.worker_pool)
+        self.assertEqual(serial, parallel)
+
+    def test_collapse_repeated_matches(self):
+        simulated, source = utils.collapse_repeated_matches([None, "a", "a", None, "b", "a", "b"])
+        self.assertEqual(simulated, [0, 1, 3, 4])
+        self.assertEqual(source, [0, 1, 1, 2, 3, 1, 3])
+        self.assertTrue(utils.is_deterministic_opponent("Static"))
+        self.assertTrue(utils.is_deterministic_opponent("Chaser"))
+        self.assertFalse(utils.is_deterministic_opponent("Random"))
+
+    def test_collapsed_external_matches_keep_fitness(self):
+        config = load_config()
+        genomes = make_genomes(config)
+
+        collapsed = evaluate_fitness(genomes, config)
+        battles = utils.generation_stats["battles"]
+        with patch('utils.is_deterministic_opponent', return_value=False):
+            repeated = evaluate_fitness(genomes, config)
+        self.assertEqual(collapsed, repeated)
+        # 4 Static and 4 Chaser matches per genome are simulated once each
+        self.assertEqual(utils.generation_stats["battles"] - battles, 6 * 6)
+
     def test_process_results(self):
         # results: list of [match_number, who_won, winner_fitness, opponent_fitness, opponent_type]
         # Wait, utils doesn't have process_results. main.py does.
@@ -0,0 +1,76 @@
+#    Gabriele Tomai
+#    Student ID: IN2300006
+#    Degree Program: Computer Engineering
+
+import json
+import numpy as np
+
+# Values stored for each robot at every step
+FIELDS = ("x", "y", "angle", "health", "move", "rotate", "shoot")
+NUM_FIELDS = len(FIELDS)
+NAN = float("nan")
+
+
+class TrajectoryRecorder:
+    """
+    Records a battle into a preallocated float32 array of shape (max_steps + 1, 2, NUM_FIELDS):
+    row 0 is the starting state (actions are NaN), row t + 1 the state after step t
+    together with the actions chosen at step t. Rows after the end of the battle stay NaN.
+    Every step writes its row straight into the buffer (converted to float32 on assignment).
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.length = 0
+
+    def start(self, robot1, robot2):
+        self.buffer[0] = ((robot1.x, robot1.y, robot1.angle, robot1.health, NAN, NAN, NAN),
+                          (robot2.x, robot2.y, robot2.angle, robot2.health, NAN, NAN, NAN))
+        self.length = 1
+
+    def record(self, step, robot1, robot2, action1, action2):
+        self.buffer[step + 1] = ((robot1.x, robot1.y, robot1.angle, robot1.health, action1[0], action1[1], action1[2]),
+                                 (robot2.x, robot2.y, robot2.angle, robot2.health, action2[0], action2[1], action2[2]))
+        self.length = step + 2
+
+
+class TrajectoryFile:
+    """
+    Trajectories of many battles in one .npy file of shape
+    (num_battles, max_steps + 1, 2, NUM_FIELDS), created memory-mapped, so the
+    recorders write straight into the file. A JSON file next to it
+    (path + ".json") holds a label per battle (opponent type, fitness values, ...).
+    """
+    def __init__(self, path, num_battles, max_steps):
+        self.path = path
+        self.data = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32,
+                                              shape=(num_battles, max_steps + 1, 2, NUM_FIELDS))
+        self.data[:] = np.nan
+        self.labels = [{} for _ in range(num_battles)]
+
+    def recorder(self, battle):
+        return TrajectoryRecorder(self.data[battle])
+
+    def set_label(self, battle, **label):
+        self.labels[battle] = label
+
+    def close(self):
+        self.data.flush()
+        with open(self.path + ".json", "w") as f:
+            json.dump({"fields": list(FIELDS), "labels": self.labels}, f, indent=2)
+        self.data = None
+
+
+def load_trajectories(path):
+    """
+    Opens a trajectory file memory-mapped.
+    Returns the (num_battles, max_steps + 1, 2, NUM_FIELDS) array and the list of labels.
+    """
+    data = np.load(path, mmap_mode="r")
+    with open(path + ".json") as f:
+        labels = json.load(f)["labels"]
+    return data, labels
+
+
+def battle_length(trajectory):
+    """ Number of recorded rows of one battle (starting state included). """
+    return int(np.count_nonzero(~np.isnan(trajectory[:, 0, 0])))
@@ -3,17 +3,109 @@
 #    Degree Program: Computer Engineering
 
 import random
+import hashlib
+import math
 import neat
 import os
+import multiprocessing
 from controllers import RandomController, StaticShooter, AggressiveChaser
 from arena import Arena
 from robot import Robot
-from sensors import Sensors
+from step_kernel import StepKernel
+import batch_arena
+from compiled_network import CompiledNetwork
+from match_cache import genome_hash
+from scheduling import SCHEDULES
+from hall_of_fame import open_archive
+from early_stop import EarlyStop
+from trajectory import TrajectoryFile
+from generated_network import GeneratedNetworkCache
 
 # Maximum number of simulation steps for a single battle
 MAX_STEPS = 300
 filename_for_fitness_history = "fitness_history.csv"
 
+# Seed of the whole run: every battle gets its own RNG derived from
+# (run_seed, generation, match id), so results do not depend on the order
+# in which battles are played, on parallelism or on caching
+run_seed = 0
+
+# Persistent process pool used by eval_genomes (None means serial evaluation)
+worker_pool = None
+worker_count = 1
+
+# When True, eval_genomes simulates its match lists with the vectorized BatchArena
+use_batch_engine = False
+# When True, the batch engine evaluates networks as stacked NumPy matrices
+# (outputs match FeedForwardNetwork within float tolerance, not bit for bit)
+use_matrix_networks = False
+
+# When set (a generated_network.GeneratedNetworkCache), genomes are played by
+# generated straight-line Python networks instead of FeedForwardNetwork (same outputs)
+generated_networks = None
+
+# Optional population_buffer.PopulationBuffer: with a worker pool, the networks of
+# a generation are published once to shared memory and tasks only carry references
+population_buffer = None
+
+# Opponent schedule for the internal battles (see scheduling.py) and the
+# number of opponents per genome for the sampled schedules
+schedule_strategy = "round_robin"
+schedule_opponents = 10
+
+# Optional HallOfFame of past champions; every genome plays hall_of_fame_opponents
+# of them per generation, counted as internal matches
+hall_of_fame = None
+hall_of_fame_opponents = 3
+
+# Optional MatchCache shared by all generations (None disables caching)
+match_cache = None
+
+# Early battle termination: None (off), "exact" (only provably settled battles)
+# or "stall" (also battles stalled against the walls for early_stop_steps steps)
+early_stop_mode = None
+early_stop_steps = 30
+
+# Action repeat (frame skip): the controllers are queried every action_repeat
+# steps and their actions are applied again in the steps in between; movement,
+# damage and wall clamping still run every step. 1 queries them every step.
+action_repeat = 1
+
+# Counters of the current generation, filled by run_cached_battles
+generation_stats = {"battles": 0, "steps": 0, "steps_saved": 0}
+
+# Population averages of the per-match scores (internal, external) of the last
+# evaluated generation, as written to the fitness history
+generation_averages = (0.0, 0.0)
+
+# Optional phase_timing.PhaseTimer recording the time of each phase of a generation
+phase_timer = None
+
+# Optional telemetry.TelemetryWriter receiving one record per match
+telemetry = None
+
+def lap(phase):
+    """
+    Charges the time since the previous lap to a phase of the generation
+    (see phase_timing.py). Does nothing when phase timing is off.
+    """
+    if phase_timer is not None:
+        phase_timer.lap(phase)
+
+
+def derive_seed(*match_id):
+    """
+    64-bit seed derived from run_seed and a match identifier,
+    e.g. (generation, "external", genome_id, "Random", 0).
+    """
+    text = ":".join(str(part) for part in (run_seed,) + match_id)
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+def battle_rng(*match_id):
+    """ Independent random.Random stream for the given match identifier. """
+    return random.Random(derive_seed(*match_id))
+
+
 def print_ascii_logo():
     ascii_art = r"""
   ____                            _       _   _                      __ 
@@ -29,42 +121,123 @@ def print_ascii_logo():
     print(ascii_art)
 
 
-def simulate_battle(net1, net2):
+def simulate_battle(net1, net2, stats=None, recorder=None, repeat=None):
     """
     Simulates a fight between two robots controlled by neural networks.
     Returns the fitness contribution for both controllers.
+    If a stats dict is given, it receives the number of simulated steps,
+    the steps saved by early termination and the damage inflicted by each robot.
+    If a trajectory.TrajectoryRecorder is given, it receives the state and the
+    actions of both robots at every step.
+    repeat overrides the action_repeat setting for this battle.
     """
+    repeat = action_repeat if repeat is None else repeat
 
     # Minimal arena: unit square with two robots
     robot1 = Robot(controller=net1, start_pos=(0.2, 0.5))
     robot2 = Robot(controller=net2, start_pos=(0.8, 0.5))
     arena = Arena(width=1.0, height=1.0, robots=[robot1, robot2], max_steps=MAX_STEPS)
+    kernel = StepKernel(arena)
 
-    for step in range(MAX_STEPS):
-        # Sensor values represent the current state of the environment
-        sensors1 = Sensors.get(robot1, arena)
-        sensors2 = Sensors.get(robot2, arena)
-
-        # Neural networks compute actions from sensor inputs
-        action1 = net1.activate(sensors1)
-        action2 = net2.activate(sensors2)
+    early_stop = None
+    if early_stop_mode is not None:
+        deterministic = getattr(net1, "deterministic", True) and getattr(net2, "deterministic", True)
+        early_stop = EarlyStop(MAX_STEPS, early_stop_mode, early_stop_steps, deterministic, repeat)
+    steps_saved = 0
+    if recorder is not None:
+        recorder.start(robot1, robot2)
 
-        # Actions modify robot state (movement, shooting, etc.)
-        robot1.apply_action(action1)
-        robot2.apply_action(action2)
-
-        # Environment update (physics, collisions, damage)
-        arena.apply_damage()
-        arena.keep_inside(robot1)
-        arena.keep_inside(robot2)
+    for step in range(MAX_STEPS):
+        # Sensors, network activation, movement, damage and wall clamping,
+        # with the pairwise geometry computed once per step
+        if step % repeat == 0:
+            action1, action2 = kernel.battle_step(net1, net2)
+        else:
+            kernel.act(action1, action2)
+        if recorder is not None:
+            recorder.record(step, robot1, robot2, action1, action2)
 
         # Battle ends when at least one robot is destroyed
         if robot1.is_dead() or robot2.is_dead():
             break
 
-    return compute_fitness(robot1, robot2, step)
+        # ... or when its result can no longer change: the survival reward
+        # is credited as if it had run to the end
+        if early_stop is not None and early_stop.settled(step, robot1, robot2, arena, action1, action2):
+            steps_saved = MAX_STEPS - 1 - step
+            break
+
+    if stats is not None:
+        stats["steps"] = step + 1
+        stats["steps_saved"] = steps_saved
+        stats["damage1"] = robot1.damage_inflicted
+        stats["damage2"] = robot2.damage_inflicted
+    return compute_fitness(robot1, robot2, step + steps_saved)
+
+
+def simulate_battles(pairs, stats=None):
+    """
+    Simulates a list of (controller1, controller2) battles in lockstep with
+    BatchArena. Returns the same (fitness1, fitness2) values that
+    simulate_battle would return for each pair (within float tolerance with
+    matrix networks, which already give up bit-exact results, so the engine
+    uses the NumPy distance and bearing functions too).
+    If a stats list is given, it is extended with one dict per battle.
+    """
+    if not pairs:
+        return []
+    controllers1 = [pair[0] for pair in pairs]
+    controllers2 = [pair[1] for pair in pairs]
+    batch_stats = {}
+    fitness1, fitness2 = batch_arena.simulate_battles(controllers1, controllers2, max_steps=MAX_STEPS,
+                                                      early_stop_mode=early_stop_mode,
+                                                      stall_steps=early_stop_steps, stats=batch_stats,
+                                                      action_repeat=action_repeat,
+                                                      exact=not use_matrix_networks)
+    if stats is not None:
+        for steps, steps_saved, damage1, damage2 in zip(batch_stats["steps"].tolist(),
+                                                        batch_stats["steps_saved"].tolist(),
+                                                        *batch_stats["damage"].tolist()):
+            stats.append({"steps": steps, "steps_saved": steps_saved, "damage1": damage1, "damage2": damage2})
+    return list(zip(fitness1.tolist(), fitness2.tolist()))
+
+def simulate_free_for_all(nets, teams=None, max_steps=MAX_STEPS):
+    """
+    Simulates one battle between many robots (e.g. 8 to 256) in the unit arena,
+    every robot sensing its nearest living opponent. teams optionally gives
+    the team of each robot, otherwise it is a free-for-all.
+    Robots start evenly spaced on a circle, facing the centre.
+    Returns one fitness value per network, with the rules of compute_fitness:
+    damage inflicted, 0.1 per step survived and 100 for the side left standing.
+    """
+    robots = []
+    for i, net in enumerate(nets):
+        direction = 2 * math.pi * i / len(nets)
+        robot = Robot(controller=net, start_pos=(0.5 + 0.4 * math.cos(direction), 0.5 + 0.4 * math.sin(direction)),
+                      team=teams[i] if teams is not None else None)
+        robot.angle = direction + math.pi
+        robots.append(robot)
+    arena = Arena(width=1.0, height=1.0, robots=robots, max_steps=max_steps)
+
+    survived = [None] * len(robots)
+    while not arena.is_done():
+        arena.step()
+        for i, robot in enumerate(robots):
+            if survived[i] is None and robot.is_dead():
+                survived[i] = arena.current_step - 1
+
+    alive = [robot for robot in robots if not robot.is_dead()]
+    winners_left = 0 < len(alive) < len(robots) and all(not alive[0].is_opponent(r) for r in alive[1:])
+    fitness = []
+    for i, robot in enumerate(robots):
+        steps = survived[i] if survived[i] is not None else arena.current_step - 1
+        value = robot.damage_inflicted + steps * 0.1
+        if winners_left and not robot.is_dead():
+            value += 100.0
+        fitness.append(value)
+    return fitness
+
 
-    
 def compute_fitness(robot1, robot2, steps):
     """
     Computes fitness values based on battle outcome.
@@ -93,8 +266,9 @@ def compute_fitness(robot1, robot2, steps):
 
 # Wrappers for new controllers to match .activate() interface
 class RandomWrapper:
-    def __init__(self):
-        self.controller = RandomController()
+    deterministic = False
+    def __init__(self, rng=None):
+        self.controller = RandomController(rng)
     def activate(self, _):
         return self.controller.act()
 
@@ -110,19 +284,224 @@ class ChaserWrapper:
     def activate(self, sensors):
         return self.controller.act(sensors)
 
+# External opponents used during evaluation, with the number of matches per genome
+EXTERNAL_OPPONENTS = [("Random", 2), ("Static", 4), ("Chaser", 4)]
+
+
+def make_opponent(opponent_type, seed=None):
+    """
+    Builds a scripted opponent. Random opponents get their own RNG seeded
+    with `seed`, so the match gives the same result in any process.
+    """
+    if opponent_type == "Random":
+        return RandomWrapper(random.Random(seed))
+    if opponent_type == "Static":
+        return StaticWrapper()
+    if opponent_type == "Chaser":
+        return ChaserWrapper()
+    raise ValueError(f"Unknown opponent type: {opponent_type}")
+
+def is_deterministic_opponent(opponent_type):
+    """ True if a network always gets the same result against this scripted opponent. """
+    return getattr(make_opponent(opponent_type, 0), "deterministic", True)
+
+
+def collapse_repeated_matches(matchups):
+    """
+    matchups[i] identifies match i when it is deterministic (equal ids give equal
+    results), or is None for matches that must always be simulated.
+    Returns the indices of the matches to simulate (the first of every matchup)
+    and, for every match, the position of its result among the simulated ones.
+    """
+    simulated = []
+    source = []
+    first = {}
+    for i, matchup in enumerate(matchups):
+        if matchup is not None and matchup in first:
+            source.append(first[matchup])
+            continue
+        if matchup is not None:
+            first[matchup] = len(simulated)
+        source.append(len(simulated))
+        simulated.append(i)
+    return simulated, source
+
+# Worker functions return the fitness values of a task and the battle stats
+# (for matches of a single genome, the stats also hold the opponent's fitness)
+
 # Worker function for round-robin battles
 def worker_battle(args):
     id1, net1, id2, net2 = args
-    f1, f2 = simulate_battle(net1, net2)
-    return id1, f1, id2, f2
+    stats = {}
+    f1, f2 = simulate_battle(net1, net2, stats)
+    return (f1, f2), stats
 
 # Worker function for random battles
 def worker_random_battle(args):
-    genome_id, net = args
-    # We need to recreate RandomWrapper here to ensure new random state/opponent
-    opponent = RandomWrapper()
-    f_genome, _ = simulate_battle(net, opponent)
-    return genome_id, f_genome
+    genome_id, net, seed = args
+    # The seed is drawn by the parent process, so the opponent behaves the same
+    # whether the match runs here or in the serial path
+    opponent = RandomWrapper(random.Random(seed))
+    stats = {}
+    f_genome, stats["opponent_fitness"] = simulate_battle(net, opponent, stats)
+    return (f_genome,), stats
+
+# Worker function for matches against any scripted opponent
+def worker_external_battle(args):
+    genome_id, net, opponent_type, seed = args
+    if opponent_type == "Random":
+        return worker_random_battle((genome_id, net, seed))
+    stats = {}
+    f_genome, stats["opponent_fitness"] = simulate_battle(net, make_opponent(opponent_type), stats)
+    return (f_genome,), stats
+
+# Worker function for matches against an archived champion
+# (the archive file is memory-mapped once per process and revision)
+def worker_archive_battle(args):
+    genome_id, net, archive_path, revision, index = args
+    opponent = open_archive(archive_path, revision).network(index)
+    stats = {}
+    f_genome, stats["opponent_fitness"] = simulate_battle(net, opponent, stats)
+    return (f_genome,), stats
+
+
+def compile_networks(nets):
+    """
+    Compiles a list of FeedForwardNetwork into CompiledNetwork, once per
+    distinct network, when matrix networks are enabled.
+    """
+    if not use_matrix_networks:
+        return nets
+    compiled = {}
+    for net in nets:
+        if id(net) not in compiled:
+            compiled[id(net)] = CompiledNetwork.from_network(net)
+    return [compiled[id(net)] for net in nets]
+
+# Batched worker functions: each one simulates a whole chunk of tasks with BatchArena
+def worker_battle_batch(tasks):
+    nets = compile_networks([net for _, net1, _, net2 in tasks for net in (net1, net2)])
+    stats = []
+    fitness = simulate_battles(list(zip(nets[0::2], nets[1::2])), stats)
+    return list(zip(fitness, stats))
+
+def worker_external_battle_batch(tasks):
+    nets = compile_networks([net for _, net, _, _ in tasks])
+    opponents = [(net, make_opponent(opponent_type, seed)) for net, (_, _, opponent_type, seed) in zip(nets, tasks)]
+    stats = []
+    fitness = simulate_battles(opponents, stats)
+    return [((f_genome,), dict(battle_stats, opponent_fitness=f_opponent))
+            for (f_genome, f_opponent), battle_stats in zip(fitness, stats)]
+
+def worker_archive_battle_batch(tasks):
+    nets = compile_networks([net for _, net, _, _, _ in tasks])
+    opponents = [(net, open_archive(path, revision).network(index))
+                 for net, (_, _, path, revision, index) in zip(nets, tasks)]
+    stats = []
+    fitness = simulate_battles(opponents, stats)
+    return [((f_genome,), dict(battle_stats, opponent_fitness=f_opponent))
+            for (f_genome, f_opponent), battle_stats in zip(fitness, stats)]
+
+
+def start_worker_pool(workers):
+    """
+    Starts the process pool shared by all generations.
+    With workers <= 1 the evaluation stays serial.
+    """
+    global worker_pool, worker_count
+    close_worker_pool()
+    if workers is not None and workers > 1:
+        worker_pool = multiprocessing.Pool(processes=workers)
+        worker_count = workers
+    return worker_pool
+
+def close_worker_pool():
+    global worker_pool, worker_count
+    if worker_pool is not None:
+        worker_pool.close()
+        worker_pool.join()
+    worker_pool = None
+    worker_count = 1
+
+def run_battles(worker, tasks, batch_worker=None):
+    """
+    Runs a list of battle tasks, in the worker pool if there is one.
+    With the batch engine enabled, tasks are split into one chunk per worker
+    and every chunk is simulated in lockstep by batch_worker.
+    Results always come back in task order, so accumulating them gives
+    the same fitness values as the serial path.
+    """
+    if use_batch_engine and batch_worker is not None:
+        chunk_size = max(1, -(-len(tasks) // worker_count))
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+        if worker_pool is None:
+            chunk_results = [batch_worker(chunk) for chunk in chunks]
+        else:
+            chunk_results = worker_pool.map(batch_worker, chunks)
+        return [result for chunk in chunk_results for result in chunk]
+
+    if worker_pool is None:
+        return [worker(task) for task in tasks]
+    chunksize = max(1, len(tasks) // (worker_count * 4))
+    return worker_pool.map(worker, tasks, chunksize)
+
+def run_cached_battles(worker, tasks, batch_worker, keys, match_stats=None):
+    """
+    Like run_battles, but returns only the fitness values of each task
+    ((f1, f2) for genome battles, (f_genome,) for external matches)
+    and adds the battle stats to generation_stats.
+    keys[i] is the cache key of tasks[i], or None if the match is not
+    deterministic; matches already in the match cache are not simulated again.
+    If a match_stats list is given, it receives the stats of every task
+    (None for the matches served by the cache).
+    """
+    results = [None] * len(tasks)
+    pending = []
+    for i, key in enumerate(keys):
+        cached = None
+        if match_cache is not None and key is not None:
+            cached = match_cache.get(key)
+        if cached is None:
+            pending.append(i)
+        else:
+            results[i] = cached
+
+    fresh = run_battles(worker, [tasks[i] for i in pending], batch_worker)
+    if match_stats is not None:
+        match_stats[:] = [None] * len(tasks)
+    for i, (fitness, stats) in zip(pending, fresh):
+        if match_stats is not None:
+            match_stats[i] = stats
+        results[i] = fitness
+        generation_stats["battles"] += 1
+        generation_stats["steps"] += stats["steps"]
+        generation_stats["steps_saved"] += stats["steps_saved"]
+        if match_cache is not None and keys[i] is not None:
+            match_cache.put(keys[i], results[i])
+    return results
+
+
+def record_matches(opponent_types, genome1, genome2, results, match_stats):
+    """
+    Appends a block of matches of the current generation to the telemetry store.
+    results are the fitness tuples returned by run_cached_battles and match_stats
+    the stats it collected (None for cached matches, stored with steps and damage -1).
+    """
+    f2 = []
+    steps = []
+    damage1 = []
+    damage2 = []
+    for fitness, stats in zip(results, match_stats):
+        stats = stats or {}
+        if len(fitness) == 2:
+            f2.append(fitness[1])
+        else:
+            f2.append(stats.get("opponent_fitness", float("nan")))
+        steps.append(stats.get("steps", -1))
+        damage1.append(stats.get("damage1", -1))
+        damage2.append(stats.get("damage2", -1))
+    telemetry.append(generation_count, genome1, genome2, opponent_types,
+                     [fitness[0] for fitness in results], f2, steps, damage1, damage2)
 
 
 # Global generation counter for logging
@@ -133,7 +512,11 @@ def eval_genomes(genomes, config):
     Evaluation function required by neat-python.
     Each genome is evaluated by fighting against other genomes.
     """
-    global generation_count
+    global generation_count, generation_averages
+    lap(None)
+
+    for key in generation_stats:
+        generation_stats[key] = 0
 
     # Initialize fitness for all genomes
     for _, genome in genomes:
@@ -147,58 +530,138 @@ def eval_genomes(genomes, config):
     for genome_id, genome in genomes:
         # every genome gets its own neural network
         # the netowrk takes sensor inputs and produces action outputs
-        networks[genome_id] = neat.nn.FeedForwardNetwork.create(genome, config)
+        if generated_networks is not None and not (population_buffer is not None and worker_pool is not None):
+            networks[genome_id] = generated_networks.get(genome, config)
+        else:
+            networks[genome_id] = neat.nn.FeedForwardNetwork.create(genome, config)
+
+    # Content hashes identify genomes that are unchanged since an earlier generation
+    shared = population_buffer is not None and worker_pool is not None
+    hashes = {}
+    if match_cache is not None or (shared and generated_networks is not None):
+        hashes = {genome_id: genome_hash(genome) for genome_id, genome in genomes}
+
+    if shared:
+        # workers map the whole generation once and rebuild every network at most once
+        # (generated networks at most once per process, found again by content hash)
+        generated = generated_networks is not None
+        references = population_buffer.publish(list(networks.values()), config.genome_config.input_keys,
+                                               config.genome_config.output_keys, generated=generated,
+                                               contents=[hashes[key] for key in networks] if generated else None)
+        networks = dict(zip(networks, references))
 
     genome_ids = list(networks.keys())
-
-    # Round-robin competitive coevolution
-    for i in range(len(genome_ids)):
-        for j in range(i + 1, len(genome_ids)):
+    lap("network_creation")
+
+    # Competitive coevolution: round-robin by default, or a sampled schedule
+    # where each genome meets about schedule_opponents others
+    genomes_by_id = dict(genomes)
+    schedule = SCHEDULES[schedule_strategy]
+    schedule_rng = battle_rng(generation_count, "schedule")
+    scores = [0.0] * len(genome_ids)
+    for genome in genomes_by_id.values():
+        genome.matches_internal = 0
+
+    for round_pairs in schedule(len(genome_ids), schedule_opponents, schedule_rng, scores):
+        battle_tasks = []
+        battle_keys = []
+        for i, j in round_pairs:
             id1 = genome_ids[i]
             id2 = genome_ids[j]
-
-            net1 = networks[id1]
-            net2 = networks[id2]
-
-            f1, f2 = simulate_battle(net1, net2)
-
+            battle_tasks.append((id1, networks[id1], id2, networks[id2]))
+            # sides matter, so the key is the ordered pair of hashes
+            battle_keys.append((hashes[id1], hashes[id2]) if hashes else None)
+
+        battle_stats = [] if telemetry is not None else None
+        battle_results = run_cached_battles(worker_battle, battle_tasks, worker_battle_batch, battle_keys,
+                                            battle_stats)
+        if telemetry is not None:
+            record_matches(["Genome"] * len(battle_tasks), [task[0] for task in battle_tasks],
+                           [task[2] for task in battle_tasks], battle_results, battle_stats)
+        for (id1, _, id2, _), (f1, f2) in zip(battle_tasks, battle_results):
             # Fitness accumulation reflects relative performance
-            genomes[i][1].fitness_internal += f1
-            genomes[j][1].fitness_internal += f2
-    
+            genomes_by_id[id1].fitness_internal += f1
+            genomes_by_id[id2].fitness_internal += f2
+            genomes_by_id[id1].matches_internal += 1
+            genomes_by_id[id2].matches_internal += 1
+
+        # Current average score per match, used by adaptive schedules (Swiss)
+        for i, genome_id in enumerate(genome_ids):
+            genome = genomes_by_id[genome_id]
+            scores[i] = genome.fitness_internal / genome.matches_internal if genome.matches_internal else 0.0
+    lap("internal_battles")
+
+    # Matches against a sample of past champions from the hall of fame
+    if hall_of_fame is not None and len(hall_of_fame) > 0:
+        archive_rng = battle_rng(generation_count, "hall_of_fame")
+        archive_tasks = []
+        archive_keys = []
+        for genome_id, _ in genomes:
+            for index in hall_of_fame.sample(hall_of_fame_opponents, archive_rng):
+                archive_tasks.append((genome_id, networks[genome_id], hall_of_fame.path, hall_of_fame.revision, index))
+                archive_keys.append((hashes[genome_id], hall_of_fame.entry_id(index)) if hashes else None)
+
+        archive_stats = [] if telemetry is not None else None
+        archive_results = run_cached_battles(worker_archive_battle, archive_tasks,
+                                             worker_archive_battle_batch, archive_keys, archive_stats)
+        if telemetry is not None:
+            record_matches(["HallOfFame"] * len(archive_tasks), [task[0] for task in archive_tasks],
+                           [hall_of_fame.genome_keys[task[4]] for task in archive_tasks],
+                           archive_results, archive_stats)
+        for (genome_id, _, _, _, _), (f_genome,) in zip(archive_tasks, archive_results):
+            genomes_by_id[genome_id].fitness_internal += f_genome
+            genomes_by_id[genome_id].matches_internal += 1
+    lap("hall_of_fame")
+
     # Validation against multiple opponents to prevent overfitting
-    # Each genome plays against Random, Static, and Chaser bots
-    for genome_id, genome in genomes:
-        net = networks[genome_id]
-        
-        # 1. Fight against Random (unpredictable) - 2 matches
-        for _ in range(2):
-            opponent = RandomWrapper()
-            f_genome, _ = simulate_battle(net, opponent)
-            genome.fitness_external += f_genome
-            
-        # 2. Fight against Static (aim test) - 2 matches
-        for _ in range(4):
-            opponent = StaticWrapper()
-            f_genome, _ = simulate_battle(net, opponent)
-            genome.fitness_external += f_genome
-        
-        # 3. Fight against Chaser (pressure test) - 2 matches
-        for _ in range(4):
-            opponent = ChaserWrapper()
-            f_genome, _ = simulate_battle(net, opponent)
-            genome.fitness_external += f_genome
-            
+    # Each genome plays against Random, Static, and Chaser bots:
+    # 2 matches vs Random (unpredictable), 4 vs Static (aim test), 4 vs Chaser (pressure test)
+    # Random opponents get a seed derived from the generation and the match id
+    # Static and Chaser only look at the sensors, so their repeated matches against
+    # the same genome are simulated once and the result is counted for every repeat
+    deterministic_types = {opponent_type for opponent_type, _ in EXTERNAL_OPPONENTS
+                           if is_deterministic_opponent(opponent_type)}
+    external_tasks = []
+    external_keys = []
+    external_matchups = []
+    for genome_id, _ in genomes:
+        for opponent_type, num_matches in EXTERNAL_OPPONENTS:
+            deterministic = opponent_type in deterministic_types
+            for match in range(num_matches):
+                seed = None
+                if opponent_type == "Random":
+                    seed = derive_seed(generation_count, "external", genome_id, opponent_type, match)
+                external_tasks.append((genome_id, networks[genome_id], opponent_type, seed))
+                external_matchups.append((genome_id, opponent_type) if deterministic else None)
+                # Random opponents are not deterministic and are never cached
+                external_keys.append((hashes[genome_id], opponent_type) if hashes and deterministic else None)
+
+    simulated, source = collapse_repeated_matches(external_matchups)
+    external_stats = [] if telemetry is not None else None
+    unique_results = run_cached_battles(worker_external_battle, [external_tasks[i] for i in simulated],
+                                        worker_external_battle_batch, [external_keys[i] for i in simulated],
+                                        external_stats)
+    external_results = [unique_results[k] for k in source]
+    if telemetry is not None:
+        external_stats = [external_stats[k] for k in source]
+        record_matches([task[2] for task in external_tasks], [task[0] for task in external_tasks],
+                       [-1] * len(external_tasks), external_results, external_stats)
+    for (genome_id, _, _, _), (f_genome,) in zip(external_tasks, external_results):
+        genomes_by_id[genome_id].fitness_external += f_genome
+    lap("external_matches")
+
     # Combine fitness and calculate stats
     total_internal = 0.0
     total_external = 0.0
     
     # Calculate number of matches
-    num_opponents = len(genome_ids) - 1
+    # (internal matches are counted per genome: with round-robin it is len(genomes) - 1,
+    # with sampled schedules it can differ between genomes)
     num_external_matches = 6 # 2 Random + 2 Static + 2 Chaser
     
     for _, genome in genomes:
         # Normalize fitness by number of matches to balance incentives
+        num_opponents = genome.matches_internal
         avg_internal_score = genome.fitness_internal / num_opponents if num_opponents > 0 else 0.0
         avg_external_score = genome.fitness_external / num_external_matches
         
@@ -211,32 +674,65 @@ def eval_genomes(genomes, config):
         total_internal += avg_internal_score
         total_external += avg_external_score
 
+    # The champion of this generation joins the hall of fame
+    if hall_of_fame is not None:
+        best_id, best_genome = max(genomes, key=lambda item: item[1].fitness)
+        hall_of_fame.add(CompiledNetwork.create(best_genome, config), generation_count, best_id, best_genome.fitness,
+                         hashes[best_id] if hashes else genome_hash(best_genome))
+        hall_of_fame.save()
+
     # Calculate population averages of the per-match scores
     avg_internal_pop = total_internal / len(genomes)
     avg_external_pop = total_external / len(genomes)
-    
+    generation_averages = (avg_internal_pop, avg_external_pop)
+    lap("aggregation")
+
     print(f" > [Gen {generation_count}] Avg Score/Match - Internal: {avg_internal_pop:.2f} | External: {avg_external_pop:.2f}")
+    if early_stop_mode is not None:
+        simulated = generation_stats["steps"]
+        saved = generation_stats["steps_saved"]
+        share = 100.0 * saved / (simulated + saved) if simulated + saved > 0 else 0.0
+        print(f" > Early stop: {saved} steps saved ({share:.1f}%), {simulated} simulated")
+    if match_cache is not None:
+        print(f" > Match cache: {match_cache.hits} hits, {match_cache.misses} misses, {len(match_cache)} entries")
     log_fitness_history(generation_count, avg_internal_pop, avg_external_pop)
-    
+    lap("logging")
+
     generation_count += 1
 
 def log_fitness_history(gen, avg_int, avg_ext):
     """
     Appends fitness statistics to a CSV file.
     """
-    if not os.path.exists(filename_for_fitness_history) or gen == 0:
-        with open(filename_for_fitness_history, "w") as f:
+    # one open per generation: the header is written when the file is (re)created
+    new_file = not os.path.exists(filename_for_fitness_history) or gen == 0
+    with open(filename_for_fitness_history, "w" if new_file else "a") as f:
+        if new_file:
             f.write("Generation,Avg_Internal_Score_Per_Match,Avg_External_Score_Per_Match\n")
-            
-    with open(filename_for_fitness_history, "a") as f:
         f.write(f"{gen},{avg_int:.2f},{avg_ext:.2f}\n")
     
-def test_best_genome_against_random_opponents(winner_net, num_tests=100):
+def truncate_fitness_history(gen):
+    """
+    Drops the rows of generation >= gen from the fitness history, e.g. the
+    generations played after the checkpoint a run is resumed from.
+    """
+    if not os.path.exists(filename_for_fitness_history):
+        return
+    with open(filename_for_fitness_history) as f:
+        lines = f.readlines()
+    kept = lines[:1] + [line for line in lines[1:] if line.strip() and int(line.split(",")[0]) < gen]
+    with open(filename_for_fitness_history, "w") as f:
+        f.writelines(kept)
+    
+def test_best_genome_against_random_opponents(winner_net, num_tests=100, trajectories=None, repeat=None):
     """
     Test the best genome against a mix of opponents:
     1. RandomController (unpredictable)
     2. StaticShooter (perfect aim, stationary)
     3. AggressiveChaser (perfect aim, chases)
+    The match order and every random opponent use RNGs derived from run_seed.
+    If trajectories is a path, every match is recorded there (see trajectory.py).
+    repeat overrides the action_repeat setting for these matches.
     
     Returns:
         results: list of [match_number, who_won, winner_fitness, opponent_fitness, opponent_type]
@@ -250,20 +746,26 @@ def test_best_genome_against_random_opponents(winner_net, num_tests=100):
     num_chaser = num_tests - num_random - num_static
     
     opponents = []
-    for _ in range(num_random): opponents.append(("Random", RandomWrapper()))
+    for i in range(num_random): opponents.append(("Random", RandomWrapper(battle_rng("final", "Random", i))))
     for _ in range(num_static): opponents.append(("Static", StaticWrapper()))
     for _ in range(num_chaser): opponents.append(("Chaser", ChaserWrapper()))
     
-    random.shuffle(opponents)
+    battle_rng("final", "order").shuffle(opponents)
 
+    recording = TrajectoryFile(trajectories, len(opponents), MAX_STEPS) if trajectories is not None else None
     for i, (opp_type, opponent_net) in enumerate(opponents):
-        f1, f2 = simulate_battle(winner_net, opponent_net)
+        recorder = recording.recorder(i) if recording is not None else None
+        f1, f2 = simulate_battle(winner_net, opponent_net, recorder=recorder, repeat=repeat)
+        if recording is not None:
+            recording.set_label(i, match=i + 1, opponent=opp_type, f1=f1, f2=f2)
 
         # Decide who "won" the match for display
         winner_label = "Winner" if f1 >= f2 else opp_type
 
         # Add to results list
         results.append([i+1, winner_label, f1, f2, opp_type])
+    if recording is not None:
+        recording.close()
     return results
 
 